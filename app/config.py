@@ -1,4 +1,6 @@
 import os
+from typing import List
+
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -6,9 +8,125 @@ load_dotenv()
 
 class Settings:
     GROQ_API_KEY: str = os.getenv("GROQ_API_KEY", "")
+    # Plusieurs clés (séparées par des virgules) pour additionner les quotas
+    GROQ_API_KEYS: str = os.getenv("GROQ_API_KEYS", "")
+    # Optionnel: autre endpoint compatible (ex: faux serveur Groq des benchmarks)
+    GROQ_BASE_URL: str = os.getenv("GROQ_BASE_URL", "")
     MODEL_NAME: str = os.getenv("MODEL_NAME", "llama-3.1-70b-versatile")
+    # Modèle rapide pour les tâches courtes (vide = MODEL_NAME pour tout)
+    MODEL_NAME_FAST: str = os.getenv("MODEL_NAME_FAST", "")
+    LLM_FAST_TASKS: str = os.getenv("LLM_FAST_TASKS", "classify")
     APP_ENV: str = os.getenv("APP_ENV", "dev")
 
+    # Client HTTP async vers Groq (pool partagé, timeouts, appels simultanés)
+    GROQ_CONNECT_TIMEOUT: float = float(os.getenv("GROQ_CONNECT_TIMEOUT", "5"))
+    GROQ_READ_TIMEOUT: float = float(os.getenv("GROQ_READ_TIMEOUT", "30"))
+    GROQ_MAX_CONNECTIONS: int = int(os.getenv("GROQ_MAX_CONNECTIONS", "100"))
+    GROQ_MAX_CONCURRENCY: int = int(os.getenv("GROQ_MAX_CONCURRENCY", "64"))
+    GROQ_MAX_RETRIES: int = int(os.getenv("GROQ_MAX_RETRIES", "2"))
+
+    # Admission des appels LLM: budget du quota Groq (par worker, 0 = illimité)
+    # et échéance (secondes) au-delà de laquelle l'appel est refusé -> fallback
+    # (le quota est par clé: le budget total est multiplié par le nombre de clés)
+    GROQ_REQUESTS_PER_MINUTE: float = float(os.getenv("GROQ_REQUESTS_PER_MINUTE", "1000"))
+    GROQ_TOKENS_PER_MINUTE: float = float(os.getenv("GROQ_TOKENS_PER_MINUTE", "250000"))
+    LLM_QUEUE_MAX: int = int(os.getenv("LLM_QUEUE_MAX", "256"))
+    LLM_DEADLINE_CLASSIFY: float = float(os.getenv("LLM_DEADLINE_CLASSIFY", "2"))
+    LLM_DEADLINE_FIELDS: float = float(os.getenv("LLM_DEADLINE_FIELDS", "4"))
+    LLM_DEADLINE_CONFIRMATION: float = float(os.getenv("LLM_DEADLINE_CONFIRMATION", "8"))
+
+    # Disjoncteurs (global et par backend clé + modèle): ouverts si trop d'échecs sur la fenêtre
+    LLM_BREAKER_FAILURE_RATIO: float = float(os.getenv("LLM_BREAKER_FAILURE_RATIO", "0.5"))
+    LLM_BREAKER_MIN_CALLS: int = int(os.getenv("LLM_BREAKER_MIN_CALLS", "10"))
+    LLM_BREAKER_WINDOW: int = int(os.getenv("LLM_BREAKER_WINDOW", "50"))
+    LLM_BREAKER_OPEN_SECONDS: float = float(os.getenv("LLM_BREAKER_OPEN_SECONDS", "30"))
+    # Disjoncteur global: un appel plus lent que ce seuil compte comme un échec
+    LLM_BREAKER_SLOW_SECONDS: float = float(os.getenv("LLM_BREAKER_SLOW_SECONDS", "10"))
+
+    # Cache des réponses LLM (classify / generate-fields)
+    # CACHE_BACKEND: "memory" (LRU par worker) ou "mongo" (partagé entre workers)
+    CACHE_BACKEND: str = os.getenv("CACHE_BACKEND", "memory")
+    CACHE_MAX_ENTRIES: int = int(os.getenv("CACHE_MAX_ENTRIES", "2048"))
+    CACHE_TTL_SECONDS: float = float(os.getenv("CACHE_TTL_SECONDS", "3600"))
+    CACHE_CLASSIFY_ENABLED: bool = os.getenv("CACHE_CLASSIFY_ENABLED", "true").lower() == "true"
+    CACHE_FIELDS_ENABLED: bool = os.getenv("CACHE_FIELDS_ENABLED", "true").lower() == "true"
+
+    # Cache sémantique (paraphrases): réponse réutilisée si cosinus >= SEMANTIC_CACHE_THRESHOLD
+    SEMANTIC_CACHE_ENABLED: bool = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+    SEMANTIC_CACHE_THRESHOLD: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.8"))
+    SEMANTIC_CACHE_MAX_ENTRIES: int = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "2048"))
+    SEMANTIC_CACHE_DIM: int = int(os.getenv("SEMANTIC_CACHE_DIM", "1024"))
+
+    # Classificateur local: on n'appelle le LLM que si la confiance est sous le seuil
+    LOCAL_CLASSIFIER_ENABLED: bool = os.getenv("LOCAL_CLASSIFIER_ENABLED", "true").lower() == "true"
+    LOCAL_CLASSIFIER_THRESHOLD: float = float(os.getenv("LOCAL_CLASSIFIER_THRESHOLD", "0.8"))
+    LOCAL_CLASSIFIER_TRAIN_LIMIT: int = int(os.getenv("LOCAL_CLASSIFIER_TRAIN_LIMIT", "5000"))
+
+    # Rate limiter (slowapi): stockage partagé entre workers, ex. "sqlite:///var/lib/formulaire/rate_limits.db",
+    # "batched+redis://localhost:6379" ou "mongodb://localhost:27017" (défaut: mémoire, par worker)
+    RATE_LIMIT_STORAGE_URI: str = os.getenv("RATE_LIMIT_STORAGE_URI", "memory://")
+    RATE_LIMIT_STRATEGY: str = os.getenv("RATE_LIMIT_STRATEGY", "sliding-window-counter")
+    # Secondes entre deux synchronisations des compteurs locaux (sqlite:// et batched+...), 0 = exact
+    RATE_LIMIT_SYNC_INTERVAL: float = float(os.getenv("RATE_LIMIT_SYNC_INTERVAL", "0.05"))
+    RATE_LIMIT_KEY_PREFIX: str = os.getenv("RATE_LIMIT_KEY_PREFIX", "formulaire")
+
+    # Après /api/classify, génération des champs lancée en avance pour la mission prédite
+    PREFETCH_FIELDS_ENABLED: bool = os.getenv("PREFETCH_FIELDS_ENABLED", "true").lower() == "true"
+    PREFETCH_FIELDS_TTL_SECONDS: float = float(os.getenv("PREFETCH_FIELDS_TTL_SECONDS", "120"))
+
+    # Validation des valeurs de /api/submit contre le schéma de la mission (avant LLM et MongoDB)
+    SUBMIT_VALIDATION_ENABLED: bool = os.getenv("SUBMIT_VALIDATION_ENABLED", "true").lower() == "true"
+
+    # Idempotence de /api/submit: en-tête Idempotency-Key. IDEMPOTENCY_DERIVE_KEYS: sans en-tête, clé dérivée
+    # de (mission, values, username), deux soumissions identiques dans le TTL n'en font alors qu'une
+    IDEMPOTENCY_ENABLED: bool = os.getenv("IDEMPOTENCY_ENABLED", "true").lower() == "true"
+    IDEMPOTENCY_DERIVE_KEYS: bool = os.getenv("IDEMPOTENCY_DERIVE_KEYS", "false").lower() == "true"
+    IDEMPOTENCY_TTL_SECONDS: int = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "600"))
+    IDEMPOTENCY_WAIT_SECONDS: float = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "30"))
+
+    # Write-behind des soumissions: insert_many par lot (taille max ou délai max en ms)
+    WRITE_BUFFER_ENABLED: bool = os.getenv("WRITE_BUFFER_ENABLED", "false").lower() == "true"
+    WRITE_BUFFER_MAX_BATCH: int = int(os.getenv("WRITE_BUFFER_MAX_BATCH", "100"))
+    WRITE_BUFFER_MAX_DELAY_MS: float = float(os.getenv("WRITE_BUFFER_MAX_DELAY_MS", "5"))
+
+    # Langues comptées séparément dans /api/submissions/stats (les autres: "other")
+    STATS_LANGUAGES: str = os.getenv("STATS_LANGUAGES", "fr,en")
+
+    # GET /api/submissions/export: documents lus (et envoyés) par lot
+    EXPORT_BATCH_SIZE: int = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+    # Budget de tokens des prompts: valeurs du formulaire (confirmation) et texte libre de l'utilisateur
+    PROMPT_VALUES_TOKEN_BUDGET: int = int(os.getenv("PROMPT_VALUES_TOKEN_BUDGET", "300"))
+    PROMPT_TEXT_TOKEN_BUDGET: int = int(os.getenv("PROMPT_TEXT_TOKEN_BUDGET", "1000"))
+    # max_tokens = percentile des complétions observées x marge (plafonné par la valeur de chaque appel)
+    LLM_ADAPTIVE_MAX_TOKENS: bool = os.getenv("LLM_ADAPTIVE_MAX_TOKENS", "true").lower() == "true"
+    LLM_MAX_TOKENS_PERCENTILE: float = float(os.getenv("LLM_MAX_TOKENS_PERCENTILE", "99"))
+    LLM_MAX_TOKENS_HEADROOM: float = float(os.getenv("LLM_MAX_TOKENS_HEADROOM", "1.3"))
+    LLM_MAX_TOKENS_WINDOW: int = int(os.getenv("LLM_MAX_TOKENS_WINDOW", "500"))
+
+    # Endpoints /batch: taille max d'un lot, prompts regroupés par appel LLM, appels parallèles
+    BATCH_MAX_ITEMS: int = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+    BATCH_CLASSIFY_PER_CALL: int = int(os.getenv("BATCH_CLASSIFY_PER_CALL", "10"))
+    BATCH_FIELDS_PER_CALL: int = int(os.getenv("BATCH_FIELDS_PER_CALL", "4"))
+    BATCH_CONCURRENCY: int = int(os.getenv("BATCH_CONCURRENCY", "4"))
+    BATCH_MAX_ATTEMPTS: int = int(os.getenv("BATCH_MAX_ATTEMPTS", "3"))
+    BATCH_RETRY_BACKOFF: float = float(os.getenv("BATCH_RETRY_BACKOFF", "1"))
+
+    # Génération différée des confirmations (workers en arrière-plan)
+    CONFIRMATION_WORKERS: int = int(os.getenv("CONFIRMATION_WORKERS", "4"))
+    CONFIRMATION_QUEUE_SIZE: int = int(os.getenv("CONFIRMATION_QUEUE_SIZE", "1000"))
+    CONFIRMATION_MAX_ATTEMPTS: int = int(os.getenv("CONFIRMATION_MAX_ATTEMPTS", "3"))
+    CONFIRMATION_RETRY_BACKOFF: float = float(os.getenv("CONFIRMATION_RETRY_BACKOFF", "0.5"))
+    # Bail d'une confirmation 'pending': un autre worker ne la reprend qu'après expiration
+    CONFIRMATION_LEASE_SECONDS: int = int(os.getenv("CONFIRMATION_LEASE_SECONDS", "300"))
+
+    # CONFIRMATION_MODE: "llm" (un appel par soumission) ou "template" (pool de modèles
+    # pré-générés par mission / langue / année, remplis localement au submit)
+    CONFIRMATION_MODE: str = os.getenv("CONFIRMATION_MODE", "llm")
+    CONFIRMATION_TEMPLATE_POOL_SIZE: int = int(os.getenv("CONFIRMATION_TEMPLATE_POOL_SIZE", "5"))
+    CONFIRMATION_TEMPLATE_REFRESH_SECONDS: float = float(os.getenv("CONFIRMATION_TEMPLATE_REFRESH_SECONDS", "3600"))
+    CONFIRMATION_TEMPLATE_LANGUAGES: str = os.getenv("CONFIRMATION_TEMPLATE_LANGUAGES", "fr,en")
+
     # Pour ton frontend React (à ajuster)
     FRONTEND_ORIGIN: str = os.getenv("FRONTEND_ORIGIN", "http://localhost:5173")
 
@@ -16,6 +134,11 @@ class Settings:
     MONGODB_URL: str = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
     MONGODB_DB_NAME: str = os.getenv("MONGODB_DB_NAME", "formMagique")
 
+    @property
+    def groq_api_keys(self) -> List[str]:
+        keys = [k.strip() for k in self.GROQ_API_KEYS.split(",") if k.strip()]
+        return keys or [self.GROQ_API_KEY]
+
 
 settings = Settings()
 
@@ -3,6 +3,7 @@ from app.constants.missions import MissionEnum
 
 # Schéma simple pour les champs
 # type: "text" | "email" | "textarea" | "number" | "select" | "checkbox"
+# min / max (optionnels): bornes des champs "number", vérifiées à la soumission
 BASE_FIELDS_BY_MISSION = {
     MissionEnum.CONTACT: [
         {
@@ -42,6 +43,7 @@ BASE_FIELDS_BY_MISSION = {
             "label": "Montant du don (€)",
             "type": "number",
             "required": True,
+            "min": 1,
         },
         {
             "name": "recurrence",
@@ -0,0 +1,52 @@
+from app.constants.missions import MissionEnum
+
+
+# Messages de confirmation sans LLM (disjoncteur ouvert, LLM saturé...)
+# Variables disponibles: {username}, {year}
+CONFIRMATION_TEMPLATES = {
+    MissionEnum.CONTACT: {
+        "fr": (
+            "Merci {username} ! Ton message a bien franchi les portes du Nexus. "
+            "Un gardien te répondra très vite. Reste connecté pour suivre nos quêtes en {year} !"
+        ),
+        "en": (
+            "Thank you {username}! Your message made it through the gates of the Nexus. "
+            "A guardian will get back to you soon. Stay tuned for our quests in {year}!"
+        ),
+    },
+    MissionEnum.DONATION: {
+        "fr": (
+            "Merci {username} pour ton don ! Ton soutien alimente directement les projets du Nexus. "
+            "Suis avec nous l'impact de ta contribution tout au long de {year} !"
+        ),
+        "en": (
+            "Thank you {username} for your donation! Your support directly powers the Nexus projects. "
+            "Follow the impact of your contribution with us throughout {year}!"
+        ),
+    },
+    MissionEnum.VOLUNTEER: {
+        "fr": (
+            "Bienvenue dans l'équipe, {username} ! Ta candidature de bénévole a bien été reçue. "
+            "Nous te contacterons pour ta première quête de {year}."
+        ),
+        "en": (
+            "Welcome to the crew, {username}! Your volunteer application has been received. "
+            "We will contact you for your first quest of {year}."
+        ),
+    },
+    MissionEnum.INFORMATION: {
+        "fr": (
+            "Merci {username} ! Ta demande d'information est entre les mains des archivistes du Nexus. "
+            "Tu recevras une réponse rapidement. Bonne exploration en {year} !"
+        ),
+        "en": (
+            "Thank you {username}! Your request for information is in the hands of the Nexus archivists. "
+            "You will get an answer shortly. Happy exploring in {year}!"
+        ),
+    },
+}
+
+DEFAULT_USERNAME = {
+    "fr": "Voyageur du Nexus",
+    "en": "Nexus traveler",
+}
@@ -30,3 +30,58 @@ MISSIONS = [
         "description": "Obtenir des détails sur l'association, ses projets, etc.",
     },
 ]
+
+
+# Exemples d'amorçage (FR / EN) pour le classificateur local,
+# complétés au démarrage par les soumissions enregistrées.
+MISSION_SEED_EXAMPLES = {
+    MissionEnum.CONTACT: [
+        "je veux vous contacter",
+        "j'ai une question à vous poser",
+        "prendre contact avec l'équipe",
+        "discuter avec vous, échanger",
+        "envoyer un message à l'association",
+        "bonjour, pouvez-vous me rappeler",
+        "I want to contact you",
+        "I have a question",
+        "get in touch with the team",
+        "send you a message, talk, chat",
+        "annuler ou modifier mon don mensuel, demander un remboursement, un reçu",
+        "cancel or change my monthly donation, ask for a refund or a receipt",
+    ],
+    MissionEnum.DONATION: [
+        "je veux faire un don",
+        "donner de l'argent à l'association",
+        "soutenir financièrement le projet",
+        "faire un don mensuel, don unique, don annuel",
+        "contribuer financièrement, verser une somme en euros",
+        "je souhaite offrir un don",
+        "I want to donate",
+        "make a donation, give money",
+        "support you financially with a monthly donation",
+        "contribute funds, pay, euros",
+    ],
+    MissionEnum.VOLUNTEER: [
+        "je veux devenir bénévole",
+        "rejoindre la guilde des bénévoles",
+        "aider l'association, donner de mon temps",
+        "proposer mes compétences, m'impliquer, participer",
+        "faire du bénévolat le week-end",
+        "je suis développeur et je veux aider",
+        "I want to volunteer",
+        "join the volunteers, help out",
+        "offer my skills and my time, get involved",
+        "volunteering on weekends, I am a developer and want to help",
+    ],
+    MissionEnum.INFORMATION: [
+        "je veux des informations sur l'association",
+        "obtenir des renseignements, des détails",
+        "en savoir plus sur vos projets",
+        "comment fonctionne l'association, explications",
+        "où trouver la documentation, quels sont vos projets",
+        "I would like more information",
+        "learn more about the project, details",
+        "how does the association work, explain",
+        "where can I find information about your projects",
+    ],
+}
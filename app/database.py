@@ -16,6 +16,33 @@ async def connect_to_mongo():
     client = AsyncIOMotorClient(settings.MONGODB_URL)
     print(f"✅ Connected to MongoDB at {settings.MONGODB_URL}")
     print(f"📦 Using database: {settings.MONGODB_DB_NAME}")
+    await ensure_indexes()
+
+
+async def ensure_indexes():
+    """Create the indexes used by the hot queries (idempotent)"""
+    db = get_database()
+    try:
+        # Keyset pagination on GET /api/submissions, with and without mission filter
+        await db.submissions.create_index(
+            [("submitted_at", -1), ("_id", -1)], name="submitted_at_id"
+        )
+        await db.submissions.create_index(
+            [("mission", 1), ("submitted_at", -1), ("_id", -1)], name="mission_submitted_at_id"
+        )
+        # Reprise des confirmations 'pending' au démarrage des workers
+        await db.submissions.create_index(
+            [("confirmation_status", 1), ("confirmation_lease_until", 1)], name="confirmation_status_lease"
+        )
+        # Time-series rollups of the stats counters
+        await db.submission_stats.create_index(
+            [("granularity", 1), ("bucket", 1)], name="granularity_bucket"
+        )
+        # Clés d'idempotence de /api/submit (unicité via _id), purgées à expiration
+        await db.submit_idempotency.create_index("expires_at", expireAfterSeconds=0, name="expires_at_ttl")
+        print("🗂️ MongoDB indexes ready")
+    except Exception as e:
+        print(f"⚠️ Could not create MongoDB indexes: {e}")
 
 
 async def close_mongo_connection():
@@ -1,23 +1,42 @@
 from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 
 from app.config import settings
-from app.routers import classify, generate, submit, submissions
-from app.database import connect_to_mongo, close_mongo_connection
+from app.routers import classify, generate, form, submit, submissions
+from app.database import connect_to_mongo, close_mongo_connection, get_database
 from app.middleware.rate_limit import limiter
+from app.services.cache import response_cache
+from app.services.confirmation_templates import confirmation_templates
+from app.services.confirmation_worker import confirmation_workers
+from app.services.groq_service import groq_service
+from app.services.local_classifier import local_classifier
+from app.services.prefetch import fields_prefetch
+from app.services.semantic_cache import semantic_cache
+from app.services.stats import ensure_stats
+from app.services.metrics import MetricsMiddleware, RATE_LIMIT_REJECTIONS, TimedJSONResponse, registry
+from app.services.write_buffer import submission_buffer
 
 
 app = FastAPI(
     title="Nexus Connected - Augmented Form API",
     version="1.0.0",
     description="Backend FastAPI pour formulaire augmenté (missions fixes + champs dynamiques AI).",
+    default_response_class=TimedJSONResponse,
 )
 
 # Add rate limiter to app state
 app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+
+
+def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded):
+    RATE_LIMIT_REJECTIONS.inc(path=request.url.path)
+    return _rate_limit_exceeded_handler(request, exc)
+
+
+app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
 
 # CORS pour ton frontend (Vite/React)
 origins = [
@@ -34,23 +53,50 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Prev-Cursor", "Server-Timing"],
 )
 
+# Durées par route + en-tête Server-Timing (llm / db / serialization / app)
+app.add_middleware(MetricsMiddleware)
+
 
 # Database lifecycle events
 @app.on_event("startup")
 async def startup_db_client():
     await connect_to_mongo()
+    try:
+        # Base existante sans compteurs: on les reconstruit au lieu de renvoyer 0
+        await ensure_stats(get_database())
+    except Exception as e:
+        print(f"⚠️ Stats rebuild failed, run `python -m app.services.stats`: {e}")
+    if settings.LOCAL_CLASSIFIER_ENABLED:
+        try:
+            used = await local_classifier.train_from_submissions(
+                get_database(), limit=settings.LOCAL_CLASSIFIER_TRAIN_LIMIT
+            )
+            print(f"🧠 Local classifier trained on {used} submissions")
+        except Exception as e:
+            print(f"⚠️ Local classifier training failed, using seed examples only: {e}")
+    await confirmation_workers.start()
+    if settings.CONFIRMATION_MODE == "template":
+        await confirmation_templates.start()
 
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await confirmation_templates.stop()
+    await confirmation_workers.stop()
+    await fields_prefetch.stop()
+    await groq_service.aclose()
+    # Soumissions encore dans le buffer write-behind: écrites avant de fermer la connexion
+    await submission_buffer.stop()
     await close_mongo_connection()
 
 
 # Inclusion des routes
 app.include_router(classify.router, prefix="/api")
 app.include_router(generate.router, prefix="/api")
+app.include_router(form.router, prefix="/api")
 app.include_router(submit.router, prefix="/api")
 app.include_router(submissions.router, prefix="/api")
 
@@ -61,3 +107,17 @@ def health_check(request: Request):
     return {"status": "ok", "message": "Nexus backend is alive ✨"}
 
 
+@app.get("/cache/stats", tags=["system"])
+@limiter.limit("60/minute")
+def cache_stats(request: Request):
+    return {
+        **response_cache.stats(),
+        "semantic": semantic_cache.stats(),
+        "confirmation_templates": confirmation_templates.stats(),
+    }
+
+
+@app.get("/metrics", tags=["system"], response_class=PlainTextResponse)
+def metrics():
+    """Prometheus text exposition format."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -1,6 +1,26 @@
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
+from app.config import settings
+# Enregistre les schémas sqlite:// et batched+... auprès de `limits`
+from app.middleware import rate_limit_storage  # noqa: F401
+
+
+def _storage_options() -> dict:
+    # Seuls nos stockages connaissent sync_interval (redis/mongodb le passeraient à leur client)
+    uri = settings.RATE_LIMIT_STORAGE_URI
+    if uri.startswith("sqlite://") or uri.startswith("batched+"):
+        return {"sync_interval": settings.RATE_LIMIT_SYNC_INTERVAL}
+    return {}
+
 
 # Create limiter instance
-limiter = Limiter(key_func=get_remote_address)
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=settings.RATE_LIMIT_STORAGE_URI,
+    storage_options=_storage_options(),
+    strategy=settings.RATE_LIMIT_STRATEGY,
+    key_prefix=settings.RATE_LIMIT_KEY_PREFIX,
+    # Stockage partagé injoignable: limites appliquées par worker plutôt que plus de limite du tout
+    in_memory_fallback_enabled=not settings.RATE_LIMIT_STORAGE_URI.startswith("memory://"),
+)
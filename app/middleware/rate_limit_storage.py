@@ -0,0 +1,403 @@
+"""
+Stockages partagés pour le rate limiter (slowapi / limits), pour que les limites
+tiennent avec plusieurs workers gunicorn au lieu d'être multipliées par leur nombre.
+
+- `sqlite:///chemin/rate_limits.db`   : fichier SQLite (WAL) partagé par les workers d'une machine
+- `batched+redis://...`, `batched+mongodb://...`, `batched+sqlite://...` : le stockage
+  sous-jacent (limits) avec comptage local entre deux synchronisations
+- `redis://...`, `mongodb://...` : stockages natifs de `limits`, un aller-retour par requête
+
+Fenêtre glissante (stratégie "sliding-window-counter"): deux compteurs à fenêtre fixe
+(courante + précédente pondérée). Avec `sync_interval` > 0, chaque worker additionne
+ses hits localement et un thread dédié les pousse (un seul `incr` par clé) et relit les
+compteurs partagés une fois par intervalle: le contrôle, appelé depuis la boucle asyncio,
+reste un accès dict sans I/O. Le thread est réveillé dès qu'un worker a consommé
+LOCAL_HEADROOM_SHARE de la marge restante: le dépassement possible reste une petite
+fraction de la limite, même quand tous les workers reçoivent une rafale. Si le stockage
+partagé ne répond pas, les hits restent comptés localement et sont poussés au tour suivant.
+"""
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from limits.storage import Storage, SlidingWindowCounterSupport, storage_from_string
+
+# Part de la marge restante (limite - hits connus) qu'un worker peut consommer sans synchroniser
+LOCAL_HEADROOM_SHARE = 0.1
+# Nettoyage des compteurs expirés toutes les N acquisitions (ou N synchronisations)
+SWEEP_EVERY = 1000
+# Attente max du verrou d'écriture SQLite d'un autre worker: au-delà, la synchronisation est
+# retentée au tour suivant (ou, sans sync_interval, slowapi repasse en limites mémoire)
+SQLITE_BUSY_TIMEOUT = 0.05
+
+
+class _WindowState:
+    __slots__ = ("window", "previous", "current", "pending", "inflight", "carry", "synced_at", "touched_at")
+
+    def __init__(self, window: int):
+        self.window = window
+        self.previous = 0  # compteur partagé de la fenêtre précédente (dernière synchro)
+        self.current = 0  # compteur partagé de la fenêtre courante (dernière synchro)
+        self.pending = 0  # hits locaux pas encore poussés
+        self.inflight = 0  # hits en cours d'envoi
+        self.carry = 0  # hits locaux de la fenêtre précédente pas encore poussés
+        self.synced_at = 0.0  # 0: pas encore synchronisé dans cette fenêtre
+        self.touched_at = 0.0
+
+    def roll(self, window: int) -> None:
+        """Passage à la fenêtre `window`: la fenêtre courante devient la précédente."""
+        if window == self.window:
+            return
+        if window == self.window + 1:
+            self.previous = self.current + self.inflight
+            self.carry = self.pending
+        else:
+            self.previous = self.carry = 0
+        self.window = window
+        self.current = self.pending = self.inflight = 0
+        self.synced_at = 0.0
+
+
+class CounterSlidingWindow(SlidingWindowCounterSupport):
+    """Fenêtre glissante sur deux compteurs `{key}/{n° de fenêtre}` du stockage, avec batching local."""
+
+    sync_interval: float = 0.0
+
+    def _counter_incr(self, key: str, expiry: int, amount: int) -> int:
+        raise NotImplementedError
+
+    def _counter_get(self, key: str) -> int:
+        raise NotImplementedError
+
+    def _purge(self, now: float) -> None:
+        """Suppression des compteurs expirés du stockage, si elle n'est pas automatique."""
+
+    def _init_windows(self, sync_interval: float) -> None:
+        self.sync_interval = sync_interval
+        self._windows: Dict[Tuple[str, int], _WindowState] = {}
+        self._windows_lock = threading.Lock()
+        self._acquisitions = 0
+        self._wake = threading.Event()
+        self._syncer: Optional[threading.Thread] = None
+        self._syncer_pid: Optional[int] = None
+        self._sync_failing = False
+
+    @staticmethod
+    def _counter_key(key: str, window: int) -> str:
+        return f"{key}/{window}"
+
+    def _state(self, key: str, expiry: int, now: float) -> _WindowState:
+        window = math.floor(now / expiry)
+        state = self._windows.get((key, expiry))
+        if state is None:
+            state = self._windows[(key, expiry)] = _WindowState(window)
+        else:
+            state.roll(window)
+        state.touched_at = now
+        return state
+
+    @staticmethod
+    def _take(state: _WindowState) -> Tuple[int, int, int]:
+        """Hits locaux à pousser: (fenêtre, hits de la précédente, hits de la courante)."""
+        taken = (state.window, state.carry, state.pending)
+        state.inflight += state.pending
+        state.carry = state.pending = 0
+        return taken
+
+    def _exchange(self, key: str, expiry: int, window: int, carry: int, pending: int) -> Tuple[int, int]:
+        """Pousse les hits et retourne les compteurs partagés (fenêtre précédente, courante)."""
+        previous_key, current_key = self._counter_key(key, window - 1), self._counter_key(key, window)
+        # Fenêtre de 2 x expiry: le compteur sert encore de "fenêtre précédente"
+        previous = self._counter_incr(previous_key, 2 * expiry, carry) if carry else self._counter_get(previous_key)
+        current = self._counter_incr(current_key, 2 * expiry, pending) if pending else self._counter_get(current_key)
+        return previous, current
+
+    @staticmethod
+    def _settle(
+        state: _WindowState,
+        window: int,
+        carry: int,
+        pending: int,
+        totals: Optional[Tuple[int, int]],
+        now: float,
+    ) -> None:
+        """Applique le résultat d'un `_exchange` (None: échec, les hits sont remis en attente)."""
+        if state.window == window:
+            state.inflight -= pending
+            if totals is None:
+                state.carry += carry
+                state.pending += pending
+            else:
+                state.previous, state.current = totals
+                state.synced_at = now
+        elif state.window == window + 1:
+            # La fenêtre a changé pendant l'échange
+            if totals is None:
+                state.carry += pending
+            else:
+                state.previous = totals[1]
+
+    def _sync_now(self, key: str, expiry: int, state: _WindowState, now: float) -> None:
+        taken = self._take(state)
+        try:
+            totals = self._exchange(key, expiry, *taken)
+        except BaseException:
+            self._settle(state, *taken, None, now)
+            raise
+        self._settle(state, *taken, totals, now)
+
+    def _ensure_syncer(self) -> None:
+        # Démarré au premier contrôle, donc dans chaque worker après le fork
+        if self._syncer is None or self._syncer_pid != os.getpid() or not self._syncer.is_alive():
+            self._syncer_pid = os.getpid()
+            self._syncer = threading.Thread(target=self._sync_loop, name="rate-limit-sync", daemon=True)
+            self._syncer.start()
+
+    def _sync_loop(self) -> None:
+        passes = 0
+        while True:
+            self._wake.wait(self.sync_interval)
+            self._wake.clear()
+            self.sync_all()
+            passes += 1
+            if passes % SWEEP_EVERY == 0:
+                try:
+                    self._purge(time.time())
+                except Exception as e:
+                    print(f"⚠️ Rate limit storage purge failed: {e}")
+
+    def sync_all(self) -> None:
+        """Pousse les hits locaux et relit les compteurs partagés des clés utilisées depuis la dernière synchro."""
+        now = time.time()
+        with self._windows_lock:
+            self._sweep(now)
+            batch = []
+            for (key, expiry), state in self._windows.items():
+                state.roll(math.floor(now / expiry))
+                if state.pending or state.carry or state.touched_at >= state.synced_at:
+                    batch.append((key, expiry, state, self._take(state)))
+
+        error = None
+        for key, expiry, state, taken in batch:
+            try:
+                totals = self._exchange(key, expiry, *taken)
+            except Exception as e:
+                totals, error = None, e
+            with self._windows_lock:
+                self._settle(state, *taken, totals, now)
+
+        # Une ligne de log par panne, pas une par tour
+        if error is not None and not self._sync_failing:
+            print(f"⚠️ Rate limit storage unreachable, counting locally until it recovers: {error}")
+        elif error is None and self._sync_failing:
+            print("✅ Rate limit storage reachable again")
+        self._sync_failing = error is not None
+
+    def _window_info(self, state: _WindowState, expiry: int, now: float) -> Tuple[int, float, int, float]:
+        elapsed = now - state.window * expiry
+        return (
+            state.previous + state.carry,
+            expiry - elapsed,
+            state.current + state.inflight + state.pending,
+            2 * expiry - elapsed,
+        )
+
+    def acquire_sliding_window_entry(self, key: str, limit: int, expiry: int, amount: int = 1) -> bool:
+        if amount > limit:
+            return False
+        now = time.time()
+        background = self.sync_interval > 0
+        with self._windows_lock:
+            if background:
+                self._ensure_syncer()
+            else:
+                self._acquisitions += 1
+                if self._acquisitions % SWEEP_EVERY == 0:
+                    self._sweep(now)
+                    self._purge(now)
+
+            state = self._state(key, expiry, now)
+            if not background:
+                self._sync_now(key, expiry, state, now)
+            previous, previous_ttl, current, _ = self._window_info(state, expiry, now)
+            used = previous * previous_ttl / expiry + current
+            if used + amount > limit:
+                return False
+            state.pending += amount
+            if not background:
+                self._sync_now(key, expiry, state, now)
+            elif not state.synced_at or state.pending >= (limit - used) * LOCAL_HEADROOM_SHARE:
+                # Clé pas encore synchronisée ou marge locale consommée: synchro sans attendre l'intervalle
+                self._wake.set()
+            return True
+
+    def get_sliding_window(self, key: str, expiry: int) -> Tuple[int, float, int, float]:
+        now = time.time()
+        with self._windows_lock:
+            state = self._state(key, expiry, now)
+            if self.sync_interval <= 0 or not state.synced_at:
+                self._sync_now(key, expiry, state, now)
+            return self._window_info(state, expiry, now)
+
+    def clear_sliding_window(self, key: str, expiry: int) -> None:
+        window = math.floor(time.time() / expiry)
+        with self._windows_lock:
+            self._windows.pop((key, expiry), None)
+        self.clear(self._counter_key(key, window - 1))
+        self.clear(self._counter_key(key, window))
+
+    def _sweep(self, now: float) -> None:
+        # États de clés (IP) inactives depuis deux fenêtres, sans hits en attente: oubliés
+        for (key, expiry), state in list(self._windows.items()):
+            if now - state.touched_at > 2 * expiry and not (state.pending or state.carry or state.inflight):
+                del self._windows[(key, expiry)]
+
+
+class SQLiteStorage(Storage, CounterSlidingWindow):
+    """
+    Compteurs dans un fichier SQLite partagé par les workers d'une même machine.
+    URI: `sqlite:///chemin/absolu.db` ou `sqlite://chemin/relatif.db`.
+    """
+
+    STORAGE_SCHEME = ["sqlite"]
+
+    def __init__(self, uri: str, wrap_exceptions: bool = False, sync_interval: float = 0.0, **options):
+        self.path = uri[len("sqlite://"):] or "rate_limits.db"
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Autocommit: les transactions sont ouvertes explicitement (BEGIN IMMEDIATE)
+        self._conn = sqlite3.connect(
+            self.path, timeout=SQLITE_BUSY_TIMEOUT, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS counters ("
+            "key TEXT PRIMARY KEY, value INTEGER NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._lock = threading.Lock()
+        self._init_windows(float(sync_interval))
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Compteur expiré: repart de zéro avec une nouvelle expiration
+                self._conn.execute(
+                    "INSERT INTO counters (key, value, expires_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET "
+                    "value = CASE WHEN expires_at <= ? THEN excluded.value ELSE value + excluded.value END, "
+                    "expires_at = CASE WHEN expires_at <= ? THEN excluded.expires_at ELSE expires_at END",
+                    (key, amount, now + expiry, now, now),
+                )
+                value = self._conn.execute("SELECT value FROM counters WHERE key = ?", (key,)).fetchone()[0]
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return value
+
+    def get(self, key: str) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM counters WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key: str) -> float:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT expires_at FROM counters WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return row[0] if row else time.time()
+
+    def check(self) -> bool:
+        try:
+            with self._lock:
+                self._conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self) -> int:
+        with self._lock:
+            return self._conn.execute("DELETE FROM counters").rowcount
+
+    def clear(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM counters WHERE key = ?", (key,))
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            return self._conn.execute("DELETE FROM counters WHERE expires_at <= ?", (time.time(),)).rowcount
+
+    def _purge(self, now: float) -> None:
+        self.purge_expired()
+
+    def _counter_incr(self, key: str, expiry: int, amount: int) -> int:
+        return self.incr(key, expiry, amount)
+
+    def _counter_get(self, key: str) -> int:
+        return self.get(key)
+
+
+class BatchedStorage(Storage, CounterSlidingWindow):
+    """
+    `batched+<uri>`: le stockage `limits` de <uri> (redis, mongodb, sqlite...) avec
+    les hits comptés localement et poussés au plus une fois par `sync_interval`.
+    """
+
+    STORAGE_SCHEME = [
+        "batched+memory",
+        "batched+sqlite",
+        "batched+redis",
+        "batched+rediss",
+        "batched+redis+unix",
+        "batched+mongodb",
+        "batched+mongodb+srv",
+    ]
+
+    def __init__(self, uri: str, wrap_exceptions: bool = False, sync_interval: float = 0.05, **options):
+        self.inner = storage_from_string(uri[len("batched+"):], **options)
+        self._init_windows(float(sync_interval))
+        super().__init__(uri, wrap_exceptions=wrap_exceptions)
+
+    @property
+    def base_exceptions(self):
+        return self.inner.base_exceptions
+
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+        return self.inner.incr(key, expiry, amount)
+
+    def get(self, key: str) -> int:
+        return self.inner.get(key)
+
+    def get_expiry(self, key: str) -> float:
+        return self.inner.get_expiry(key)
+
+    def check(self) -> bool:
+        return self.inner.check()
+
+    def reset(self):
+        with self._windows_lock:
+            self._windows.clear()
+        return self.inner.reset()
+
+    def clear(self, key: str) -> None:
+        self.inner.clear(key)
+
+    def _counter_incr(self, key: str, expiry: int, amount: int) -> int:
+        return self.inner.incr(key, expiry, amount)
+
+    def _counter_get(self, key: str) -> int:
+        return self.inner.get(key)
@@ -37,7 +37,11 @@ class FormSubmission(BaseModel):
     values: Dict[str, Any] = Field(..., description="Form field values submitted by user")
     username: Optional[str] = Field(None, description="Username if provided")
     language: str = Field(default="fr", description="Language of submission")
-    confirmation_message: str = Field(..., description="Generated confirmation message")
+    confirmation_message: str = Field("", description="Generated confirmation message")
+    confirmation_status: str = Field(
+        default="ready",
+        description="Confirmation generation status (pending, ready, fallback)",
+    )
     submitted_at: datetime = Field(default_factory=datetime.utcnow, description="Submission timestamp")
     ip_address: Optional[str] = Field(None, description="User IP address for tracking")
     user_agent: Optional[str] = Field(None, description="User agent string")
@@ -1,7 +1,16 @@
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, HTTPException, Request
 
-from app.schemas.classify import ClassifyRequest, ClassifyResponse
-from app.services.ai_logic import classify_mission_from_prompt
+from app.config import settings
+from app.schemas.classify import (
+    ClassifyRequest,
+    ClassifyResponse,
+    ClassifyBatchRequest,
+    ClassifyBatchItem,
+    ClassifyBatchResponse,
+)
+from app.constants.missions import MissionEnum
+from app.services.ai_logic import classify_mission_from_prompt, classify_batch, prefetch_additional_fields
+from app.services.degraded import is_degraded
 from app.middleware.rate_limit import limiter
 
 router = APIRouter(tags=["ai - classify"])
@@ -9,9 +18,29 @@ router = APIRouter(tags=["ai - classify"])
 
 @router.post("/classify", response_model=ClassifyResponse)
 @limiter.limit("5/minute")  # 30 requests per minute per IP
-def classify_mission(request: Request, payload: ClassifyRequest):
-    result = classify_mission_from_prompt(
+async def classify_mission(request: Request, payload: ClassifyRequest):
+    result = await classify_mission_from_prompt(
         prompt=payload.prompt,
         language=payload.language,
     )
-    return ClassifyResponse(**result)
+    # Le frontend enchaîne presque toujours sur /generate-fields: on commence pendant qu'il lit
+    if settings.PREFETCH_FIELDS_ENABLED and not is_degraded():
+        prefetch_additional_fields(MissionEnum(result["mission"]), payload.prompt, payload.language)
+    return ClassifyResponse(**result, degraded=is_degraded())
+
+
+@router.post("/classify/batch", response_model=ClassifyBatchResponse)
+@limiter.limit("5/minute")
+async def classify_mission_batch(request: Request, payload: ClassifyBatchRequest):
+    """
+    Classifie jusqu'à BATCH_MAX_ITEMS prompts en une requête (back-office, imports).
+    Résultats dans l'ordre des prompts; un élément en échec porte `error` sans faire échouer le lot.
+    """
+    if len(payload.prompts) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Trop d'éléments (max {settings.BATCH_MAX_ITEMS}).")
+
+    results = await classify_batch(prompts=payload.prompts, language=payload.language)
+    return ClassifyBatchResponse(
+        results=[ClassifyBatchItem(index=i, **result) for i, result in enumerate(results)],
+        unique_prompts=len(set(payload.prompts)),
+    )
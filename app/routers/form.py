@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Request
+
+from app.constants.missions import MissionEnum
+from app.constants.base_fields import BASE_FIELDS_BY_MISSION
+from app.schemas.form import FormRequest, FormResponse
+from app.schemas.generate import FormField
+from app.services.ai_logic import classify_and_generate_fields
+from app.services.degraded import is_degraded
+from app.middleware.rate_limit import limiter
+
+router = APIRouter(tags=["ai - form"])
+
+
+@router.post("/form", response_model=FormResponse)
+@limiter.limit("20/minute")  # 20 requests per minute per IP
+async def build_form(request: Request, payload: FormRequest):
+    """
+    Classify the prompt and build the whole form in a single round trip
+    (replaces `/classify` followed by `/generate-fields`).
+    """
+    result = await classify_and_generate_fields(
+        prompt=payload.prompt,
+        language=payload.language,
+    )
+    mission_enum = MissionEnum(result["mission"])
+
+    base_fields = [FormField(**f) for f in BASE_FIELDS_BY_MISSION.get(mission_enum, [])]
+    extra_fields = [FormField(**f) for f in result["extra_fields"]]
+
+    return FormResponse(
+        mission=mission_enum.value,
+        confidence=result["confidence"],
+        reasoning=result["reasoning"],
+        base_fields=base_fields,
+        extra_fields=extra_fields,
+        degraded=is_degraded(),
+    )
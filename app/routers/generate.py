@@ -1,9 +1,21 @@
+import json
+
 from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 
 from app.constants.missions import MissionEnum, MISSIONS
 from app.constants.base_fields import BASE_FIELDS_BY_MISSION
-from app.schemas.generate import GenerateFieldsRequest, GenerateFieldsResponse, FormField
-from app.services.ai_logic import generate_additional_fields
+from app.config import settings
+from app.schemas.generate import (
+    GenerateFieldsRequest,
+    GenerateFieldsResponse,
+    GenerateFieldsBatchRequest,
+    GenerateFieldsBatchItem,
+    GenerateFieldsBatchResponse,
+    FormField,
+)
+from app.services.ai_logic import generate_additional_fields, stream_additional_fields, generate_fields_batch
+from app.services.degraded import is_degraded
 from app.middleware.rate_limit import limiter
 
 router = APIRouter(tags=["ai - fields"])
@@ -11,7 +23,7 @@ router = APIRouter(tags=["ai - fields"])
 
 @router.post("/generate-fields", response_model=GenerateFieldsResponse)
 @limiter.limit("20/minute")  # 20 requests per minute per IP
-def generate_fields(request: Request, payload: GenerateFieldsRequest):
+async def generate_fields(request: Request, payload: GenerateFieldsRequest):
     # Validation mission
     try:
         mission_enum = MissionEnum(payload.mission)
@@ -21,7 +33,7 @@ def generate_fields(request: Request, payload: GenerateFieldsRequest):
     base_fields_raw = BASE_FIELDS_BY_MISSION.get(mission_enum, [])
     base_fields = [FormField(**f) for f in base_fields_raw]
 
-    extra_fields_raw = generate_additional_fields(
+    extra_fields_raw = await generate_additional_fields(
         mission=mission_enum,
         prompt=payload.prompt,
         language=payload.language,
@@ -32,4 +44,89 @@ def generate_fields(request: Request, payload: GenerateFieldsRequest):
         mission=mission_enum.value,
         base_fields=base_fields,
         extra_fields=extra_fields,
+        degraded=is_degraded(),
+    )
+
+
+@router.post("/generate-fields/batch", response_model=GenerateFieldsBatchResponse)
+@limiter.limit("5/minute")
+async def generate_fields_batch_endpoint(request: Request, payload: GenerateFieldsBatchRequest):
+    """
+    Génère les champs supplémentaires de jusqu'à BATCH_MAX_ITEMS demandes (mission, prompt).
+    Résultats dans l'ordre des items; une mission inconnue ou un échec LLM n'affecte que son élément.
+    """
+    if len(payload.items) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Trop d'éléments (max {settings.BATCH_MAX_ITEMS}).")
+
+    results = [None] * len(payload.items)
+    valid = []  # (index, mission) des items dont la mission est connue
+    for i, item in enumerate(payload.items):
+        try:
+            valid.append((i, MissionEnum(item.mission)))
+        except ValueError:
+            results[i] = GenerateFieldsBatchItem(index=i, mission=item.mission, error="Mission inconnue.")
+
+    generated = await generate_fields_batch(
+        items=[(mission, payload.items[i].prompt) for i, mission in valid],
+        language=payload.language,
+    )
+    for (i, mission), result in zip(valid, generated):
+        results[i] = GenerateFieldsBatchItem(
+            index=i,
+            mission=mission.value,
+            base_fields=[FormField(**f) for f in BASE_FIELDS_BY_MISSION.get(mission, [])],
+            extra_fields=[FormField(**f) for f in result.get("extra_fields", [])],
+            error=result.get("error"),
+        )
+
+    return GenerateFieldsBatchResponse(results=results)
+
+
+@router.post("/generate-fields/stream")
+@limiter.limit("20/minute")  # 20 requests per minute per IP
+async def generate_fields_stream(request: Request, payload: GenerateFieldsRequest):
+    """
+    Streaming variant of `/generate-fields` (NDJSON, one JSON object per line):
+
+    - `{"type": "base_fields", "mission": ..., "fields": [...]}` sent immediately
+    - `{"type": "extra_field", "field": {...}}` for each extra field as soon as it is generated
+    - `{"type": "done", "extra_fields_count": n, "degraded": bool}` at the end
+    """
+    try:
+        mission_enum = MissionEnum(payload.mission)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Mission inconnue.")
+
+    base_fields_raw = BASE_FIELDS_BY_MISSION.get(mission_enum, [])
+    base_fields = [FormField(**f) for f in base_fields_raw]
+
+    def ndjson(data: dict) -> str:
+        return json.dumps(data, ensure_ascii=False) + "\n"
+
+    async def field_stream():
+        yield ndjson({
+            "type": "base_fields",
+            "mission": mission_enum.value,
+            "fields": [f.dict() for f in base_fields],
+        })
+
+        count = 0
+        try:
+            async for field in stream_additional_fields(
+                mission=mission_enum,
+                prompt=payload.prompt,
+                language=payload.language,
+            ):
+                count += 1
+                yield ndjson({"type": "extra_field", "field": FormField(**field).dict()})
+        except Exception as e:
+            print(f"⚠️ AI field streaming failed: {e}")
+            yield ndjson({"type": "error", "detail": "Extra fields generation failed."})
+
+        yield ndjson({"type": "done", "extra_fields_count": count, "degraded": is_degraded()})
+
+    return StreamingResponse(
+        field_stream(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
@@ -1,9 +1,19 @@
+import asyncio
 from typing import List, Optional
-from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from datetime import datetime
+from bson import ObjectId
+from bson.errors import InvalidId
 
 from app.database import get_database
 from app.models import FormSubmission
+from app.schemas.submit import ConfirmationStatusResponse
+from app.services import export, stats
+from app.services.pagination import encode_cursor, keyset_filter
+from app.services.metrics import timed_db
+from app.services import submission_store
+from app.services.sse import format_sse
 from app.middleware.rate_limit import limiter
 
 router = APIRouter(tags=["submissions"])
@@ -13,27 +23,55 @@ router = APIRouter(tags=["submissions"])
 @limiter.limit("60/minute")  # 60 requests per minute per IP
 async def get_submissions(
     request: Request,
+    response: Response,
     mission: Optional[str] = Query(None, description="Filter by mission type"),
     limit: int = Query(50, ge=1, le=100, description="Number of submissions to return"),
-    skip: int = Query(0, ge=0, description="Number of submissions to skip"),
+    skip: int = Query(0, ge=0, description="Number of submissions to skip (ignored with a cursor)"),
+    after: Optional[str] = Query(None, description="Cursor: return submissions older than this one"),
+    before: Optional[str] = Query(None, description="Cursor: return submissions newer than this one"),
 ):
     """
-    Retrieve form submissions from the database.
+    Retrieve form submissions from the database, newest first.
     
     - **mission**: Optional filter by mission type (contact, donation, volunteer, information)
     - **limit**: Maximum number of results (1-100)
-    - **skip**: Number of results to skip (for pagination)
+    - **skip**: Number of results to skip (legacy offset pagination)
+    - **after** / **before**: Opaque cursors from the `X-Next-Cursor` / `X-Prev-Cursor`
+      response headers. Each page costs O(limit) whatever its depth.
     """
+    if after and before:
+        raise HTTPException(status_code=400, detail="Use either 'after' or 'before', not both")
+
     db = get_database()
     
     # Build query filter
     query_filter = {}
     if mission:
         query_filter["mission"] = mission
-    
-    # Fetch submissions
-    cursor = db.submissions.find(query_filter).sort("submitted_at", -1).skip(skip).limit(limit)
-    submissions = await cursor.to_list(length=limit)
+
+    cursor_value = after or before
+    if cursor_value:
+        try:
+            query_filter.update(keyset_filter(cursor_value, older=bool(after)))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    # Fetch submissions (index: [mission,] submitted_at, _id)
+    direction = 1 if before else -1
+    cursor = db.submissions.find(query_filter).sort([("submitted_at", direction), ("_id", direction)])
+    if not cursor_value:
+        cursor = cursor.skip(skip)
+    async with timed_db("find"):
+        submissions = await cursor.limit(limit).to_list(length=limit)
+    if before:
+        submissions.reverse()
+
+    # Cursors for the neighbouring pages
+    if submissions:
+        if len(submissions) == limit or before:
+            response.headers["X-Next-Cursor"] = encode_cursor(submissions[-1])
+        if cursor_value or skip:
+            response.headers["X-Prev-Cursor"] = encode_cursor(submissions[0])
     
     # Convert ObjectId to string for JSON serialization
     for submission in submissions:
@@ -48,30 +86,104 @@ async def get_submission_stats(request: Request):
     """
     Get statistics about form submissions.
     
-    Returns counts by mission type and total submissions.
+    Returns counts by mission type, by language and total submissions.
+    Counters are maintained on each submit / delete, so this is a single document read.
     """
     db = get_database()
+
+    totals = await stats.get_totals(db)
     
-    # Total count
-    total = await db.submissions.count_documents({})
-    
-    # Count by mission
-    pipeline = [
-        {
-            "$group": {
-                "_id": "$mission",
-                "count": {"$sum": 1}
-            }
-        }
-    ]
-    
-    mission_counts = {}
-    async for doc in db.submissions.aggregate(pipeline):
-        mission_counts[doc["_id"]] = doc["count"]
-    
     return {
-        "total_submissions": total,
-        "by_mission": mission_counts,
+        **totals,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
+@router.get("/submissions/stats/timeseries")
+@limiter.limit("30/minute")  # 30 requests per minute per IP
+async def get_submission_timeseries(
+    request: Request,
+    granularity: str = Query("hour", pattern="^(hour|day)$", description="Bucket size: hour or day"),
+    since: Optional[datetime] = Query(None, description="Start (UTC), default: 24h / 30 days ago"),
+    until: Optional[datetime] = Query(None, description="End (UTC), default: now"),
+    mission: Optional[str] = Query(None, description="Only count this mission"),
+):
+    """
+    Submissions per hour (or day), optionally for a single mission.
+    """
+    db = get_database()
+
+    until = until or datetime.utcnow()
+    since = since or stats.default_since(granularity, until)
+
+    points = await stats.get_timeseries(db, granularity, since, until, mission)
+
+    return {
+        "granularity": granularity,
+        "mission": mission,
+        "since": since.isoformat(),
+        "until": until.isoformat(),
+        "points": points,
+    }
+
+
+@router.get("/submissions/export")
+@limiter.limit("5/minute")  # full collection scan
+async def export_submissions(
+    request: Request,
+    export_format: str = Query(
+        "ndjson", alias="format", pattern="^(ndjson|csv|parquet)$", description="ndjson, csv or parquet"
+    ),
+    mission: Optional[str] = Query(None, description="Filter by mission type"),
+    language: Optional[str] = Query(None, description="Filter by language"),
+    since: Optional[datetime] = Query(None, description="Submitted at or after (UTC)"),
+    until: Optional[datetime] = Query(None, description="Submitted before (UTC)"),
+):
+    """
+    Stream every submission matching the filters, oldest first.
+
+    - **ndjson**: one JSON document per line (`values` kept nested)
+    - **csv**: one `values.<key>` column per base field of the mission(s), other
+      `values` keys together as JSON in `values.extra`
+    - **parquet**: same columns as CSV, one row group per batch (requires `pyarrow`)
+    """
+    if export_format == "parquet" and not export.parquet_available():
+        raise HTTPException(status_code=400, detail="Parquet export requires pyarrow (pip install pyarrow)")
+
+    db = get_database()
+    query_filter = export.build_filter(mission, language, since, until)
+
+    if export_format == "ndjson":
+        body = export.export_ndjson(db, query_filter)
+    else:
+        keys = export.value_keys(mission)
+        if export_format == "csv":
+            body = export.export_csv(db, query_filter, keys)
+        else:
+            body = export.export_parquet(db, query_filter, keys)
+
+    filename = f"submissions-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.{export_format}"
+    return StreamingResponse(
+        body,
+        media_type=export.MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/submissions/stats/reconcile")
+@limiter.limit("2/minute")  # full scan, keep it rare
+async def reconcile_submission_stats(request: Request):
+    """
+    Rebuild the stats counters from the raw `submissions` collection.
+
+    Also available from the command line: `python -m app.services.stats`.
+    """
+    db = get_database()
+
+    result = await stats.rebuild_stats(db)
+
+    return {
+        **result,
         "timestamp": datetime.utcnow().isoformat()
     }
 
@@ -84,9 +196,6 @@ async def delete_submission(request: Request, submission_id: str):
     
     - **submission_id**: MongoDB ObjectId of the submission to delete
     """
-    from bson import ObjectId
-    from bson.errors import InvalidId
-    
     db = get_database()
     
     try:
@@ -94,9 +203,63 @@ async def delete_submission(request: Request, submission_id: str):
     except InvalidId:
         raise HTTPException(status_code=400, detail="Invalid submission ID format")
     
-    result = await db.submissions.delete_one({"_id": object_id})
+    deleted = await submission_store.delete_submission(db, object_id)
     
-    if result.deleted_count == 0:
+    if not deleted:
         raise HTTPException(status_code=404, detail="Submission not found")
     
     return {"message": "Submission deleted successfully", "id": submission_id}
+
+
+@router.get("/submissions/{submission_id}/confirmation", response_model=ConfirmationStatusResponse)
+@limiter.limit("120/minute")  # polled by the frontend after a deferred submit
+async def get_confirmation(
+    request: Request,
+    submission_id: str,
+    stream: bool = Query(False, description="Stream the result as Server-Sent Events"),
+    timeout: float = Query(60, ge=1, le=300, description="Max SSE wait in seconds"),
+):
+    """
+    Get the confirmation message of a submission (see `deferred` on `/submit`).
+
+    - **stream=false**: returns the current status (pending, ready, fallback)
+    - **stream=true**: keeps the connection open and sends one `confirmation` event when ready
+    """
+    db = get_database()
+
+    try:
+        object_id = ObjectId(submission_id)
+    except InvalidId:
+        raise HTTPException(status_code=400, detail="Invalid submission ID format")
+
+    projection = {"confirmation_message": 1, "confirmation_status": 1}
+    async with timed_db("find_one"):
+        doc = await db.submissions.find_one({"_id": object_id}, projection)
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Submission not found")
+
+    if not stream:
+        return _confirmation_status(submission_id, doc)
+
+    async def event_stream():
+        current = doc
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while current.get("confirmation_status") == "pending" and loop.time() < deadline:
+            await asyncio.sleep(0.5)
+            current = await db.submissions.find_one({"_id": object_id}, projection) or current
+        yield format_sse(_confirmation_status(submission_id, current).dict(), event="confirmation")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _confirmation_status(submission_id: str, doc: dict) -> ConfirmationStatusResponse:
+    return ConfirmationStatusResponse(
+        id=submission_id,
+        confirmation_status=doc.get("confirmation_status", "ready"),
+        confirmation_message=doc.get("confirmation_message", ""),
+    )
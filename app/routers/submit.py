@@ -1,40 +1,105 @@
+import asyncio
 from datetime import datetime
 
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 
+from app.config import settings
 from app.constants.missions import MissionEnum
 from app.schemas.submit import SubmitRequest, SubmitResponse
-from app.services.ai_logic import generate_confirmation_message
+from app.services.ai_logic import (
+    generate_confirmation_message,
+    stream_confirmation_message,
+    fallback_confirmation_message,
+)
+from app.services.confirmation_worker import ConfirmationJob, confirmation_workers
+from app.services.degraded import is_degraded
+from app.services.idempotency import IdempotencyConflict, submit_idempotency, submit_key
+from app.services.submission_store import insert_submission, update_confirmation
+from app.services.metrics import SUBMIT_VALIDATION_REJECTIONS
+from app.services.sse import format_sse
+from app.services.submission_validation import validate_submission
 from app.database import get_database
 from app.models import FormSubmission
 from app.middleware.rate_limit import limiter
 
 router = APIRouter(tags=["ai - submit"])
 
+# Enregistrements de /submit/stream qui doivent aboutir même si le client se déconnecte
+_stream_saves: set = set()
+
+
+def _spawn_save(coro) -> asyncio.Task:
+    task = asyncio.create_task(coro)
+    _stream_saves.add(task)
+    task.add_done_callback(_stream_save_done)
+    return task
+
+
+def _stream_save_done(task: asyncio.Task) -> None:
+    _stream_saves.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        print(f"⚠️ Failed to save streamed submission: {task.exception()}")
+
 
 @router.post("/submit", response_model=SubmitResponse)
 @limiter.limit("10/minute")  # 10 submissions per minute per IP
-async def submit_form(request: Request, payload: SubmitRequest):
+async def submit_form(request: Request, response: Response, payload: SubmitRequest):
     # Validation mission
     try:
         mission_enum = MissionEnum(payload.mission)
     except ValueError:
         raise HTTPException(status_code=400, detail="Mission inconnue.")
+    _validate_values(payload, mission_enum)
 
     year = datetime.now().year
 
+    async def handle() -> dict:
+        if payload.deferred:
+            result = await _submit_deferred(request, payload, mission_enum, year)
+        else:
+            result = await _submit_now(request, payload, mission_enum, year)
+        return result.dict()
+
+    key, fingerprint = submit_key(request.headers.get("Idempotency-Key"), payload.dict())
+    if not settings.IDEMPOTENCY_ENABLED or key is None:
+        return SubmitResponse(**await handle())
+
+    # Retry ou doublon concurrent: réponse d'origine, sans appel LLM ni écriture
     try:
-        confirmation_message = generate_confirmation_message(
-            mission=mission_enum,
-            values=payload.values,
-            username=payload.username,
-            language=payload.language,
-        )
-    except Exception as e:
-        print(f"⚠️ AI generation failed: {e}")
-        # Fallback message if AI fails
-        confirmation_message = f"Merci {payload.username or ''} ! Votre demande pour '{mission_enum.value}' a bien été reçue."
+        result, replayed = await submit_idempotency.run(get_database(), key, fingerprint, handle)
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return SubmitResponse(**result)
+
 
+def _validate_values(payload: SubmitRequest, mission_enum: MissionEnum) -> None:
+    """Reject invalid values (field-level 422) before any LLM call or DB write."""
+    if not settings.SUBMIT_VALIDATION_ENABLED:
+        return
+    errors = validate_submission(mission_enum, payload.values, payload.extra_fields)
+    if errors:
+        SUBMIT_VALIDATION_REJECTIONS.inc(mission=mission_enum.value)
+        raise HTTPException(status_code=422, detail=errors)
+
+
+async def _submit_now(
+    request: Request,
+    payload: SubmitRequest,
+    mission_enum: MissionEnum,
+    year: int,
+) -> SubmitResponse:
+    """Generate the confirmation, then save the submission with it."""
+    # Message modèle de la mission si le LLM est indisponible (réponse `degraded`)
+    confirmation_message = await generate_confirmation_message(
+        mission=mission_enum,
+        values=payload.values,
+        username=payload.username,
+        language=payload.language,
+    )
+    confirmation_status = "fallback" if is_degraded() else "ready"
 
     # Save to MongoDB
     db = get_database()
@@ -44,18 +109,169 @@ async def submit_form(request: Request, payload: SubmitRequest):
         username=payload.username,
         language=payload.language,
         confirmation_message=confirmation_message,
+        confirmation_status=confirmation_status,
         ip_address=request.client.host if request.client else None,
         user_agent=request.headers.get("user-agent"),
     )
 
     # Insert into database
-    result = await db.submissions.insert_one(submission.dict(by_alias=True, exclude={"id"}))
-    
-    print(f"✅ Form submission saved to MongoDB with ID: {result.inserted_id}")
+    inserted_id = await insert_submission(db, submission)
 
     return SubmitResponse(
         mission=mission_enum.value,
         year=year,
         confirmation_message=confirmation_message,
+        id=str(inserted_id),
+        confirmation_status=confirmation_status,
+        degraded=is_degraded(),
+    )
+
+
+async def _submit_deferred(
+    request: Request,
+    payload: SubmitRequest,
+    mission_enum: MissionEnum,
+    year: int,
+) -> SubmitResponse:
+    """Save first, generate the confirmation in the background worker pool."""
+    db = get_database()
+    submission = FormSubmission(
+        mission=mission_enum.value,
+        values=payload.values,
+        username=payload.username,
+        language=payload.language,
+        confirmation_status="pending",
+        ip_address=request.client.host if request.client else None,
+        user_agent=request.headers.get("user-agent"),
+    )
+    inserted_id = await insert_submission(db, submission)
+
+    queued = confirmation_workers.enqueue(
+        ConfirmationJob(
+            submission_id=inserted_id,
+            mission=mission_enum,
+            values=payload.values,
+            username=payload.username,
+            language=payload.language,
+        )
+    )
+    if not queued:
+        # Pool saturé: on répond tout de suite avec le message de secours
+        confirmation_message = fallback_confirmation_message(
+            mission_enum, payload.username, payload.language, payload.values
+        )
+        await update_confirmation(db, inserted_id, confirmation_message, "fallback")
+        return SubmitResponse(
+            mission=mission_enum.value,
+            year=year,
+            confirmation_message=confirmation_message,
+            id=str(inserted_id),
+            confirmation_status="fallback",
+            degraded=True,
+        )
+
+    return SubmitResponse(
+        mission=mission_enum.value,
+        year=year,
+        confirmation_message="",
+        id=str(inserted_id),
+        confirmation_status="pending",
+    )
+
+
+@router.post("/submit/stream")
+@limiter.limit("10/minute")  # 10 submissions per minute per IP
+async def submit_form_stream(request: Request, payload: SubmitRequest):
+    """
+    Same as `/submit`, but the confirmation is streamed as Server-Sent Events:
+    `delta` events carry the text as it is generated, a final `done` event carries
+    the full `SubmitResponse`. The submission is saved while the text streams.
+    """
+    try:
+        mission_enum = MissionEnum(payload.mission)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Mission inconnue.")
+    _validate_values(payload, mission_enum)
+
+    year = datetime.now().year
+
+    db = get_database()
+    submission = FormSubmission(
+        mission=mission_enum.value,
+        values=payload.values,
+        username=payload.username,
+        language=payload.language,
+        confirmation_status="pending",
+        ip_address=request.client.host if request.client else None,
+        user_agent=request.headers.get("user-agent"),
     )
+    insert_task = asyncio.create_task(insert_submission(db, submission))
+
+    async def save(confirmation_message: str, status: str):
+        inserted_id = await insert_task
+        if confirmation_message:
+            await update_confirmation(db, inserted_id, confirmation_message, status)
+        elif not confirmation_workers.enqueue(
+            ConfirmationJob(
+                submission_id=inserted_id,
+                mission=mission_enum,
+                values=payload.values,
+                username=payload.username,
+                language=payload.language,
+            )
+        ):
+            # Rien n'a été affiché et le pool est saturé: message de secours
+            await update_confirmation(
+                db,
+                inserted_id,
+                fallback_confirmation_message(mission_enum, payload.username, payload.language, payload.values),
+                "fallback",
+            )
+        return inserted_id
 
+    async def event_stream():
+        parts = []
+        saving = None
+        try:
+            # En cas d'échec du LLM, le message modèle arrive comme un seul `delta`
+            async for delta in stream_confirmation_message(
+                mission=mission_enum,
+                values=payload.values,
+                username=payload.username,
+                language=payload.language,
+            ):
+                parts.append(delta)
+                yield format_sse({"delta": delta}, event="delta")
+            status = "fallback" if is_degraded() else "ready"
+
+            # Le message persisté est exactement le texte envoyé au navigateur
+            confirmation_message = "".join(parts)
+            saving = _spawn_save(save(confirmation_message, status))
+            try:
+                inserted_id = await asyncio.shield(saving)
+            except Exception:
+                # Erreur déjà journalisée par _stream_save_done
+                yield format_sse({"detail": "Submission could not be saved."}, event="error")
+                return
+
+            response = SubmitResponse(
+                mission=mission_enum.value,
+                year=year,
+                confirmation_message=confirmation_message,
+                id=str(inserted_id),
+                confirmation_status=status,
+                degraded=is_degraded(),
+            )
+            yield format_sse(response.dict(), event="done")
+        finally:
+            if saving is None:
+                # Client déconnecté (ou erreur) en cours de flux: le texte envoyé est tronqué, la
+                # soumission reste 'pending' et le pool de workers régénère le message complet
+                # (sans attendre ici: le générateur est en train d'être fermé ou annulé)
+                _spawn_save(save("", "pending"))
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
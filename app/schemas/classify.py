@@ -1,3 +1,5 @@
+from typing import List, Optional
+
 from pydantic import BaseModel, Field
 
 
@@ -10,3 +12,22 @@ class ClassifyResponse(BaseModel):
     mission: str
     confidence: float
     reasoning: str
+    degraded: bool = False  # vrai si la réponse vient d'un fallback local (LLM indisponible)
+
+
+class ClassifyBatchRequest(BaseModel):
+    prompts: List[str] = Field(..., description="Messages à classifier (back-office, import).")
+    language: str = Field("fr", description="Langue de travail (par défaut: fr).")
+
+
+class ClassifyBatchItem(BaseModel):
+    index: int  # position dans `prompts`
+    mission: Optional[str] = None
+    confidence: Optional[float] = None
+    reasoning: Optional[str] = None
+    error: Optional[str] = None  # renseigné si cet élément n'a pas pu être classifié
+
+
+class ClassifyBatchResponse(BaseModel):
+    results: List[ClassifyBatchItem]
+    unique_prompts: int
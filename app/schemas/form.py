@@ -0,0 +1,19 @@
+from typing import List
+
+from pydantic import BaseModel, Field
+
+from app.schemas.generate import FormField
+
+
+class FormRequest(BaseModel):
+    prompt: str = Field(..., description="Message libre saisi par l'utilisateur.")
+    language: str = Field("fr", description="Langue de travail (par défaut: fr).")
+
+
+class FormResponse(BaseModel):
+    mission: str
+    confidence: float
+    reasoning: str
+    base_fields: List[FormField]
+    extra_fields: List[FormField]
+    degraded: bool = False  # vrai si la réponse vient d'un fallback local (LLM indisponible)
@@ -9,6 +9,8 @@ class FormField(BaseModel):
     type: Literal["text", "email", "textarea", "number", "select", "checkbox"] = "text"
     required: bool = False
     options: Optional[List[str]] = None  # seulement pour select
+    min: Optional[float] = None  # seulement pour number
+    max: Optional[float] = None  # seulement pour number
 
 
 class GenerateFieldsRequest(BaseModel):
@@ -21,3 +23,26 @@ class GenerateFieldsResponse(BaseModel):
     mission: str
     base_fields: List[FormField]
     extra_fields: List[FormField]
+    degraded: bool = False  # vrai si la réponse vient d'un fallback local (LLM indisponible)
+
+
+class GenerateFieldsBatchItemRequest(BaseModel):
+    mission: str = Field(..., description="Mission fixée (contact, donation, volunteer, information).")
+    prompt: str = Field(..., description="Message de l'utilisateur pour enrichir le formulaire.")
+
+
+class GenerateFieldsBatchRequest(BaseModel):
+    items: List[GenerateFieldsBatchItemRequest]
+    language: str = Field("fr", description="Langue de travail (par défaut: fr).")
+
+
+class GenerateFieldsBatchItem(BaseModel):
+    index: int  # position dans `items`
+    mission: str
+    base_fields: List[FormField] = []
+    extra_fields: List[FormField] = []
+    error: Optional[str] = None  # renseigné si cet élément a échoué (mission inconnue, LLM...)
+
+
+class GenerateFieldsBatchResponse(BaseModel):
+    results: List[GenerateFieldsBatchItem]
@@ -1,8 +1,8 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 from pydantic import BaseModel, Field
 
-from app.schemas.generate import FormField  # si besoin pour retour avancé
+from app.schemas.generate import FormField
 
 
 class SubmitRequest(BaseModel):
@@ -12,9 +12,26 @@ class SubmitRequest(BaseModel):
         None, description="Nom d'utilisateur (si fourni séparément)."
     )
     language: str = Field("fr", description="Langue de réponse.")
+    deferred: bool = Field(
+        False,
+        description="Si vrai, enregistre tout de suite et génère la confirmation en arrière-plan.",
+    )
+    extra_fields: Optional[List[FormField]] = Field(
+        None,
+        description="Champs supplémentaires générés pour cette session (validés avec les champs de base).",
+    )
 
 
 class SubmitResponse(BaseModel):
     mission: str
     year: int
     confirmation_message: str
+    id: Optional[str] = None
+    confirmation_status: str = "ready"
+    degraded: bool = False  # vrai si la confirmation est un message modèle (LLM indisponible)
+
+
+class ConfirmationStatusResponse(BaseModel):
+    id: str
+    confirmation_status: str
+    confirmation_message: str
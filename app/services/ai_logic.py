@@ -1,20 +1,103 @@
+import asyncio
+import copy
 import json
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from functools import lru_cache
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
+
+from pydantic import ValidationError
 
 from app.constants.missions import MissionEnum, MISSIONS
 from app.constants.base_fields import BASE_FIELDS_BY_MISSION
+from app.constants.confirmations import CONFIRMATION_TEMPLATES, DEFAULT_USERNAME
+from app.schemas.generate import FormField
+from app.config import settings
+from app.services.cache import response_cache
+from app.services.confirmation_templates import confirmation_templates
 from app.services.groq_service import groq_service
+from app.services.json_stream import JSONArrayItemParser
+from app.services.local_classifier import local_classifier
+from app.services.prefetch import fields_prefetch
+from app.services.prompt_builder import completion_stats, compact_values, dump_values, truncate_text
+from app.services.metrics import LLM_FALLBACKS, LLM_JSON_PARSE_FAILURES
+from app.services.semantic_cache import semantic_cache
+from app.services.llm_scheduler import LLMUnavailable
+from app.services.degraded import is_degraded, mark_degraded
+from app.services.singleflight import llm_flight
+
+
+def _use_fallback(task: str, error: Exception) -> None:
+    """Trace le passage en mode dégradé (réponse locale, sans LLM) pour la requête en cours."""
+    reason = "unavailable" if isinstance(error, LLMUnavailable) else "error"
+    print(f"⚠️ AI {task} fallback ({reason}): {error}")
+    LLM_FALLBACKS.inc(task=task, reason=reason)
+    mark_degraded()
+
+
+async def _cached(key: str, prompt: str, **context: Any) -> Optional[Any]:
+    """Cache exact, puis cache sémantique (prompt proche, même langue / mission / modèle)."""
+    cached = await response_cache.get(key)
+    if cached is None and settings.SEMANTIC_CACHE_ENABLED:
+        namespace = key.split(":", 1)[0]
+        cached = semantic_cache.get(namespace, prompt, model=groq_service.model_for(namespace), **context)
+    return cached
+
+
+async def _remember(key: str, value: Any, prompt: str, **context: Any) -> None:
+    await response_cache.set(key, value)
+    if settings.SEMANTIC_CACHE_ENABLED:
+        namespace = key.split(":", 1)[0]
+        semantic_cache.set(namespace, prompt, value, model=groq_service.model_for(namespace), **context)
+
+
+def _classify_cache_key(prompt: str, language: str) -> str:
+    return response_cache.make_key(
+        "classify",
+        prompt=prompt,
+        language=language,
+        model=groq_service.model_for("classify"),
+        temperature=0.1,
+    )
 
 
-def classify_mission_from_prompt(prompt: str, language: str = "fr") -> Dict[str, Any]:
+async def classify_mission_from_prompt(
+    prompt: str,
+    language: str = "fr",
+    use_cache: bool = True,
+    use_local: bool = True,
+) -> Dict[str, Any]:
     """
     Utilise le LLM pour classifier le prompt utilisateur dans une des 4 missions fixes.
+    Le classificateur local répond d'abord; le LLM n'est appelé que si sa confiance
+    est sous LOCAL_CLASSIFIER_THRESHOLD.
     Retourne un dict: { mission, confidence, reasoning }
     """
-
-    mission_ids = [m["id"] for m in MISSIONS]
-
+    if use_local and settings.LOCAL_CLASSIFIER_ENABLED:
+        local_result = local_classifier.predict(prompt)
+        if local_result["confidence"] >= settings.LOCAL_CLASSIFIER_THRESHOLD:
+            return local_result
+
+    key = _classify_cache_key(prompt, language)
+    cache_enabled = use_cache and settings.CACHE_CLASSIFY_ENABLED
+    if cache_enabled:
+        cached = await _cached(key, prompt, language=language)
+        if cached is not None:
+            return cached
+
+    # Les requêtes identiques simultanées partagent un seul appel LLM
+    try:
+        return await llm_flight.do(
+            key, lambda: _classify_with_llm(prompt, language, key if cache_enabled else None)
+        )
+    except Exception as e:
+        # LLM indisponible: on garde la meilleure réponse du classificateur local
+        _use_fallback("classify", e)
+        return local_classifier.predict(prompt)
+
+
+@lru_cache(maxsize=256)
+def _classify_system_prompt(language: str) -> str:
+    """Partie statique du prompt de classification, construite une fois par langue."""
     system_prompt = f"""
 Tu es un classificateur intelligent de formulaires pour une association.
 Langue de travail: {language}.
@@ -34,22 +117,33 @@ Réponds STRICTEMENT en JSON avec ce format:
   "reasoning": "courte explication"
 }}
 """
+    return system_prompt.strip()
 
-    user_prompt = f"Texte de l'utilisateur à analyser:\n\"{prompt}\""
 
-    raw = groq_service.chat(
+async def _classify_with_llm(
+    prompt: str,
+    language: str,
+    cache_key: Optional[str],
+) -> Dict[str, Any]:
+    user_prompt = f"Texte de l'utilisateur à analyser:\n\"{truncate_text(prompt, settings.PROMPT_TEXT_TOKEN_BUDGET)}\""
+
+    raw = await groq_service.achat(
         messages=[
-            {"role": "system", "content": system_prompt.strip()},
+            {"role": "system", "content": _classify_system_prompt(language)},
             {"role": "user", "content": user_prompt},
         ],
         temperature=0.1,
-        max_tokens=256,
+        max_tokens=completion_stats.max_tokens("classify", 256),
+        task="classify",
     )
 
+    parsed = True
     try:
         data = json.loads(raw)
     except json.JSONDecodeError:
         # fallback très simple
+        LLM_JSON_PARSE_FAILURES.inc(task="classify")
+        parsed = False
         data = {
             "mission": "contact",
             "confidence": 0.4,
@@ -60,22 +154,33 @@ Réponds STRICTEMENT en JSON avec ce format:
     if mission not in [m.value for m in MissionEnum]:
         mission = "contact"
 
-    return {
+    result = {
         "mission": mission,
         "confidence": float(data.get("confidence", 0.5)),
         "reasoning": data.get("reasoning", ""),
     }
 
+    # On ne met en cache que les réponses LLM valides
+    if cache_key and parsed:
+        await _remember(cache_key, result, prompt, language=language)
 
-def generate_additional_fields(
-    mission: MissionEnum,
-    prompt: str,
-    language: str = "fr",
-) -> List[Dict[str, Any]]:
-    """
-    Génère des champs supplémentaires pertinents à partir du prompt utilisateur.
-    Ne doit PAS regénérer les champs de base (général).
-    """
+    return result
+
+
+def _fields_cache_key(mission: MissionEnum, prompt: str, language: str) -> str:
+    return response_cache.make_key(
+        "fields",
+        prompt=prompt,
+        language=language,
+        mission=mission.value,
+        model=groq_service.model_for("fields"),
+        temperature=0.4,
+    )
+
+
+@lru_cache(maxsize=256)
+def _fields_system_prompt(mission: MissionEnum, language: str) -> str:
+    """Partie statique du prompt de génération de champs, construite une fois par (mission, langue)."""
     system_prompt = f"""
 Tu es un générateur de champs de formulaire (JSON) pour enrichir un formulaire existant.
 
@@ -101,33 +206,179 @@ Respecte STRICTEMENT ce schéma JSON:
 Tu peux renvoyer une liste vide si aucun champ supplémentaire n'est pertinent.
 NE RENVOIE RIEN EN DEHORS DU JSON.
 """
+    return system_prompt.strip()
 
+
+def _fields_messages(mission: MissionEnum, prompt: str, language: str) -> List[Dict[str, str]]:
+    """Construit les messages (system + user) pour la génération de champs."""
     user_prompt = f"""
 Texte fourni par l'utilisateur pour cette mission ({mission.value}):
 
-\"\"\"{prompt}\"\"\"
+\"\"\"{truncate_text(prompt, settings.PROMPT_TEXT_TOKEN_BUDGET)}\"\"\"
 """
 
-    raw = groq_service.chat(
-        messages=[
-            {"role": "system", "content": system_prompt.strip()},
-            {"role": "user", "content": user_prompt.strip()},
-        ],
-        temperature=0.4,
-        max_tokens=512,
-    )
+    return [
+        {"role": "system", "content": _fields_system_prompt(mission, language)},
+        {"role": "user", "content": user_prompt.strip()},
+    ]
+
 
+def _parse_fields(raw: str) -> Tuple[List[Any], bool]:
+    """Extrait la liste "fields" de la réponse LLM. Retourne (fields, parsed)."""
     try:
         data = json.loads(raw)
-        fields = data.get("fields", [])
-        if not isinstance(fields, list):
-            fields = []
     except json.JSONDecodeError:
+        LLM_JSON_PARSE_FAILURES.inc(task="fields")
+        return [], False
+    fields = data.get("fields", []) if isinstance(data, dict) else []
+    if not isinstance(fields, list):
         fields = []
+    return fields, True
+
+
+def prefetch_additional_fields(mission: MissionEnum, prompt: str, language: str = "fr") -> None:
+    """Lance en tâche de fond la génération que /api/generate-fields demandera sûrement ensuite."""
+
+    async def run() -> Tuple[List[Dict[str, Any]], bool]:
+        # Appel spéculatif: priorité la plus basse du scheduler, derrière les vrais /generate-fields
+        fields = await _generate_additional_fields(mission, prompt, language, task="fields_prefetch")
+        # Résultat de secours: la vraie requête retentera le LLM plutôt que de le réutiliser
+        return fields, is_degraded()
+
+    fields_prefetch.start(_fields_cache_key(mission, prompt, language), run)
+
+
+async def _prefetched_fields(key: str) -> Optional[List[Dict[str, Any]]]:
+    prefetched = await fields_prefetch.take(key)
+    if prefetched is None or prefetched[1]:
+        return None
+    return prefetched[0]
+
+
+async def generate_additional_fields(
+    mission: MissionEnum,
+    prompt: str,
+    language: str = "fr",
+    use_cache: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    Génère des champs supplémentaires pertinents à partir du prompt utilisateur.
+    Ne doit PAS regénérer les champs de base (général).
+    """
+    if use_cache:
+        prefetched = await _prefetched_fields(_fields_cache_key(mission, prompt, language))
+        if prefetched is not None:
+            return prefetched
+    return await _generate_additional_fields(mission, prompt, language, use_cache)
+
+
+async def _generate_additional_fields(
+    mission: MissionEnum,
+    prompt: str,
+    language: str = "fr",
+    use_cache: bool = True,
+    task: str = "fields",
+) -> List[Dict[str, Any]]:
+    key = _fields_cache_key(mission, prompt, language)
+    cache_enabled = use_cache and settings.CACHE_FIELDS_ENABLED
+    if cache_enabled:
+        cached = await _cached(key, prompt, language=language, mission=mission.value)
+        if cached is not None:
+            return cached
+
+    # Le préchargement a sa propre clé: une vraie requête ne se greffe pas sur un appel de basse priorité
+    flight_key = key if task == "fields" else f"{task}:{key}"
+    try:
+        return await llm_flight.do(
+            flight_key, lambda: _fields_with_llm(mission, prompt, language, key if cache_enabled else None, task)
+        )
+    except Exception as e:
+        # LLM indisponible: le formulaire reste utilisable avec les champs de base
+        _use_fallback("fields", e)
+        return []
+
+
+async def _fields_with_llm(
+    mission: MissionEnum,
+    prompt: str,
+    language: str,
+    cache_key: Optional[str],
+    task: str = "fields",
+) -> List[Dict[str, Any]]:
+    raw = await groq_service.achat(
+        messages=_fields_messages(mission, prompt, language),
+        temperature=0.4,
+        max_tokens=completion_stats.max_tokens("fields", 512),
+        task=task,
+    )
+
+    fields, parsed = _parse_fields(raw)
+    cleaned_fields = _clean_fields(fields)
+
+    if cache_key and parsed:
+        await _remember(cache_key, cleaned_fields, prompt, language=language, mission=mission.value)
 
-    # Petite validation minimale
+    return cleaned_fields
+
+
+async def stream_additional_fields(
+    mission: MissionEnum,
+    prompt: str,
+    language: str = "fr",
+    use_cache: bool = True,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Variante streaming de `generate_additional_fields`: chaque champ est renvoyé
+    dès que son objet JSON est complet dans le flux du LLM.
+    """
+    prefetched = await _prefetched_fields(_fields_cache_key(mission, prompt, language)) if use_cache else None
+    if prefetched is not None:
+        for field in prefetched:
+            yield field
+        return
+
+    cache_key = None
+    if use_cache and settings.CACHE_FIELDS_ENABLED:
+        cache_key = _fields_cache_key(mission, prompt, language)
+        cached = await _cached(cache_key, prompt, language=language, mission=mission.value)
+        if cached is not None:
+            for field in cached:
+                yield field
+            return
+
+    parser = JSONArrayItemParser()
+    chunks = []
+    emitted = set()
+    try:
+        async for delta in groq_service.achat_stream(
+            messages=_fields_messages(mission, prompt, language),
+            temperature=0.4,
+            max_tokens=completion_stats.max_tokens("fields", 512),
+            task="fields",
+        ):
+            chunks.append(delta)
+            for item in parser.feed(delta):
+                for field in _clean_fields([item]):
+                    if field["name"] in emitted:
+                        continue
+                    emitted.add(field["name"])
+                    yield field
+    except Exception as e:
+        # On garde les champs déjà envoyés, sans en attendre d'autres
+        _use_fallback("fields", e)
+        return
+
+    fields, parsed = _parse_fields("".join(chunks))
+    if cache_key and parsed:
+        await _remember(cache_key, _clean_fields(fields), prompt, language=language, mission=mission.value)
+
+
+def _clean_fields(fields: List[Any]) -> List[Dict[str, Any]]:
+    """Petite validation minimale des champs renvoyés par le LLM (schéma FormField)."""
     cleaned_fields = []
     for f in fields:
+        if not isinstance(f, dict):
+            continue
         name = f.get("name")
         label = f.get("label")
         field_type = f.get("type", "text")
@@ -142,25 +393,406 @@ Texte fourni par l'utilisateur pour cette mission ({mission.value}):
         }
         if field_type == "select" and isinstance(f.get("options"), list):
             cleaned["options"] = f["options"]
+        if field_type == "number":
+            for bound in ("min", "max"):
+                if isinstance(f.get(bound), (int, float)) and not isinstance(f.get(bound), bool):
+                    cleaned[bound] = f[bound]
+
+        try:
+            FormField(**cleaned)
+        except ValidationError:
+            continue
 
         cleaned_fields.append(cleaned)
 
     return cleaned_fields
 
 
-def generate_confirmation_message(
-    mission: MissionEnum,
-    values: Dict[str, Any],
-    username: Optional[str] = None,
+async def classify_and_generate_fields(
+    prompt: str,
     language: str = "fr",
-) -> str:
+    use_cache: bool = True,
+) -> Dict[str, Any]:
     """
-    Génère un message de confirmation stylé Nexus / Nuit de l'Info.
-    Utilise l'année actuelle et le contexte de mission.
+    Classifie le prompt ET génère les champs supplémentaires en un seul appel LLM.
+    Si le classificateur local est assez confiant, seuls les champs sont demandés au LLM.
+    Retourne un dict: { mission, confidence, reasoning, extra_fields }
     """
-    year = datetime.now().year
-    username_display = username or values.get("name") or "Voyageur du Nexus"
+    if settings.LOCAL_CLASSIFIER_ENABLED:
+        local_result = local_classifier.predict(prompt)
+        if local_result["confidence"] >= settings.LOCAL_CLASSIFIER_THRESHOLD:
+            extra_fields = await generate_additional_fields(
+                mission=MissionEnum(local_result["mission"]),
+                prompt=prompt,
+                language=language,
+                use_cache=use_cache,
+            )
+            return {**local_result, "extra_fields": extra_fields}
+
+    key = response_cache.make_key(
+        "form",
+        prompt=prompt,
+        language=language,
+        model=groq_service.model_for("form"),
+        temperature=0.3,
+    )
+    cache_enabled = use_cache and settings.CACHE_CLASSIFY_ENABLED and settings.CACHE_FIELDS_ENABLED
+    if cache_enabled:
+        cached = await _cached(key, prompt, language=language)
+        if cached is not None:
+            return cached
+
+    try:
+        return await llm_flight.do(
+            key, lambda: _form_with_llm(prompt, language, key if cache_enabled else None)
+        )
+    except Exception as e:
+        _use_fallback("form", e)
+        return {**local_classifier.predict(prompt), "extra_fields": []}
+
+
+@lru_cache(maxsize=256)
+def _form_system_prompt(language: str) -> str:
+    """Partie statique du prompt classification + champs, construite une fois par langue."""
+    system_prompt = f"""
+Tu es l'assistant d'un formulaire intelligent pour une association.
+Langue de travail: {language}.
+
+1) Classe le texte de l'utilisateur dans UNE SEULE mission, exactement l'ID:
+- "contact"      : l'utilisateur veut discuter, poser une question, prendre contact.
+- "donation"     : l'utilisateur parle de donner de l'argent, soutenir financièrement.
+- "volunteer"    : l'utilisateur veut aider, devenir bénévole, s'impliquer.
+- "information"  : l'utilisateur veut obtenir des renseignements, détails, explications.
 
+2) Propose des champs supplémentaires pertinents pour cette mission.
+Les champs de base sont déjà définis (nom, email, message de base, etc.), ne les répète pas.
+Tu peux renvoyer une liste vide si aucun champ supplémentaire n'est pertinent.
+
+Réponds STRICTEMENT en JSON avec ce format:
+{{
+  "mission": "contact" | "donation" | "volunteer" | "information",
+  "confidence": 0.0 - 1.0,
+  "reasoning": "courte explication",
+  "fields": [
+    {{
+      "name": "identifiant_unique_snake_case",
+      "label": "Texte affiché pour l'utilisateur (en {language})",
+      "type": "text" | "email" | "textarea" | "number" | "select" | "checkbox",
+      "required": true | false,
+      "options": ["option1", "option2"] // uniquement pour type "select", sinon omettre
+    }}
+  ]
+}}
+NE RENVOIE RIEN EN DEHORS DU JSON.
+"""
+    return system_prompt.strip()
+
+
+async def _form_with_llm(
+    prompt: str,
+    language: str,
+    cache_key: Optional[str],
+) -> Dict[str, Any]:
+    user_prompt = f"Texte de l'utilisateur:\n\"{truncate_text(prompt, settings.PROMPT_TEXT_TOKEN_BUDGET)}\""
+
+    raw = await groq_service.achat(
+        messages=[
+            {"role": "system", "content": _form_system_prompt(language)},
+            {"role": "user", "content": user_prompt},
+        ],
+        temperature=0.3,
+        max_tokens=completion_stats.max_tokens("form", 640),
+        task="form",
+    )
+
+    try:
+        data = json.loads(raw)
+    except json.JSONDecodeError:
+        data = None
+
+    parsed = isinstance(data, dict)
+    if not parsed:
+        LLM_JSON_PARSE_FAILURES.inc(task="form")
+        data = {
+            "mission": "contact",
+            "confidence": 0.4,
+            "reasoning": f"Impossible de parser la réponse LLM, réponse brute: {raw}",
+        }
+
+    mission = data.get("mission", "contact")
+    if mission not in [m.value for m in MissionEnum]:
+        mission = "contact"
+
+    fields = data.get("fields", [])
+    if not isinstance(fields, list):
+        fields = []
+
+    result = {
+        "mission": mission,
+        "confidence": float(data.get("confidence", 0.5)),
+        "reasoning": data.get("reasoning", ""),
+        "extra_fields": _clean_fields(fields),
+    }
+
+    if cache_key and parsed:
+        await _remember(cache_key, result, prompt, language=language)
+
+    return result
+
+
+# --- Traitement par lot (back-office) ----------------------------------------
+
+
+def _chunks(items: List[Any], size: int) -> List[List[Any]]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+async def _run_chunks(chunks: List[List[Any]], worker) -> None:
+    """Lance les paquets en parallèle, au plus BATCH_CONCURRENCY à la fois."""
+    semaphore = asyncio.Semaphore(settings.BATCH_CONCURRENCY)
+
+    async def run(chunk: List[Any]) -> None:
+        async with semaphore:
+            await worker(chunk)
+
+    await asyncio.gather(*(run(chunk) for chunk in chunks))
+
+
+async def _batch_achat(messages: List[Dict[str, str]], temperature: float, max_tokens: int, task: str) -> str:
+    """Appel LLM d'un paquet: un lot peut attendre, les refus du scheduler sont réessayés."""
+    for attempt in range(settings.BATCH_MAX_ATTEMPTS):
+        try:
+            return await groq_service.achat(
+                messages=messages, temperature=temperature, max_tokens=max_tokens, task=task
+            )
+        except LLMUnavailable:
+            if attempt + 1 >= settings.BATCH_MAX_ATTEMPTS:
+                raise
+            await asyncio.sleep(settings.BATCH_RETRY_BACKOFF * (2 ** attempt))
+
+
+def _parse_batch_results(raw: str, task: str) -> Dict[int, Dict[str, Any]]:
+    """{"results": [{"id": 0, ...}, ...]} -> {0: {...}, ...}"""
+    try:
+        data = json.loads(raw)
+    except json.JSONDecodeError:
+        LLM_JSON_PARSE_FAILURES.inc(task=task)
+        return {}
+    items = data.get("results", []) if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        return {}
+    by_id = {}
+    for item in items:
+        if isinstance(item, dict) and isinstance(item.get("id"), int):
+            by_id[item["id"]] = item
+    return by_id
+
+
+@lru_cache(maxsize=256)
+def _classify_batch_system_prompt(language: str) -> str:
+    system_prompt = f"""
+Tu es un classificateur intelligent de formulaires pour une association (traitement par lot).
+Langue de travail: {language}.
+
+Tu reçois un tableau JSON de textes utilisateur, chacun avec un "id".
+Pour CHAQUE texte, choisis UNE SEULE mission parmi ces IDs exacts:
+
+- "contact"      : l'utilisateur veut discuter, poser une question, prendre contact.
+- "donation"     : l'utilisateur parle de donner de l'argent, soutenir financièrement.
+- "volunteer"    : l'utilisateur veut aider, devenir bénévole, s'impliquer.
+- "information"  : l'utilisateur veut obtenir des renseignements, détails, explications.
+
+Réponds STRICTEMENT en JSON avec ce format, un résultat par id:
+
+{{
+  "results": [
+    {{"id": 0, "mission": "contact" | "donation" | "volunteer" | "information", "confidence": 0.0 - 1.0, "reasoning": "courte explication"}}
+  ]
+}}
+"""
+    return system_prompt.strip()
+
+
+def _classify_batch_messages(prompts: List[str], language: str) -> List[Dict[str, str]]:
+    items = [
+        {"id": i, "prompt": truncate_text(prompt, settings.PROMPT_TEXT_TOKEN_BUDGET)}
+        for i, prompt in enumerate(prompts)
+    ]
+    return [
+        {"role": "system", "content": _classify_batch_system_prompt(language)},
+        {"role": "user", "content": json.dumps(items, ensure_ascii=False)},
+    ]
+
+
+async def classify_batch(
+    prompts: List[str],
+    language: str = "fr",
+    use_cache: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    Classifie une liste de prompts (ordre conservé). Les doublons ne sont traités qu'une fois,
+    le classificateur local et les caches d'abord, puis BATCH_CLASSIFY_PER_CALL prompts par appel LLM.
+    Chaque élément: { mission, confidence, reasoning } ou { error }.
+    """
+    keys = [_classify_cache_key(prompt, language) for prompt in prompts]
+    cache_enabled = use_cache and settings.CACHE_CLASSIFY_ENABLED
+    results: Dict[str, Dict[str, Any]] = {}
+    pending: Dict[str, str] = {}
+
+    for key, prompt in zip(keys, prompts):
+        if key in results or key in pending:
+            continue
+        if settings.LOCAL_CLASSIFIER_ENABLED:
+            local_result = local_classifier.predict(prompt)
+            if local_result["confidence"] >= settings.LOCAL_CLASSIFIER_THRESHOLD:
+                results[key] = local_result
+                continue
+        if cache_enabled:
+            cached = await _cached(key, prompt, language=language)
+            if cached is not None:
+                results[key] = cached
+                continue
+        pending[key] = prompt
+
+    async def classify_chunk(chunk: List[Tuple[str, str]]) -> None:
+        try:
+            raw = await _batch_achat(
+                messages=_classify_batch_messages([prompt for _, prompt in chunk], language),
+                temperature=0.1,
+                max_tokens=64 + 96 * len(chunk),
+                task="classify_batch",
+            )
+        except Exception as e:
+            print(f"⚠️ Batch classification chunk failed: {e}")
+            for key, _ in chunk:
+                results[key] = {"error": f"LLM call failed ({type(e).__name__})."}
+            return
+
+        by_id = _parse_batch_results(raw, "classify_batch")
+        for i, (key, prompt) in enumerate(chunk):
+            item = by_id.get(i, {})
+            if item.get("mission") not in [m.value for m in MissionEnum]:
+                results[key] = {"error": "No valid classification in the LLM response."}
+                continue
+            try:
+                confidence = float(item.get("confidence", 0.5))
+            except (TypeError, ValueError):
+                confidence = 0.5
+            result = {
+                "mission": item["mission"],
+                "confidence": confidence,
+                "reasoning": str(item.get("reasoning", "")),
+            }
+            results[key] = result
+            if cache_enabled:
+                await _remember(key, result, prompt, language=language)
+
+    await _run_chunks(_chunks(list(pending.items()), settings.BATCH_CLASSIFY_PER_CALL), classify_chunk)
+    return [copy.deepcopy(results[key]) for key in keys]
+
+
+@lru_cache(maxsize=256)
+def _fields_batch_system_prompt(language: str) -> str:
+    system_prompt = f"""
+Tu es un générateur de champs de formulaire (JSON) pour enrichir des formulaires existants (traitement par lot).
+
+Langue de travail: {language}.
+
+Tu reçois un tableau JSON de demandes, chacune avec un "id", une "mission" et le "prompt" de l'utilisateur.
+Les champs de base sont déjà définis (nom, email, message de base, etc.),
+propose pour CHAQUE demande UNIQUEMENT des champs supplémentaires pertinents.
+
+Respecte STRICTEMENT ce schéma JSON, un résultat par id:
+{{
+  "results": [
+    {{
+      "id": 0,
+      "fields": [
+        {{
+          "name": "identifiant_unique_snake_case",
+          "label": "Texte affiché pour l'utilisateur (en {language})",
+          "type": "text" | "email" | "textarea" | "number" | "select" | "checkbox",
+          "required": true | false,
+          "options": ["option1", "option2"] // uniquement pour type "select", sinon omettre
+        }}
+      ]
+    }}
+  ]
+}}
+
+"fields" peut être une liste vide si aucun champ supplémentaire n'est pertinent.
+NE RENVOIE RIEN EN DEHORS DU JSON.
+"""
+    return system_prompt.strip()
+
+
+def _fields_batch_messages(items: List[Tuple[MissionEnum, str]], language: str) -> List[Dict[str, str]]:
+    payload = [
+        {"id": i, "mission": mission.value, "prompt": truncate_text(prompt, settings.PROMPT_TEXT_TOKEN_BUDGET)}
+        for i, (mission, prompt) in enumerate(items)
+    ]
+    return [
+        {"role": "system", "content": _fields_batch_system_prompt(language)},
+        {"role": "user", "content": json.dumps(payload, ensure_ascii=False)},
+    ]
+
+
+async def generate_fields_batch(
+    items: List[Tuple[MissionEnum, str]],
+    language: str = "fr",
+    use_cache: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    Génère les champs supplémentaires d'une liste de (mission, prompt), ordre conservé,
+    BATCH_FIELDS_PER_CALL demandes par appel LLM. Chaque élément: { extra_fields } ou { error }.
+    """
+    keys = [_fields_cache_key(mission, prompt, language) for mission, prompt in items]
+    cache_enabled = use_cache and settings.CACHE_FIELDS_ENABLED
+    results: Dict[str, Dict[str, Any]] = {}
+    pending: Dict[str, Tuple[MissionEnum, str]] = {}
+
+    for key, (mission, prompt) in zip(keys, items):
+        if key in results or key in pending:
+            continue
+        if cache_enabled:
+            cached = await _cached(key, prompt, language=language, mission=mission.value)
+            if cached is not None:
+                results[key] = {"extra_fields": cached}
+                continue
+        pending[key] = (mission, prompt)
+
+    async def fields_chunk(chunk: List[Tuple[str, Tuple[MissionEnum, str]]]) -> None:
+        try:
+            raw = await _batch_achat(
+                messages=_fields_batch_messages([item for _, item in chunk], language),
+                temperature=0.4,
+                max_tokens=400 * len(chunk),
+                task="fields_batch",
+            )
+        except Exception as e:
+            print(f"⚠️ Batch fields chunk failed: {e}")
+            for key, _ in chunk:
+                results[key] = {"error": f"LLM call failed ({type(e).__name__})."}
+            return
+
+        by_id = _parse_batch_results(raw, "fields_batch")
+        for i, (key, (mission, prompt)) in enumerate(chunk):
+            fields = by_id.get(i, {}).get("fields")
+            if not isinstance(fields, list):
+                results[key] = {"error": "No fields for this item in the LLM response."}
+                continue
+            cleaned_fields = _clean_fields(fields)
+            results[key] = {"extra_fields": cleaned_fields}
+            if cache_enabled:
+                await _remember(key, cleaned_fields, prompt, language=language, mission=mission.value)
+
+    await _run_chunks(_chunks(list(pending.items()), settings.BATCH_FIELDS_PER_CALL), fields_chunk)
+    return [copy.deepcopy(results[key]) for key in keys]
+
+
+@lru_cache(maxsize=256)
+def _confirmation_system_prompt(language: str, year: int) -> str:
+    """Partie statique du prompt de confirmation, construite une fois par (langue, année)."""
     # On veut que ce soit roleplay + mention de l'année
     system_prompt = f"""
 Tu es Axolotl, gardien du Nexus, et tu rédiges un message de confirmation
@@ -176,22 +808,126 @@ Tu dois:
 - Inviter à suivre l'évolution du projet pendant l'année {year}.
 - Rester court (3-5 phrases max).
 """
+    return system_prompt.strip()
+
+
+def _confirmation_messages(
+    mission: MissionEnum,
+    values: Dict[str, Any],
+    username: Optional[str] = None,
+    language: str = "fr",
+) -> List[Dict[str, str]]:
+    """Construit les messages (system + user) pour la confirmation."""
+    username_display = username or values.get("name") or "Voyageur du Nexus"
+    # JSON compact, longs textes tronqués: les valeurs restent sous PROMPT_VALUES_TOKEN_BUDGET
+    context_values = compact_values(values, settings.PROMPT_VALUES_TOKEN_BUDGET)
 
     user_prompt = f"""
-Nom ou pseudo utilisateur: {username_display}
+Nom ou pseudo utilisateur: {truncate_text(str(username_display), 32)}
 Mission: {mission.value}
 Valeurs du formulaire (JSON, pour contexte):
 
-{json.dumps(values, ensure_ascii=False, indent=2)}
+{dump_values(context_values)}
 """
 
-    content = groq_service.chat(
-        messages=[
-            {"role": "system", "content": system_prompt.strip()},
-            {"role": "user", "content": user_prompt.strip()},
-        ],
-        temperature=0.7,
-        max_tokens=300,
-    )
+    return [
+        {"role": "system", "content": _confirmation_system_prompt(language, datetime.now().year)},
+        {"role": "user", "content": user_prompt.strip()},
+    ]
+
+
+async def generate_confirmation_message(
+    mission: MissionEnum,
+    values: Dict[str, Any],
+    username: Optional[str] = None,
+    language: str = "fr",
+    use_fallback: bool = True,
+) -> str:
+    """
+    Génère un message de confirmation stylé Nexus / Nuit de l'Info.
+    Utilise l'année actuelle et le contexte de mission.
+    Si le LLM est indisponible, renvoie le message modèle de la mission
+    (sauf `use_fallback=False`: l'erreur est alors propagée, ex: pour réessayer).
+    En mode CONFIRMATION_MODE="template", aucun appel LLM: un modèle pré-généré est rempli.
+    """
+    if settings.CONFIRMATION_MODE == "template":
+        return _template_confirmation(mission, values, username, language, use_fallback)
+
+    try:
+        content = await groq_service.achat(
+            messages=_confirmation_messages(mission, values, username, language),
+            temperature=0.7,
+            max_tokens=completion_stats.max_tokens("confirmation", 300),
+            task="confirmation",
+        )
+    except Exception as e:
+        if not use_fallback:
+            raise
+        _use_fallback("confirmation", e)
+        return fallback_confirmation_message(mission, username, language, values)
 
     return content
+
+
+async def stream_confirmation_message(
+    mission: MissionEnum,
+    values: Dict[str, Any],
+    username: Optional[str] = None,
+    language: str = "fr",
+) -> AsyncIterator[str]:
+    """
+    Variante streaming de `generate_confirmation_message` (morceaux de texte).
+    Si le LLM échoue avant le premier morceau, le message modèle est envoyé d'un bloc.
+    """
+    if settings.CONFIRMATION_MODE == "template":
+        yield _template_confirmation(mission, values, username, language)
+        return
+
+    started = False
+    try:
+        async for delta in groq_service.achat_stream(
+            messages=_confirmation_messages(mission, values, username, language),
+            temperature=0.7,
+            max_tokens=completion_stats.max_tokens("confirmation", 300),
+            task="confirmation",
+        ):
+            started = True
+            yield delta
+    except Exception as e:
+        _use_fallback("confirmation", e)
+        if not started:
+            yield fallback_confirmation_message(mission, username, language, values)
+
+
+def _template_confirmation(
+    mission: MissionEnum,
+    values: Dict[str, Any],
+    username: Optional[str],
+    language: str,
+    use_fallback: bool = True,
+) -> str:
+    """Remplit un modèle du pool; message de secours (réponse dégradée) tant que le pool n'est pas prêt."""
+    username_display = username or values.get("name")
+    message = confirmation_templates.render(mission, language, username_display, values)
+    if message is not None:
+        return message
+    error = LLMUnavailable(f"No confirmation template ready for '{mission.value}' ({language})")
+    if not use_fallback:
+        raise error
+    _use_fallback("confirmation", error)
+    return fallback_confirmation_message(mission, username, language, values)
+
+
+def fallback_confirmation_message(
+    mission: MissionEnum,
+    username: Optional[str] = None,
+    language: str = "fr",
+    values: Optional[Dict[str, Any]] = None,
+) -> str:
+    """Message de confirmation de secours, sans LLM (modèle par mission et par langue)."""
+    templates = CONFIRMATION_TEMPLATES[mission]
+    lang = (language or "fr").split("-")[0].lower()
+    if lang not in templates:
+        lang = "fr"
+    username_display = username or (values or {}).get("name") or DEFAULT_USERNAME[lang]
+    return templates[lang].format(username=username_display, year=datetime.now().year)
@@ -0,0 +1,189 @@
+import copy
+import hashlib
+import json
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from app.services.metrics import registry, timed_db
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Normalise un prompt pour que les variantes triviales partagent la même clé."""
+    text = unicodedata.normalize("NFKC", prompt or "").lower()
+    text = re.sub(r"\s+", " ", text).strip()
+    return text.strip(" .!?¡¿…,;:\"'«»")
+
+
+class CacheBackend:
+    """Interface minimale d'un backend de cache (clé -> valeur JSON-sérialisable)."""
+
+    async def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        return 0
+
+
+class LRUCache(CacheBackend):
+    """Cache en mémoire du process, éviction LRU par taille + expiration TTL."""
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[Any]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class MongoCache(CacheBackend):
+    """Cache partagé entre workers gunicorn, stocké dans une collection MongoDB avec index TTL."""
+
+    def __init__(self, collection_name: str = "llm_cache"):
+        self.collection_name = collection_name
+        self._index_ready = False
+
+    def _collection(self):
+        from app.database import get_database
+
+        return get_database()[self.collection_name]
+
+    async def _ensure_index(self, collection) -> None:
+        if not self._index_ready:
+            await collection.create_index("expires_at", expireAfterSeconds=0)
+            self._index_ready = True
+
+    async def get(self, key: str) -> Optional[Any]:
+        collection = self._collection()
+        async with timed_db("cache_find_one"):
+            doc = await collection.find_one({"_id": key})
+        if doc is None or doc["expires_at"] < datetime.utcnow():
+            return None
+        return doc["value"]
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        collection = self._collection()
+        await self._ensure_index(collection)
+        async with timed_db("cache_replace_one"):
+            await collection.replace_one(
+                {"_id": key},
+                {"_id": key, "value": value, "expires_at": datetime.utcnow() + timedelta(seconds=ttl)},
+                upsert=True,
+            )
+
+
+class ResponseCache:
+    """
+    Cache des réponses LLM: LRU local devant un backend partagé optionnel.
+    Compte les hits / misses par namespace (classify, fields, ...).
+    """
+
+    def __init__(
+        self,
+        local: CacheBackend,
+        shared: Optional[CacheBackend] = None,
+        ttl: float = 3600,
+    ):
+        self.local = local
+        self.shared = shared
+        self.ttl = ttl
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+
+    @staticmethod
+    def make_key(namespace: str, **parts: Any) -> str:
+        if "prompt" in parts:
+            parts["prompt"] = normalize_prompt(parts["prompt"])
+        raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        return f"{namespace}:{hashlib.sha256(raw.encode('utf-8')).hexdigest()}"
+
+    async def get(self, key: str) -> Optional[Any]:
+        namespace = key.split(":", 1)[0]
+        value = await self.local.get(key)
+        if value is None and self.shared is not None:
+            try:
+                value = await self.shared.get(key)
+            except Exception as e:
+                print(f"⚠️ Shared cache read failed: {e}")
+                value = None
+            if value is not None:
+                await self.local.set(key, value, self.ttl)
+
+        if value is None:
+            self.misses[namespace] = self.misses.get(namespace, 0) + 1
+            return None
+        self.hits[namespace] = self.hits.get(namespace, 0) + 1
+        # Copie pour que l'appelant ne modifie pas l'entrée en cache
+        return copy.deepcopy(value)
+
+    async def set(self, key: str, value: Any) -> None:
+        await self.local.set(key, copy.deepcopy(value), self.ttl)
+        if self.shared is not None:
+            try:
+                await self.shared.set(key, value, self.ttl)
+            except Exception as e:
+                print(f"⚠️ Shared cache write failed: {e}")
+
+    def prometheus_lines(self) -> List[str]:
+        lines = [
+            "# HELP llm_cache_hits_total Hits du cache de réponses LLM",
+            "# TYPE llm_cache_hits_total counter",
+        ]
+        lines += [f'llm_cache_hits_total{{namespace="{ns}"}} {n}' for ns, n in sorted(self.hits.items())]
+        lines += [
+            "# HELP llm_cache_misses_total Misses du cache de réponses LLM",
+            "# TYPE llm_cache_misses_total counter",
+        ]
+        lines += [f'llm_cache_misses_total{{namespace="{ns}"}} {n}' for ns, n in sorted(self.misses.items())]
+        lines += [
+            "# HELP llm_cache_entries Entrées dans le cache local",
+            "# TYPE llm_cache_entries gauge",
+            f"llm_cache_entries {len(self.local)}",
+        ]
+        return lines
+
+    def stats(self) -> Dict[str, Any]:
+        namespaces = set(self.hits) | set(self.misses)
+        return {
+            "backend": "memory+mongo" if self.shared is not None else "memory",
+            "size": len(self.local),
+            "namespaces": {
+                ns: {"hits": self.hits.get(ns, 0), "misses": self.misses.get(ns, 0)}
+                for ns in sorted(namespaces)
+            },
+        }
+
+
+response_cache = ResponseCache(
+    local=LRUCache(max_entries=settings.CACHE_MAX_ENTRIES),
+    shared=MongoCache() if settings.CACHE_BACKEND == "mongo" else None,
+    ttl=settings.CACHE_TTL_SECONDS,
+)
+registry.register_collector(response_cache.prometheus_lines)
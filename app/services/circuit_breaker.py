@@ -0,0 +1,96 @@
+import time
+from collections import deque
+from typing import Deque
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur sur une fenêtre glissante des derniers appels.
+
+    - closed: tout passe; s'ouvre quand la part d'appels en échec (erreur ou plus lent
+      que `slow_call_seconds`) dépasse `failure_ratio` sur au moins `min_calls` appels
+    - open: tout est refusé pendant `open_seconds`
+    - half_open: un seul appel test passe; succès -> closed, échec -> open
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_ratio: float = 0.5,
+        min_calls: int = 10,
+        window: int = 50,
+        open_seconds: float = 30.0,
+        slow_call_seconds: float = 0.0,
+    ):
+        self.name = name
+        self.failure_ratio = failure_ratio
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.slow_call_seconds = slow_call_seconds
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def allow(self) -> bool:
+        """True si un appel peut partir maintenant (réserve l'appel test en half_open)."""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def available(self) -> bool:
+        """Comme `allow`, sans réserver l'appel test."""
+        state = self.state
+        return state == self.CLOSED or (state == self.HALF_OPEN and not self._probe_in_flight)
+
+    def record_success(self, latency: float) -> None:
+        if self.slow_call_seconds and latency > self.slow_call_seconds:
+            self.record_failure()
+            return
+        if self._state == self.HALF_OPEN:
+            self._close()
+        else:
+            self._outcomes.append(False)
+
+    def record_failure(self) -> None:
+        if self._state == self.HALF_OPEN:
+            self._open()
+            return
+        self._outcomes.append(True)
+        if len(self._outcomes) >= self.min_calls:
+            failures = sum(self._outcomes)
+            if failures / len(self._outcomes) >= self.failure_ratio:
+                self._open()
+
+    def abandon(self) -> None:
+        """Appel annulé sans résultat: libère l'appel test éventuel."""
+        self._probe_in_flight = False
+
+    def _open(self) -> None:
+        if self._state != self.OPEN:
+            print(f"⚠️ Circuit '{self.name}' open for {self.open_seconds:.0f}s")
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+        self._outcomes.clear()
+
+    def _close(self) -> None:
+        print(f"✅ Circuit '{self.name}' closed")
+        self._state = self.CLOSED
+        self._probe_in_flight = False
+        self._outcomes.clear()
@@ -0,0 +1,230 @@
+"""
+Mode "template" des confirmations: le LLM pré-génère en arrière-plan un petit pool
+de modèles par (mission, langue, année), avec des emplacements `{username}`, `{year}`
+et quelques valeurs du formulaire. Au submit, on remplit un modèle localement: plus
+d'appel LLM sur le chemin de la soumission.
+"""
+import asyncio
+import json
+import random
+import string
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.config import settings
+from app.constants.base_fields import BASE_FIELDS_BY_MISSION
+from app.constants.confirmations import DEFAULT_USERNAME
+from app.constants.missions import MissionEnum
+from app.services.groq_service import groq_service
+
+PoolKey = Tuple[str, str, int]
+
+# Valeurs courtes qu'un modèle peut citer (pas l'email ni les textes longs)
+SLOT_FIELD_TYPES = ("text", "number", "select")
+MAX_SLOT_LENGTH = 60
+MAX_TEMPLATE_LENGTH = 700
+# Délai minimum entre deux tentatives de remplissage à la demande d'un même pool
+RETRY_INTERVAL_SECONDS = 60
+
+
+def value_slots(mission: MissionEnum) -> List[str]:
+    return [
+        f["name"]
+        for f in BASE_FIELDS_BY_MISSION.get(mission, [])
+        if f.get("type", "text") in SLOT_FIELD_TYPES and f["name"] not in ("name", "email")
+    ]
+
+
+def template_placeholders(template: str) -> Optional[Set[str]]:
+    """Noms des emplacements `{...}` du modèle, ou None s'il n'est pas formatable."""
+    try:
+        fields = [(name, spec, conv) for _, name, spec, conv in string.Formatter().parse(template) if name is not None]
+    except ValueError:
+        return None
+    # Les valeurs sont insérées comme texte: pas de format (`{amount:.2f}`) ni de conversion
+    if any(spec or conv for _, spec, conv in fields):
+        return None
+    return {name for name, _, _ in fields}
+
+
+def _clean_slot(value: Any) -> str:
+    text = " ".join(str(value).split())
+    return text.replace("{", "").replace("}", "")[:MAX_SLOT_LENGTH]
+
+
+def _templates_messages(mission: MissionEnum, language: str, year: int, count: int) -> List[Dict[str, str]]:
+    slots = value_slots(mission)
+    slot_lines = "\n".join(f"- {{{name}}}" for name in slots) or "- (aucune)"
+    system_prompt = f"""
+Tu es Axolotl, gardien du Nexus, et tu rédiges des MODÈLES de messages de confirmation
+envoyés après la soumission d'un formulaire.
+
+Langue: {language}
+Thème: aventure, jeu vidéo, sci-fi, "Nexus", "quêtes", "Nuit de l'Info".
+Mission: {mission.value}
+Année: {year}
+
+Écris {count} modèles différents (ton et formulation variés), 3-5 phrases chacun.
+Chaque modèle DOIT contenir l'emplacement {{username}} et peut utiliser {{year}}.
+Emplacements optionnels tirés du formulaire:
+{slot_lines}
+N'utilise AUCUN autre emplacement ni accolade.
+
+Réponds STRICTEMENT en JSON: {{"templates": ["...", "..."]}}
+"""
+    return [
+        {"role": "system", "content": system_prompt.strip()},
+        {"role": "user", "content": f"Génère les {count} modèles pour la mission \"{mission.value}\"."},
+    ]
+
+
+class ConfirmationTemplatePool:
+    def __init__(self, pool_size: int, refresh_seconds: float, languages: List[str]):
+        self.pool_size = pool_size
+        self.refresh_seconds = refresh_seconds
+        # Langues servies par les pools; les autres (choisies par le client) passent par le message de secours
+        self.languages = list(dict.fromkeys(self._language_code(l) for l in languages))
+        self._pools: Dict[PoolKey, List[str]] = {}
+        self._refreshed_at: Dict[PoolKey, float] = {}
+        self._attempted_at: Dict[PoolKey, float] = {}
+        self._refreshing: Dict[PoolKey, asyncio.Task] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _language_code(language: Optional[str]) -> str:
+        return (language or "fr").split("-")[0].strip().lower()
+
+    def _key(self, mission: MissionEnum, language: Optional[str], year: int) -> Optional[PoolKey]:
+        """Clé du pool, ou None si la langue n'est pas dans CONFIRMATION_TEMPLATE_LANGUAGES."""
+        code = self._language_code(language)
+        if code not in self.languages:
+            return None
+        return (mission.value, code, year)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            print(f"🧩 Confirmation template pool started ({self.pool_size} per mission/language)")
+
+    async def stop(self) -> None:
+        tasks = [t for t in [self._task, *self._refreshing.values()] if t is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._refreshing.clear()
+
+    async def _run(self) -> None:
+        # Rafraîchit tous les pools au démarrage puis à intervalle régulier
+        while True:
+            year = datetime.now().year
+            for mission in MissionEnum:
+                for language in self.languages:
+                    await self.refresh(mission, language, year)
+            await asyncio.sleep(self.refresh_seconds)
+
+    async def refresh(self, mission: MissionEnum, language: str, year: int) -> int:
+        """Demande un nouveau lot de modèles au LLM; garde l'ancien pool en cas d'échec."""
+        key = self._key(mission, language, year)
+        if key is None:
+            return 0
+        self._attempted_at[key] = time.monotonic()
+        try:
+            raw = await groq_service.achat(
+                messages=_templates_messages(mission, key[1], year, self.pool_size),
+                temperature=0.9,
+                max_tokens=200 * self.pool_size,
+                task="confirmation_templates",
+            )
+        except Exception as e:
+            print(f"⚠️ Confirmation templates refresh failed for {key}: {e}")
+            return 0
+
+        templates = self._validate(mission, raw)
+        if templates:
+            self._pools[key] = templates
+            self._refreshed_at[key] = time.monotonic()
+            self._drop_other_years(year)
+        return len(templates)
+
+    def _drop_other_years(self, year: int) -> None:
+        # Les pools des années passées ne servent plus
+        for entries in (self._pools, self._refreshed_at, self._attempted_at):
+            for key in [k for k in entries if k[2] != year]:
+                del entries[key]
+
+    def _validate(self, mission: MissionEnum, raw: str) -> List[str]:
+        try:
+            data = json.loads(raw)
+        except json.JSONDecodeError:
+            return []
+        candidates = data.get("templates", []) if isinstance(data, dict) else data
+        if not isinstance(candidates, list):
+            return []
+
+        allowed = {"username", "year", *value_slots(mission)}
+        templates = []
+        for template in candidates:
+            if not isinstance(template, str) or len(template) > MAX_TEMPLATE_LENGTH:
+                continue
+            placeholders = template_placeholders(template)
+            if placeholders is None or "username" not in placeholders or not placeholders <= allowed:
+                continue
+            templates.append(template.strip())
+        return templates[: self.pool_size]
+
+    def render(
+        self,
+        mission: MissionEnum,
+        language: str,
+        username_display: Optional[str],
+        values: Dict[str, Any],
+    ) -> Optional[str]:
+        """
+        Remplit un modèle du pool (au hasard parmi ceux dont toutes les valeurs sont fournies).
+        Retourne None si le pool est vide: l'appelant utilise le message de secours.
+        """
+        year = datetime.now().year
+        key = self._key(mission, language, year)
+        if key is None:
+            return None
+        pool = self._pools.get(key)
+        if not pool:
+            self._schedule_refresh(mission, key)
+            return None
+
+        slots = {name: _clean_slot(values[name]) for name in value_slots(mission) if values.get(name) not in (None, "")}
+        slots["username"] = username_display or DEFAULT_USERNAME.get(key[1], DEFAULT_USERNAME["fr"])
+        slots["year"] = str(year)
+        eligible = [t for t in pool if template_placeholders(t) <= set(slots)]
+        if not eligible:
+            return None
+        return random.choice(eligible).format(**slots)
+
+    def _schedule_refresh(self, mission: MissionEnum, key: PoolKey) -> None:
+        # Nouvelle année (ou pool encore vide): on remplit le pool sans bloquer la requête
+        if key in self._refreshing or self._task is None:
+            return
+        if key in self._attempted_at and time.monotonic() - self._attempted_at[key] < RETRY_INTERVAL_SECONDS:
+            return
+        task = asyncio.create_task(self.refresh(mission, key[1], key[2]))
+        self._refreshing[key] = task
+        task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            f"{mission}:{language}:{year}": {
+                "templates": len(pool),
+                "age_seconds": round(now - self._refreshed_at.get((mission, language, year), now), 1),
+            }
+            for (mission, language, year), pool in sorted(self._pools.items())
+        }
+
+
+confirmation_templates = ConfirmationTemplatePool(
+    pool_size=settings.CONFIRMATION_TEMPLATE_POOL_SIZE,
+    refresh_seconds=settings.CONFIRMATION_TEMPLATE_REFRESH_SECONDS,
+    languages=[l.strip() for l in settings.CONFIRMATION_TEMPLATE_LANGUAGES.split(",") if l.strip()],
+)
@@ -0,0 +1,144 @@
+import asyncio
+import random
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+
+from app.config import settings
+from app.constants.missions import MissionEnum
+from app.database import get_database
+from app.services.ai_logic import generate_confirmation_message, fallback_confirmation_message
+from app.services.submission_store import claim_pending_confirmation, update_confirmation
+
+
+@dataclass
+class ConfirmationJob:
+    submission_id: ObjectId
+    mission: MissionEnum
+    values: Dict[str, Any]
+    username: Optional[str]
+    language: str
+
+
+class ConfirmationWorkerPool:
+    """
+    Pool borné de workers asyncio qui génèrent les messages de confirmation
+    après l'insertion en base, avec retries et backoff exponentiel.
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        queue_size: int = 1000,
+        max_attempts: int = 3,
+        backoff: float = 0.5,
+    ):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+        await self._recover_pending()
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Laisse les workers vider la file (au plus `timeout` s) puis les arrête."""
+        if self._queue is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            print(f"⚠️ {self._queue.qsize()} confirmations still pending at shutdown")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    def enqueue(self, job: ConfirmationJob) -> bool:
+        """Ajoute un job sans attendre. Retourne False si le pool est arrêté ou saturé."""
+        if self._queue is None:
+            return False
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._process(job)
+            except Exception as e:
+                print(f"⚠️ Confirmation worker error for {job.submission_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _process(self, job: ConfirmationJob) -> None:
+        db = get_database()
+        for attempt in range(self.max_attempts):
+            try:
+                message = await generate_confirmation_message(
+                    mission=job.mission,
+                    values=job.values,
+                    username=job.username,
+                    language=job.language,
+                    use_fallback=False,
+                )
+                await update_confirmation(db, job.submission_id, message, "ready")
+                return
+            except Exception as e:
+                print(f"⚠️ AI generation failed (attempt {attempt + 1}/{self.max_attempts}): {e}")
+                if attempt + 1 < self.max_attempts:
+                    delay = self.backoff * (2 ** attempt)
+                    await asyncio.sleep(delay + random.uniform(0, delay / 2))
+
+        await update_confirmation(
+            db,
+            job.submission_id,
+            fallback_confirmation_message(job.mission, job.username, job.language, job.values),
+            "fallback",
+        )
+
+    async def _recover_pending(self) -> None:
+        """
+        Reprend les confirmations restées 'pending' après l'arrêt du worker qui les générait.
+        Chaque document est réservé (bail) avant d'être mis en file: les soumissions encore
+        traitées par un autre worker (job différé, /submit/stream) ne sont pas reprises.
+        """
+        db = get_database()
+        recovered = 0
+        while not self._queue.full():
+            doc = await claim_pending_confirmation(db)
+            if doc is None:
+                break
+            try:
+                mission = MissionEnum(doc.get("mission"))
+            except ValueError:
+                continue
+            self.enqueue(
+                ConfirmationJob(
+                    submission_id=doc["_id"],
+                    mission=mission,
+                    values=doc.get("values") or {},
+                    username=doc.get("username"),
+                    language=doc.get("language", "fr"),
+                )
+            )
+            recovered += 1
+        if recovered:
+            print(f"🔁 {recovered} pending confirmations recovered")
+
+
+confirmation_workers = ConfirmationWorkerPool(
+    workers=settings.CONFIRMATION_WORKERS,
+    queue_size=settings.CONFIRMATION_QUEUE_SIZE,
+    max_attempts=settings.CONFIRMATION_MAX_ATTEMPTS,
+    backoff=settings.CONFIRMATION_RETRY_BACKOFF,
+)
@@ -0,0 +1,12 @@
+from contextvars import ContextVar
+
+# Vrai si la requête en cours a reçu au moins une réponse de secours (sans LLM)
+_degraded: ContextVar[bool] = ContextVar("llm_degraded", default=False)
+
+
+def mark_degraded() -> None:
+    _degraded.set(True)
+
+
+def is_degraded() -> bool:
+    return _degraded.get()
@@ -0,0 +1,210 @@
+"""
+Export en flux des soumissions (NDJSON, CSV, Parquet).
+
+Le curseur Motor est lu par lots de EXPORT_BATCH_SIZE documents: chaque lot est encodé
+puis envoyé avant de lire le suivant, la mémoire reste constante quel que soit le
+nombre de lignes. Parquet nécessite `pyarrow` (optionnel: `pip install pyarrow`).
+
+Les colonnes des exports tabulaires viennent des champs de base des missions: aucune
+requête avant le premier octet. Les champs supplémentaires générés pour une session
+(clés de `values` hors champs de base) vont ensemble, en JSON, dans la colonne `values.extra`.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from bson import ObjectId
+
+from app.config import settings
+from app.constants.base_fields import BASE_FIELDS_BY_MISSION
+from app.constants.missions import MissionEnum
+
+# Colonnes fixes des exports tabulaires, puis une colonne `values.<clé>` par champ de base
+COLUMNS = [
+    "_id",
+    "mission",
+    "language",
+    "username",
+    "submitted_at",
+    "confirmation_status",
+    "confirmation_message",
+    "ip_address",
+    "user_agent",
+]
+EXTRA_COLUMN = "values.extra"
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def build_filter(
+    mission: Optional[str] = None,
+    language: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    query_filter: Dict[str, Any] = {}
+    if mission:
+        query_filter["mission"] = mission
+    if language:
+        query_filter["language"] = language
+    if since or until:
+        query_filter["submitted_at"] = {}
+        if since:
+            query_filter["submitted_at"]["$gte"] = since
+        if until:
+            query_filter["submitted_at"]["$lt"] = until
+    return query_filter
+
+
+async def _batches(db, query_filter: Dict[str, Any]) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Documents par lots, du plus ancien au plus récent (index submitted_at, _id)."""
+    batch_size = settings.EXPORT_BATCH_SIZE
+    cursor = (
+        db.submissions.find(query_filter)
+        .sort([("submitted_at", 1), ("_id", 1)])
+        .batch_size(batch_size)
+    )
+    batch = []
+    async for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def value_keys(mission: Optional[str] = None) -> List[str]:
+    """Champs de base de la mission (toutes les missions sans filtre), dans l'ordre du formulaire."""
+    missions = [MissionEnum(mission)] if mission in [m.value for m in MissionEnum] else list(MissionEnum)
+    ordered = []
+    for m in missions:
+        for field in BASE_FIELDS_BY_MISSION.get(m, []):
+            if field["name"] not in ordered:
+                ordered.append(field["name"])
+    return ordered
+
+
+def tabular_columns(keys: List[str]) -> List[str]:
+    return COLUMNS + [f"values.{key}" for key in keys] + [EXTRA_COLUMN]
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _cell(value: Any) -> Optional[str]:
+    """Valeur d'une cellule CSV / Parquet (listes et objets en JSON)."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False, default=_json_default)
+    return str(value)
+
+
+def _extra(values: Dict[str, Any], keys: List[str]) -> Optional[str]:
+    extra = {key: value for key, value in values.items() if key not in keys}
+    return _cell(extra) if extra else None
+
+
+def _row(doc: Dict[str, Any], keys: List[str]) -> List[Optional[str]]:
+    values = doc.get("values") or {}
+    return (
+        [_cell(doc.get(column)) for column in COLUMNS]
+        + [_cell(values.get(key)) for key in keys]
+        + [_extra(values, keys)]
+    )
+
+
+async def export_ndjson(db, query_filter: Dict[str, Any]) -> AsyncIterator[bytes]:
+    async for batch in _batches(db, query_filter):
+        yield "".join(
+            json.dumps(doc, ensure_ascii=False, default=_json_default) + "\n" for doc in batch
+        ).encode("utf-8")
+
+
+async def export_csv(db, query_filter: Dict[str, Any], keys: List[str]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(tabular_columns(keys))
+    async for batch in _batches(db, query_filter):
+        writer.writerows(_row(doc, keys) for doc in batch)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Fichier en écriture seule dont on récupère les octets au fur et à mesure."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def export_parquet(db, query_filter: Dict[str, Any], keys: List[str]) -> AsyncIterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    columns = [name for name in tabular_columns(keys) if name != "submitted_at"]
+    schema = pa.schema(
+        [("submitted_at", pa.timestamp("ms"))] + [(name, pa.string()) for name in columns]
+    )
+    sink = _ChunkSink()
+    # Un row group par lot: le fichier s'écrit (et s'envoie) au fil de la lecture du curseur
+    writer = pq.ParquetWriter(sink, schema, compression="snappy")
+    try:
+        async for batch in _batches(db, query_filter):
+            data = {"submitted_at": [doc.get("submitted_at") for doc in batch]}
+            for name in columns:
+                if name == EXTRA_COLUMN:
+                    data[name] = [_extra(doc.get("values") or {}, keys) for doc in batch]
+                elif name.startswith("values."):
+                    key = name[len("values."):]
+                    data[name] = [_cell((doc.get("values") or {}).get(key)) for doc in batch]
+                else:
+                    data[name] = [_cell(doc.get(name)) for doc in batch]
+            writer.write_table(pa.Table.from_pydict(data, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
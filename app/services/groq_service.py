@@ -1,30 +1,384 @@
-from typing import List, Dict, Any, Optional
+import time
+from typing import AsyncIterator, List, Dict, Any, Optional
 
-from groq import Groq
+import httpx
+from groq import (
+    AsyncGroq,
+    DefaultAsyncHttpxClient,
+    APIConnectionError,
+    APIStatusError,
+    RateLimitError,
+)
 
 from app.config import settings
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.llm_scheduler import LLMUnavailable, build_scheduler
+from app.services.prompt_builder import completion_stats, count_message_tokens
+from app.services.metrics import (
+    LLM_CALL_TOKENS,
+    LLM_COMPLETION_TOKENS,
+    LLM_ERRORS,
+    LLM_LATENCY,
+    LLM_PROMPT_TOKENS,
+    LLM_TIME_TO_FIRST_TOKEN,
+    record_timing,
+    registry,
+)
+
+
+# Variantes d'une tâche unitaire: lots ("classify_batch") et préchargement ("fields_prefetch")
+TASK_SUFFIXES = ("_batch", "_prefetch")
+
+
+def base_task(task: str) -> str:
+    """Tâche unitaire d'une variante ("fields_prefetch" -> "fields")."""
+    for suffix in TASK_SUFFIXES:
+        if task.endswith(suffix):
+            return task[: -len(suffix)]
+    return task
+
+
+def _is_backend_failure(error: Exception) -> bool:
+    # Erreurs imputables au backend (réseau, timeout, 429, 5xx), pas à la requête elle-même
+    if isinstance(error, (APIConnectionError, RateLimitError)):
+        return True
+    return isinstance(error, APIStatusError) and error.status_code >= 500
+
+
+class LLMBackend:
+    """Un couple (clé API, modèle) avec son client, son disjoncteur et ses statistiques."""
+
+    def __init__(self, name: str, api_key: str, model: str, base_url: Optional[str]):
+        self.name = name
+        self.api_key = api_key
+        self.model = model
+        self.base_url = base_url
+        self.outstanding = 0
+        # Latence moyenne (EWMA), départage les backends à charge égale
+        self.latency_ewma = 0.0
+        self.breaker = CircuitBreaker(
+            name,
+            failure_ratio=settings.LLM_BREAKER_FAILURE_RATIO,
+            min_calls=settings.LLM_BREAKER_MIN_CALLS,
+            window=settings.LLM_BREAKER_WINDOW,
+            open_seconds=settings.LLM_BREAKER_OPEN_SECONDS,
+        )
+        self._client: Optional[AsyncGroq] = None
+
+    @property
+    def client(self) -> AsyncGroq:
+        if self._client is None:
+            timeout = httpx.Timeout(
+                connect=settings.GROQ_CONNECT_TIMEOUT,
+                read=settings.GROQ_READ_TIMEOUT,
+                write=settings.GROQ_CONNECT_TIMEOUT,
+                pool=settings.GROQ_READ_TIMEOUT,
+            )
+            http_client = DefaultAsyncHttpxClient(
+                timeout=timeout,
+                limits=httpx.Limits(
+                    max_connections=settings.GROQ_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.GROQ_MAX_CONNECTIONS,
+                ),
+            )
+            self._client = AsyncGroq(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                http_client=http_client,
+                timeout=timeout,
+                max_retries=settings.GROQ_MAX_RETRIES,
+            )
+        return self._client
+
+    def started(self) -> None:
+        self.outstanding += 1
+
+    def finished(self, elapsed: float, error: Optional[Exception]) -> None:
+        self.outstanding = max(0, self.outstanding - 1)
+        if error is None:
+            self.latency_ewma = elapsed if not self.latency_ewma else 0.8 * self.latency_ewma + 0.2 * elapsed
+            self.breaker.record_success(elapsed)
+        elif _is_backend_failure(error):
+            self.breaker.record_failure()
+        else:
+            # Erreur de requête (400...) ou annulation: ne compte pas contre le backend
+            self.breaker.abandon()
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
 
 
 class GroqService:
+    """
+    Pool de backends Groq (une entrée par clé et par modèle).
+
+    Chaque tâche est routée vers un niveau de modèle (rapide pour LLM_FAST_TASKS,
+    MODEL_NAME sinon), puis vers le backend disponible qui a le moins d'appels
+    en cours (à égalité: la plus faible latence moyenne).
+    """
+
     def __init__(self, api_key: Optional[str] = None, model_name: Optional[str] = None):
-        self.api_key = api_key or settings.GROQ_API_KEY
+        self.api_keys = [api_key] if api_key else settings.groq_api_keys
         self.model_name = model_name or settings.MODEL_NAME
-        self.client = Groq(api_key=self.api_key)
+        self.fast_model_name = settings.MODEL_NAME_FAST or self.model_name
+        self.fast_tasks = {t.strip() for t in settings.LLM_FAST_TASKS.split(",") if t.strip()}
+        self.base_url = settings.GROQ_BASE_URL or None
+        # Budget d'admission dimensionné sur les clés réellement configurées pour ce pool
+        self.scheduler = build_scheduler(len(self.api_keys))
+
+        # Disjoncteur global: erreurs ou lenteur du fournisseur -> fallbacks immédiats
+        self.breaker = CircuitBreaker(
+            "groq",
+            failure_ratio=settings.LLM_BREAKER_FAILURE_RATIO,
+            min_calls=settings.LLM_BREAKER_MIN_CALLS,
+            window=settings.LLM_BREAKER_WINDOW,
+            open_seconds=settings.LLM_BREAKER_OPEN_SECONDS,
+            slow_call_seconds=settings.LLM_BREAKER_SLOW_SECONDS,
+        )
+
+        self.backends: Dict[str, List[LLMBackend]] = {}
+        for model in {self.model_name, self.fast_model_name}:
+            self.backends[model] = [
+                LLMBackend(f"{model}#{i}", key, model, self.base_url)
+                for i, key in enumerate(self.api_keys)
+            ]
+
+    def model_for(self, task: str) -> str:
+        # Les lots et le préchargement utilisent le modèle de la tâche unitaire
+        return self.fast_model_name if base_task(task) in self.fast_tasks else self.model_name
+
+    def _pick_backend(self, task: str, exclude: Optional[LLMBackend] = None) -> LLMBackend:
+        model = self.model_for(task)
+        candidates = [
+            b for b in self.backends[model]
+            if b is not exclude and b.breaker.available()
+        ]
+        # Least-outstanding-requests, puis latence moyenne
+        for backend in sorted(candidates, key=lambda b: (b.outstanding, b.latency_ewma)):
+            if backend.breaker.allow():
+                return backend
+        raise LLMUnavailable(f"No healthy LLM backend for model '{model}' (task '{task}')")
 
-    def chat(
+    async def _admit(self, task: str, reserved: int) -> LLMBackend:
+        """Disjoncteur global, choix du backend puis file d'admission du scheduler."""
+        if not self.breaker.allow():
+            raise LLMUnavailable("LLM circuit open")
+        backend = None
+        try:
+            backend = self._pick_backend(task)
+            # Lève LLMOverloaded si l'appel ne peut pas partir avant son échéance
+            await self.scheduler.acquire(task, reserved)
+        except BaseException:
+            self.breaker.abandon()
+            if backend is not None:
+                backend.breaker.abandon()
+            raise
+        return backend
+
+    def _record_outcome(self, error: Optional[BaseException], latency: float) -> None:
+        if error is None:
+            self.breaker.record_success(latency)
+        elif isinstance(error, Exception) and _is_backend_failure(error):
+            self.breaker.record_failure()
+        else:
+            self.breaker.abandon()
+
+    @staticmethod
+    def estimate_tokens(messages: List[Dict[str, str]], max_tokens: int) -> int:
+        # Tokens du prompt (comptage local) + la génération maximale demandée
+        return count_message_tokens(messages) + max_tokens
+
+    async def achat(
         self,
         messages: List[Dict[str, str]],
         temperature: float = 0.2,
         max_tokens: int = 512,
+        task: str = "chat",
     ) -> str:
-        """Retourne le contenu de la réponse (message assistant)."""
-        completion = self.client.chat.completions.create(
-            model=self.model_name,
-            messages=messages,
-            temperature=temperature,
-            max_tokens=max_tokens,
-        )
-        return completion.choices[0].message.content
+        """
+        Complétion de chat pour `task`, sans bloquer la boucle d'événements: admission par
+        le scheduler, puis un second essai sur un autre backend du modèle si le premier est en panne.
+        """
+        reserved = self.estimate_tokens(messages, max_tokens)
+        backend = await self._admit(task, reserved)
+
+        start = time.perf_counter()
+        completion = None
+        error: Optional[BaseException] = None
+        try:
+            try:
+                completion = await self._create(backend, messages, temperature, max_tokens, task)
+            except Exception as e:
+                # Un backend en panne: une seconde chance sur un autre backend du même modèle
+                if not _is_backend_failure(e):
+                    raise
+                try:
+                    backend = self._pick_backend(task, exclude=backend)
+                except LLMUnavailable:
+                    raise e
+                completion = await self._create(backend, messages, temperature, max_tokens, task)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self._record_outcome(error, elapsed)
+            usage = getattr(completion, "usage", None)
+            self.scheduler.release(reserved, getattr(usage, "total_tokens", None), elapsed)
+            record_timing("llm", elapsed)
+
+        choice = completion.choices[0]
+        self._record_usage(usage, task, backend.model, choice.finish_reason == "length", max_tokens)
+        return choice.message.content
+
+    async def _create(
+        self,
+        backend: LLMBackend,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        task: str,
+    ) -> Any:
+        start = time.perf_counter()
+        error: Optional[Exception] = None
+        backend.started()
+        try:
+            return await backend.client.chat.completions.create(
+                model=backend.model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+            )
+        except Exception as e:
+            error = e
+            self._record_error(e, task)
+            raise
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            backend.finished(elapsed, error)
+            LLM_LATENCY.observe(elapsed, task=task, model=backend.model)
+
+    async def achat_stream(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.2,
+        max_tokens: int = 512,
+        task: str = "chat",
+    ) -> AsyncIterator[str]:
+        """Comme `achat`, mais renvoie les morceaux de texte au fil de la génération."""
+        reserved = self.estimate_tokens(messages, max_tokens)
+        backend = await self._admit(task, reserved)
+
+        start = time.perf_counter()
+        first_token_at: Optional[float] = None
+        used_tokens = None
+        stream_usage = None
+        finish_reason = None
+        error: Optional[BaseException] = None
+        backend.started()
+        try:
+            stream = await backend.client.chat.completions.create(
+                model=backend.model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True,
+            )
+            async for chunk in stream:
+                # Groq envoie l'usage dans le dernier chunk (x_groq.usage)
+                usage = getattr(getattr(chunk, "x_groq", None), "usage", None)
+                if usage is not None:
+                    stream_usage = usage
+                    used_tokens = usage.total_tokens
+                if not chunk.choices:
+                    continue
+                finish_reason = chunk.choices[0].finish_reason or finish_reason
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter() - start
+                        LLM_TIME_TO_FIRST_TOKEN.observe(first_token_at, task=task, model=backend.model)
+                    yield delta
+            if used_tokens is not None:
+                self._record_usage(stream_usage, task, backend.model, finish_reason == "length", max_tokens)
+        except Exception as e:
+            error = e
+            self._record_error(e, task)
+            raise
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            backend.finished(elapsed, error)
+            # En streaming, la lenteur se juge au premier token
+            self._record_outcome(error, first_token_at if first_token_at is not None else elapsed)
+            self.scheduler.release(reserved, used_tokens, elapsed)
+            LLM_LATENCY.observe(elapsed, task=task, model=backend.model)
+            record_timing("llm", elapsed)
+
+    def _record_error(self, error: Exception, task: str) -> None:
+        LLM_ERRORS.inc(task=task, error=type(error).__name__)
+        if isinstance(error, RateLimitError):
+            self.scheduler.throttled(1 / len(self.api_keys))
+
+    def _record_usage(
+        self,
+        usage: Any,
+        task: str,
+        model: str,
+        truncated: bool = False,
+        max_tokens: int = 0,
+    ) -> None:
+        if usage is None:
+            return
+        LLM_PROMPT_TOKENS.inc(usage.prompt_tokens or 0, task=task, model=model)
+        LLM_COMPLETION_TOKENS.inc(usage.completion_tokens or 0, task=task, model=model)
+        # Tokens réellement envoyés / générés par appel
+        LLM_CALL_TOKENS.observe(usage.prompt_tokens or 0, task=task, kind="prompt")
+        LLM_CALL_TOKENS.observe(usage.completion_tokens or 0, task=task, kind="completion")
+        # Le préchargement alimente le max_tokens de sa tâche unitaire; un lot répond pour
+        # plusieurs éléments, sa longueur fausserait le percentile d'un appel unitaire
+        if not task.endswith("_batch"):
+            completion_stats.observe(base_task(task), usage.completion_tokens, truncated, max_tokens)
+
+    def prometheus_lines(self) -> List[str]:
+        states = {CircuitBreaker.CLOSED: 0, CircuitBreaker.HALF_OPEN: 1, CircuitBreaker.OPEN: 2}
+        backends = [b for pool in self.backends.values() for b in pool]
+        lines = [
+            "# HELP llm_backend_outstanding Appels en cours par backend",
+            "# TYPE llm_backend_outstanding gauge",
+        ]
+        lines += [f'llm_backend_outstanding{{backend="{b.name}"}} {b.outstanding}' for b in backends]
+        lines += [
+            "# HELP llm_backend_latency_ewma_seconds Latence moyenne (EWMA) par backend",
+            "# TYPE llm_backend_latency_ewma_seconds gauge",
+        ]
+        lines += [f'llm_backend_latency_ewma_seconds{{backend="{b.name}"}} {b.latency_ewma}' for b in backends]
+        lines += [
+            "# HELP llm_backend_circuit_state Disjoncteur par backend (0 closed, 1 half_open, 2 open)",
+            "# TYPE llm_backend_circuit_state gauge",
+        ]
+        lines += [f'llm_backend_circuit_state{{backend="{b.name}"}} {states[b.breaker.state]}' for b in backends]
+        lines += [
+            "# HELP llm_circuit_state Disjoncteur global LLM (0 closed, 1 half_open, 2 open)",
+            "# TYPE llm_circuit_state gauge",
+            f"llm_circuit_state {states[self.breaker.state]}",
+        ]
+        return lines
+
+    async def aclose(self) -> None:
+        """Ferme les clients HTTP async (appelé au shutdown)."""
+        for pool in self.backends.values():
+            for backend in pool:
+                await backend.aclose()
 
 
 groq_service = GroqService()
+registry.register_collector(groq_service.prometheus_lines)
+registry.register_collector(groq_service.scheduler.prometheus_lines)
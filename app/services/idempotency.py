@@ -0,0 +1,171 @@
+"""
+Idempotence de POST /api/submit: une soumission rejouée (retry mobile, double clic)
+renvoie la réponse déjà produite, sans nouvel appel LLM ni nouvelle écriture.
+
+- clé: en-tête `Idempotency-Key`, sinon (IDEMPOTENCY_DERIVE_KEYS) hash de (mission, values, username):
+  deux soumissions identiques dans le TTL sont alors fusionnées
+- une clé = un document `_id` de la collection `submit_idempotency` (index TTL sur expires_at):
+  l'insertion sert de verrou entre workers, la réponse y est stockée une fois prête
+- cache local court des réponses + attente sur la requête en cours du même worker
+"""
+import asyncio
+import copy
+import hashlib
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from pymongo.errors import DuplicateKeyError
+
+from app.config import settings
+from app.services.cache import LRUCache
+from app.services.metrics import IDEMPOTENCY_REQUESTS, timed_db
+
+COLLECTION = "submit_idempotency"
+# Les réponses restent en mémoire moins longtemps qu'en base (les retries arrivent vite)
+LOCAL_RESULT_TTL = 60
+POLL_INTERVAL = 0.1
+
+
+class IdempotencyConflict(Exception):
+    """La clé est déjà utilisée (payload différent, ou requête d'origine toujours en cours)."""
+
+    def __init__(self, detail: str, status_code: int = 409):
+        super().__init__(detail)
+        self.detail = detail
+        self.status_code = status_code
+
+
+def _hash(data: Any) -> str:
+    raw = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def submit_key(header_key: Optional[str], payload: Dict[str, Any]) -> Tuple[Optional[str], str]:
+    """(clé d'idempotence ou None, empreinte du payload complet)."""
+    fingerprint = _hash(payload)
+    if header_key:
+        return "key:" + _hash(header_key.strip()), fingerprint
+    if settings.IDEMPOTENCY_DERIVE_KEYS:
+        derived = {k: payload.get(k) for k in ("mission", "values", "username")}
+        return "auto:" + _hash(derived), fingerprint
+    return None, fingerprint
+
+
+class IdempotencyStore:
+    def __init__(self, ttl: float, wait_timeout: float, max_entries: int = 4096):
+        self.ttl = ttl
+        self.wait_timeout = wait_timeout
+        self._results = LRUCache(max_entries=max_entries)
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def run(
+        self,
+        db,
+        key: str,
+        fingerprint: str,
+        fn: Callable[[], Awaitable[Dict[str, Any]]],
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Exécute `fn` une seule fois par clé. Retourne (réponse, rejouée).
+        Lève IdempotencyConflict si la clé a servi pour un autre payload.
+        """
+        cached = await self._results.get(key)
+        if cached is not None:
+            self._check(key, cached["fingerprint"], fingerprint)
+            IDEMPOTENCY_REQUESTS.inc(outcome="replayed_local")
+            return copy.deepcopy(cached["response"]), True
+
+        task = self._inflight.get(key)
+        if task is not None:
+            # Doublon concurrent dans ce worker: on attend la première requête
+            record_fingerprint, response, _ = await asyncio.shield(task)
+            self._check(key, record_fingerprint, fingerprint)
+            IDEMPOTENCY_REQUESTS.inc(outcome="joined")
+            return copy.deepcopy(response), True
+
+        task = asyncio.create_task(self._claim_and_run(db, key, fingerprint, fn))
+        self._inflight[key] = task
+        task.add_done_callback(lambda t: self._done(key, t))
+        record_fingerprint, response, replayed = await asyncio.shield(task)
+        self._check(key, record_fingerprint, fingerprint)
+        return copy.deepcopy(response), replayed
+
+    async def _claim_and_run(self, db, key: str, fingerprint: str, fn) -> Tuple[str, Dict[str, Any], bool]:
+        collection = db[COLLECTION]
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            now = datetime.utcnow()
+            # Lecture indexée d'abord: un rejeu ne tente pas d'insertion vouée à l'échec
+            async with timed_db("idempotency_find_one"):
+                record = await collection.find_one({"_id": key})
+            if record is None:
+                try:
+                    async with timed_db("idempotency_insert"):
+                        await collection.insert_one({
+                            "_id": key,
+                            "fingerprint": fingerprint,
+                            "status": "pending",
+                            "created_at": now,
+                            "expires_at": now + timedelta(seconds=self.ttl),
+                        })
+                    break
+                except DuplicateKeyError:
+                    # Prise entre-temps par un autre worker: on relit son document
+                    continue
+
+            if record.get("expires_at", now) <= now:
+                # Expirée (verrou abandonné ou réponse périmée) mais pas encore purgée par l'index TTL
+                await collection.delete_one({"_id": key, "expires_at": record["expires_at"]})
+                continue
+
+            # Clé déjà prise (autre worker, ou soumission précédente): réponse stockée ou attente
+            if record.get("status") == "done":
+                await self._remember(key, record["fingerprint"], record["response"])
+                IDEMPOTENCY_REQUESTS.inc(outcome="replayed")
+                return record["fingerprint"], record["response"], True
+            if key.startswith("key:") and record["fingerprint"] != fingerprint:
+                return record["fingerprint"], {}, True
+            if time.monotonic() >= deadline:
+                IDEMPOTENCY_REQUESTS.inc(outcome="timeout")
+                raise IdempotencyConflict("A request with this idempotency key is still in progress.")
+            # Requête d'origine en cours (ou échouée: le document disparaît et on retente)
+            await asyncio.sleep(POLL_INTERVAL)
+
+        try:
+            response = await fn()
+        except BaseException:
+            # Échec: on libère la clé pour que le retry du client puisse aboutir
+            await collection.delete_one({"_id": key, "status": "pending"})
+            raise
+
+        async with timed_db("idempotency_update"):
+            await collection.update_one({"_id": key}, {"$set": {"status": "done", "response": response}})
+        await self._remember(key, fingerprint, response)
+        IDEMPOTENCY_REQUESTS.inc(outcome="executed")
+        return fingerprint, response, False
+
+    async def _remember(self, key: str, fingerprint: str, response: Dict[str, Any]) -> None:
+        await self._results.set(key, {"fingerprint": fingerprint, "response": response}, ttl=min(self.ttl, LOCAL_RESULT_TTL))
+
+    @staticmethod
+    def _check(key: str, record_fingerprint: str, fingerprint: str) -> None:
+        # Clé dérivée: l'empreinte peut différer (langue, deferred) sans que ce soit une erreur
+        if key.startswith("key:") and record_fingerprint != fingerprint:
+            IDEMPOTENCY_REQUESTS.inc(outcome="mismatch")
+            raise IdempotencyConflict(
+                "Idempotency-Key already used with a different payload.", status_code=422
+            )
+
+    def _done(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()
+
+
+submit_idempotency = IdempotencyStore(
+    ttl=settings.IDEMPOTENCY_TTL_SECONDS,
+    wait_timeout=settings.IDEMPOTENCY_WAIT_SECONDS,
+)
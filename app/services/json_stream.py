@@ -0,0 +1,67 @@
+import json
+from typing import Any, List
+
+
+class JSONArrayItemParser:
+    """
+    Parseur JSON incrémental minimal: on lui donne le texte morceau par morceau
+    et il renvoie chaque objet `{...}` élément d'un tableau dès qu'il est complet.
+
+    Gère `{"fields": [{...}, {...}]}` comme `[{...}, {...}]`; le texte autour
+    du JSON (ex: balises ```json) est ignoré.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._item_start = -1
+
+    def feed(self, chunk: str) -> List[Any]:
+        self._buffer += chunk
+        items = []
+        buffer = self._buffer
+        for i in range(self._pos, len(buffer)):
+            char = buffer[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                if self._stack:
+                    self._in_string = True
+            elif char in "{[":
+                if char == "{" and self._is_item_parent():
+                    self._item_start = i
+                self._stack.append(char)
+            elif char in "}]" and self._stack:
+                self._stack.pop()
+                if char == "}" and self._item_start >= 0 and self._is_item_parent():
+                    try:
+                        items.append(json.loads(buffer[self._item_start:i + 1]))
+                    except json.JSONDecodeError:
+                        pass
+                    self._item_start = -1
+
+        self._pos = len(buffer)
+        # On ne garde en mémoire que l'objet en cours de lecture
+        if self._item_start < 0:
+            self._buffer = ""
+            self._pos = 0
+        elif self._item_start > 0:
+            self._buffer = buffer[self._item_start:]
+            self._pos -= self._item_start
+            self._item_start = 0
+        return items
+
+    def _is_item_parent(self) -> bool:
+        # Objet directement dans un tableau racine, ou dans un tableau d'un objet racine
+        return self._stack in (["["], ["{", "["])
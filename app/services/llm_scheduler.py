@@ -0,0 +1,245 @@
+"""
+Admission des appels LLM sortants (par worker).
+
+- budget "token bucket" aligné sur le quota Groq (requêtes/min et tokens/min)
+- nombre d'appels simultanés borné (GROQ_MAX_CONCURRENCY)
+- files de priorité: classify / form > fields > confirmation > le reste
+- chaque appel a une échéance: s'il ne peut pas partir à temps, il est refusé
+  tout de suite (`LLMOverloaded`) et l'appelant utilise son fallback
+"""
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Dict, List, Optional
+
+from app.config import settings
+from app.services.metrics import LLM_ADMISSION_WAIT, LLM_SHED
+
+# Plus petit = plus prioritaire
+TASK_PRIORITIES: Dict[str, int] = {
+    "classify": 0,
+    "form": 0,
+    "fields": 1,
+    "confirmation": 2,
+}
+DEFAULT_PRIORITY = 3
+
+
+class LLMUnavailable(Exception):
+    """Aucun appel LLM possible pour le moment: l'appelant doit utiliser son fallback."""
+
+
+class LLMOverloaded(LLMUnavailable):
+    """Appel LLM refusé par le scheduler (file pleine ou échéance impossible à tenir)."""
+
+    def __init__(self, task: str, reason: str):
+        super().__init__(f"LLM overloaded ({reason}) for task '{task}'")
+        self.task = task
+        self.reason = reason
+
+
+class TokenBucket:
+    """Seau qui se remplit de `per_minute / 60` unités par seconde (capacité = `per_minute`)."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.capacity <= 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Secondes avant que `amount` soit disponible (0 si tout de suite)."""
+        if self.unlimited:
+            return 0.0
+        self._refill()
+        # Une demande plus grosse que le seau passe dès qu'il est plein
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.level) / self.rate)
+
+    def take(self, amount: float) -> None:
+        if not self.unlimited:
+            self._refill()
+            self.level -= amount
+
+    def give_back(self, amount: float) -> None:
+        if not self.unlimited:
+            self._refill()
+            self.level = min(self.capacity, self.level + amount)
+
+    def drain(self, share: float = 1.0) -> None:
+        if not self.unlimited:
+            self._refill()
+            self.level = min(self.level, self.capacity * (1 - share))
+
+
+class _Waiter:
+    __slots__ = ("task", "tokens", "future", "enqueued_at")
+
+    def __init__(self, task: str, tokens: int, future: asyncio.Future):
+        self.task = task
+        self.tokens = tokens
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+
+class LLMScheduler:
+    def __init__(
+        self,
+        max_concurrency: int,
+        requests_per_minute: float,
+        tokens_per_minute: float,
+        deadlines: Dict[str, float],
+        default_deadline: float,
+        max_queue: int,
+    ):
+        self.max_concurrency = max_concurrency
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.deadlines = deadlines
+        self.default_deadline = default_deadline
+        self.max_queue = max_queue
+
+        self._active = 0
+        self._queue: List[tuple] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Durée moyenne (EWMA) d'un appel, pour estimer l'attente d'un créneau
+        self._avg_hold: Optional[float] = None
+
+    def deadline_for(self, task: str) -> float:
+        return self.deadlines.get(task, self.default_deadline)
+
+    async def acquire(self, task: str, tokens: int) -> None:
+        """Attend un créneau pour un appel estimé à `tokens` tokens, ou lève `LLMOverloaded`."""
+        priority = TASK_PRIORITIES.get(task, DEFAULT_PRIORITY)
+
+        # Voie rapide: personne en attente, créneau et budget disponibles
+        if not self._queue and self._active < self.max_concurrency and self._budget_wait(tokens) == 0:
+            self._grant(tokens)
+            LLM_ADMISSION_WAIT.observe(0.0, task=task)
+            return
+
+        if self.queued() >= self.max_queue:
+            LLM_SHED.inc(task=task, reason="queue_full")
+            raise LLMOverloaded(task, "queue_full")
+
+        deadline = self.deadline_for(task)
+        if self._estimated_wait(priority, tokens) > deadline:
+            LLM_SHED.inc(task=task, reason="early")
+            raise LLMOverloaded(task, "early")
+
+        waiter = _Waiter(task, tokens, asyncio.get_running_loop().create_future())
+        heapq.heappush(self._queue, (priority, next(self._seq), waiter))
+        self._dispatch()
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout=deadline)
+        except asyncio.TimeoutError:
+            if not waiter.future.done():
+                waiter.future.cancel()
+                LLM_SHED.inc(task=task, reason="deadline")
+                raise LLMOverloaded(task, "deadline")
+        except asyncio.CancelledError:
+            if not waiter.future.done():
+                waiter.future.cancel()
+            elif not waiter.future.cancelled():
+                # Créneau accordé mais l'appelant est parti: on le libère
+                self.release(tokens)
+            raise
+        LLM_ADMISSION_WAIT.observe(time.monotonic() - waiter.enqueued_at, task=task)
+
+    def release(self, reserved_tokens: int, used_tokens: Optional[int] = None, held: Optional[float] = None) -> None:
+        """Libère le créneau; rend au budget les tokens réservés mais non consommés."""
+        self._active = max(0, self._active - 1)
+        if used_tokens is not None and used_tokens < reserved_tokens:
+            self.tokens.give_back(reserved_tokens - used_tokens)
+        if held is not None:
+            self._avg_hold = held if self._avg_hold is None else 0.8 * self._avg_hold + 0.2 * held
+        self._dispatch()
+
+    def throttled(self, share: float = 1.0) -> None:
+        """
+        Le fournisseur a répondu 429: on retire du budget la part de la clé concernée
+        (`share` = 1 / nombre de clés) pour laisser son quota se recharger.
+        """
+        self.requests.drain(share)
+        self.tokens.drain(share)
+
+    def _budget_wait(self, tokens: int) -> float:
+        return max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+
+    def _grant(self, tokens: int) -> None:
+        self._active += 1
+        self.requests.take(1)
+        self.tokens.take(tokens)
+
+    def _estimated_wait(self, priority: int, tokens: int) -> float:
+        ahead = [w for p, _, w in self._queue if p <= priority and not w.future.done()]
+        ahead_tokens = sum(w.tokens for w in ahead) + tokens
+        wait = 0.0
+        if not self.requests.unlimited:
+            wait = max(wait, (len(ahead) + 1 - self.requests.level) / self.requests.rate)
+        if not self.tokens.unlimited:
+            wait = max(wait, (ahead_tokens - self.tokens.level) / self.tokens.rate)
+        if self._active >= self.max_concurrency and self._avg_hold is not None:
+            wait = max(wait, (len(ahead) // self.max_concurrency + 1) * self._avg_hold)
+        return wait
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        while self._queue and self._active < self.max_concurrency:
+            _, _, waiter = self._queue[0]
+            if waiter.future.done():
+                heapq.heappop(self._queue)
+                continue
+            wait = self._budget_wait(waiter.tokens)
+            if wait > 0:
+                # On réessaie quand le budget se sera rechargé
+                self._timer = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                return
+            heapq.heappop(self._queue)
+            self._grant(waiter.tokens)
+            waiter.future.set_result(None)
+
+    def queued(self) -> int:
+        return sum(1 for _, _, w in self._queue if not w.future.done())
+
+    def prometheus_lines(self) -> List[str]:
+        return [
+            "# HELP llm_scheduler_active Appels LLM en cours",
+            "# TYPE llm_scheduler_active gauge",
+            f"llm_scheduler_active {self._active}",
+            "# HELP llm_scheduler_queued Appels LLM en attente d'admission",
+            "# TYPE llm_scheduler_queued gauge",
+            f"llm_scheduler_queued {self.queued()}",
+        ]
+
+
+def build_scheduler(api_keys: int) -> LLMScheduler:
+    """Scheduler d'un pool de `api_keys` clés Groq (les quotas GROQ_*_PER_MINUTE sont par clé)."""
+    return LLMScheduler(
+        max_concurrency=settings.GROQ_MAX_CONCURRENCY,
+        requests_per_minute=settings.GROQ_REQUESTS_PER_MINUTE * api_keys,
+        tokens_per_minute=settings.GROQ_TOKENS_PER_MINUTE * api_keys,
+        deadlines={
+            "classify": settings.LLM_DEADLINE_CLASSIFY,
+            "form": settings.LLM_DEADLINE_CLASSIFY,
+            "fields": settings.LLM_DEADLINE_FIELDS,
+            "confirmation": settings.LLM_DEADLINE_CONFIRMATION,
+        },
+        default_deadline=settings.LLM_DEADLINE_CONFIRMATION,
+        max_queue=settings.LLM_QUEUE_MAX,
+    )
@@ -0,0 +1,193 @@
+import math
+import re
+import unicodedata
+from typing import Any, Dict, Iterable, List, Tuple
+
+from app.config import settings
+from app.constants.missions import MissionEnum, MISSIONS, MISSION_SEED_EXAMPLES
+
+
+_STOPWORDS = {
+    # fr
+    "je", "j", "tu", "il", "elle", "on", "nous", "vous", "ils", "me", "m", "te", "se", "s",
+    "le", "la", "les", "l", "un", "une", "des", "du", "de", "d", "a", "au", "aux", "et", "ou",
+    "en", "pour", "par", "sur", "avec", "dans", "ce", "c", "ca", "cette", "ces", "mon", "ma",
+    "mes", "votre", "vos", "notre", "nos", "qui", "que", "qu", "est", "suis", "veux", "voudrais",
+    "souhaite", "aimerais", "faire", "bonjour", "merci", "n", "y", "plus",
+    "ai", "avoir", "peux", "puis", "pouvez", "comment", "quand", "pourquoi", "quel", "quels",
+    "quelle", "quelles", "mais", "si",
+    # en
+    "i", "you", "we", "to", "the", "an", "and", "or", "of", "for", "on", "in", "with", "my",
+    "your", "our", "is", "am", "are", "want", "would", "like", "some", "about", "be", "it",
+    "me", "can", "please", "hello", "hi", "do", "how", "more",
+    "get", "have", "has", "does", "did", "will", "could", "where", "what", "when", "why",
+    "which", "this", "that", "there", "if", "but", "so",
+}
+# Les mots interrogatifs et auxiliaires ne portent pas l'intention: hors vocabulaire, ils
+# donnaient à eux seuls une confiance élevée à des demandes voisines ("Can I get a refund...")
+
+# Une négation inverse le sens des mots-clés ("je ne veux pas faire de don"): le LLM tranche
+_NEGATIONS = {
+    # fr
+    "ne", "n'", "pas", "jamais", "non", "aucun", "aucune", "rien",
+    # en
+    "not", "no", "never", "nor", "cannot", "don't", "doesn't", "didn't", "can't", "won't",
+    "wouldn't", "isn't", "aren't", "wasn't", "shouldn't", "couldn't",
+}
+# Contractions gardées en un seul token ("don't" n'est pas "don", "n'ai" -> "n'", "ai")
+_TOKEN_RE = re.compile(r"[a-z0-9]+n't|n'|[a-z0-9]+")
+# Mots-clés distincts reconnus en dessous desquels la confiance est réduite proportionnellement
+MIN_KEYWORDS = 2
+# La confiance est l'écart de probabilité entre la meilleure mission et la suivante
+
+
+def words(text: str) -> List[str]:
+    """Tous les mots, en minuscules et sans accents (contractions comprises)."""
+    folded = unicodedata.normalize("NFKD", text.lower())
+    folded = "".join(c for c in folded if not unicodedata.combining(c)).replace("\u2019", "'")
+    return _TOKEN_RE.findall(folded)
+
+
+def tokenize(text: str, keep: Iterable[str] = ()) -> List[str]:
+    """Minuscules, sans accents, sans mots vides (sauf ceux de `keep`)."""
+    stopwords = _STOPWORDS.difference(keep)
+    return [t for t in words(text) if t not in stopwords and (len(t) > 1 or t in keep)]
+
+
+def has_negation(tokens: Iterable[str]) -> bool:
+    return any(t in _NEGATIONS for t in tokens)
+
+
+def extract_features(text: str) -> List[str]:
+    """Unigrammes, préfixes (racines grossières) et bigrammes de mots."""
+    tokens = tokenize(text)
+    features = list(tokens)
+    features.extend(f"~{t[:5]}" for t in tokens if len(t) > 5)
+    features.extend(f"{a}_{b}" for a, b in zip(tokens, tokens[1:]))
+    return features
+
+
+class LocalMissionClassifier:
+    """
+    Classificateur bayésien naïf multinomial sur les 4 missions fixes.
+    Les log-vraisemblances sont précalculées au `fit`, la prédiction est un simple
+    parcours de dictionnaire (bien en dessous de la milliseconde).
+    """
+
+    def __init__(self, alpha: float = 0.5):
+        self.alpha = alpha
+        self.labels: List[str] = [m["id"].value for m in MISSIONS]
+        self._loglik: Dict[str, List[float]] = {}
+        self.trained_on = 0
+
+    def fit(self, examples: Iterable[Tuple[str, str]]) -> None:
+        counts: Dict[str, Dict[str, int]] = {label: {} for label in self.labels}
+        n_examples = 0
+        for text, mission in examples:
+            if mission not in counts:
+                continue
+            n_examples += 1
+            for feature in extract_features(text):
+                counts[mission][feature] = counts[mission].get(feature, 0) + 1
+
+        vocab = set()
+        for class_counts in counts.values():
+            vocab.update(class_counts)
+        totals = {label: sum(counts[label].values()) for label in self.labels}
+
+        loglik = {}
+        for feature in vocab:
+            loglik[feature] = [
+                math.log(
+                    (counts[label].get(feature, 0) + self.alpha)
+                    / (totals[label] + self.alpha * len(vocab))
+                )
+                for label in self.labels
+            ]
+        self._loglik = loglik
+        self.trained_on = n_examples
+
+    def predict(self, text: str) -> Dict[str, Any]:
+        """
+        Retourne un dict au format ClassifyResponse: { mission, confidence, reasoning }.
+        La confiance est la marge de la meilleure mission sur la deuxième. Nulle si le texte contient une négation, réduite si moins de
+        MIN_KEYWORDS mots-clés sont reconnus: le LLM décide dans ces cas-là.
+        """
+        scores = [0.0] * len(self.labels)
+        matched = []
+        for feature in extract_features(text):
+            weights = self._loglik.get(feature)
+            if weights is None:
+                continue
+            matched.append(feature)
+            for i, w in enumerate(weights):
+                scores[i] += w
+
+        if not matched:
+            return {
+                "mission": MissionEnum.CONTACT.value,
+                "confidence": 0.0,
+                "reasoning": "Classification locale: aucun mot-clé reconnu.",
+            }
+
+        # softmax (a priori uniforme entre missions)
+        top = max(scores)
+        exps = [math.exp(s - top) for s in scores]
+        total = sum(exps)
+        ranked = sorted(range(len(self.labels)), key=lambda i: scores[i], reverse=True)
+        best, second = ranked[0], ranked[1]
+
+        keywords = list(dict.fromkeys(f for f in matched if not f.startswith("~") and "_" not in f))
+        confidence = (exps[best] - exps[second]) / total
+        reasoning = f"Classification locale (mots-clés: {', '.join(keywords[:5]) or '-'})."
+        if has_negation(tokenize(text)):
+            confidence = 0.0
+            reasoning = f"Classification locale incertaine: négation détectée (mots-clés: {', '.join(keywords[:5]) or '-'})."
+        elif len(keywords) < MIN_KEYWORDS:
+            confidence *= len(keywords) / MIN_KEYWORDS
+        return {
+            "mission": self.labels[best],
+            "confidence": round(confidence, 4),
+            "reasoning": reasoning,
+        }
+
+    async def train_from_submissions(self, db, limit: int = 5000) -> int:
+        """
+        Ré-entraîne le modèle sur les exemples d'amorçage + les valeurs texte
+        des soumissions (libellées par leur mission). Retourne le nb de soumissions utilisées.
+        """
+        examples = list(seed_examples())
+        cursor = (
+            db.submissions.find({}, {"mission": 1, "values": 1})
+            .sort("submitted_at", -1)
+            .limit(limit)
+        )
+        used = 0
+        async for doc in cursor:
+            text = _submission_text(doc.get("values") or {})
+            if text:
+                examples.append((text, doc.get("mission")))
+                used += 1
+        self.fit(examples)
+        return used
+
+
+def seed_examples() -> Iterable[Tuple[str, str]]:
+    for mission in MISSIONS:
+        mission_id = mission["id"]
+        yield f"{mission['label']} {mission['description']}", mission_id.value
+        for example in MISSION_SEED_EXAMPLES.get(mission_id, []):
+            yield example, mission_id.value
+
+
+def _submission_text(values: Dict[str, Any]) -> str:
+    # Les identités (nom, e-mail) n'apportent rien à la classification
+    parts = [
+        v for k, v in values.items()
+        if isinstance(v, str) and k not in ("name", "nom", "email")
+    ]
+    return " ".join(parts)
+
+
+local_classifier = LocalMissionClassifier()
+local_classifier.fit(seed_examples())
@@ -0,0 +1,275 @@
+"""
+Métriques au format texte Prometheus (sans dépendance externe) + en-tête Server-Timing.
+
+- `Counter` / `Histogram` avec labels, enregistrés dans `registry`
+- `registry.render()` produit le texte servi sur GET /metrics
+- `record_timing("llm" | "db" | "serialization", seconds)` alimente le Server-Timing de la requête courante
+- `TimedJSONResponse` (réponse par défaut de l'app) mesure le rendu JSON des réponses
+"""
+import time
+from bisect import bisect_left
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from fastapi.responses import JSONResponse
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        return self._values.get(key, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        # par labels: [compteurs par bucket..., somme, total]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        series = self._values.get(key)
+        if series is None:
+            series = self._values[key] = [0.0] * (len(self.buckets) + 2)
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[index] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self._values.items()):
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                labels = _format_labels(self.labelnames + ("le",), key + (repr(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames + ("le",), key + ("+Inf",))
+            lines.append(f"{self.name}_bucket{labels} {series[-1]}")
+            base = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{base} {series[-2]}")
+            lines.append(f"{self.name}_count{base} {series[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List = []
+        # Collecteurs appelés au scrape (ex: compteurs tenus ailleurs, comme le cache)
+        self._collectors: List[Callable[[], List[str]]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], List[str]]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+LLM_LATENCY = registry.register(Histogram(
+    "llm_request_duration_seconds", "Durée des appels LLM", ("task", "model"),
+))
+LLM_TIME_TO_FIRST_TOKEN = registry.register(Histogram(
+    "llm_time_to_first_token_seconds", "Délai avant le premier token (streaming)", ("task", "model"),
+))
+LLM_ERRORS = registry.register(Counter(
+    "llm_errors_total", "Appels LLM en erreur", ("task", "error"),
+))
+LLM_PROMPT_TOKENS = registry.register(Counter(
+    "llm_prompt_tokens_total", "Tokens de prompt (usage Groq)", ("task", "model"),
+))
+LLM_COMPLETION_TOKENS = registry.register(Counter(
+    "llm_completion_tokens_total", "Tokens générés (usage Groq)", ("task", "model"),
+))
+LLM_CALL_TOKENS = registry.register(Histogram(
+    "llm_call_tokens", "Tokens par appel LLM (kind: prompt envoyé, completion générée)", ("task", "kind"),
+    buckets=(16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192),
+))
+LLM_JSON_PARSE_FAILURES = registry.register(Counter(
+    "llm_json_parse_failures_total", "Réponses LLM non parsables (fallback utilisé)", ("task",),
+))
+MONGO_LATENCY = registry.register(Histogram(
+    "mongo_operation_duration_seconds", "Durée des opérations MongoDB", ("operation",),
+))
+WRITE_BUFFER_BATCH_SIZE = registry.register(Histogram(
+    "write_buffer_batch_size", "Soumissions écrites par insert_many (write-behind)",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500),
+))
+IDEMPOTENCY_REQUESTS = registry.register(Counter(
+    "idempotency_requests_total",
+    "Soumissions avec clé d'idempotence (executed, replayed, replayed_local, joined, mismatch, timeout)",
+    ("outcome",),
+))
+SUBMIT_VALIDATION_REJECTIONS = registry.register(Counter(
+    "submit_validation_rejections_total",
+    "Soumissions rejetées par la validation des champs, avant LLM et MongoDB",
+    ("mission",),
+))
+PREFETCH_REQUESTS = registry.register(Counter(
+    "fields_prefetch_total",
+    "Préchargement des champs après classify (started, hit, joined, wasted)",
+    ("outcome",),
+))
+LLM_ADMISSION_WAIT = registry.register(Histogram(
+    "llm_admission_wait_seconds", "Attente dans la file du scheduler LLM", ("task",),
+))
+LLM_SHED = registry.register(Counter(
+    "llm_shed_total", "Appels LLM refusés par le scheduler (fallback utilisé)", ("task", "reason"),
+))
+LLM_FALLBACKS = registry.register(Counter(
+    "llm_fallbacks_total", "Réponses de secours sans LLM (réponse marquée degraded)", ("task", "reason"),
+))
+LLM_SINGLEFLIGHT_CALLS = registry.register(Counter(
+    "llm_singleflight_calls_total",
+    "Appels LLM via single-flight (leader = appel réel, collapsed = requête fusionnée)",
+    ("namespace", "role"),
+))
+RATE_LIMIT_REJECTIONS = registry.register(Counter(
+    "rate_limit_rejections_total", "Requêtes rejetées par le rate limiter (429)", ("path",),
+))
+HTTP_LATENCY = registry.register(Histogram(
+    "http_request_duration_seconds", "Durée des requêtes HTTP", ("method", "handler", "status"),
+))
+HTTP_SERIALIZATION = registry.register(Histogram(
+    "http_response_serialization_seconds", "Durée du rendu JSON des réponses", ("handler",),
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+))
+
+
+# --- Server-Timing --------------------------------------------------------
+
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+
+def record_timing(kind: str, seconds: float) -> None:
+    """Ajoute `seconds` au poste `kind` (llm, db) de la requête en cours, s'il y en a une."""
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[kind] = timings.get(kind, 0.0) + seconds
+
+
+@asynccontextmanager
+async def timed_db(operation: str):
+    """Mesure une opération Mongo (histogramme + Server-Timing)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        MONGO_LATENCY.observe(elapsed, operation=operation)
+        record_timing("db", elapsed)
+
+
+class TimedJSONResponse(JSONResponse):
+    """JSONResponse dont le rendu est compté au poste `serialization` du Server-Timing."""
+
+    def render(self, content: Any) -> bytes:
+        start = time.perf_counter()
+        try:
+            return super().render(content)
+        finally:
+            record_timing("serialization", time.perf_counter() - start)
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI: durée des requêtes par endpoint et en-tête
+    `Server-Timing: llm;dur=..., db;dur=..., serialization;dur=..., app;dur=..., total;dur=...`
+    (`app` = tout le reste: validation, code applicatif).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings: Dict[str, float] = {}
+        token = _request_timings.set(timings)
+        start = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                total = time.perf_counter() - start
+                llm = timings.get("llm", 0.0)
+                db = timings.get("db", 0.0)
+                serialization = timings.get("serialization", 0.0)
+                app_time = max(0.0, total - llm - db - serialization)
+                header = (
+                    f"llm;dur={llm * 1000:.1f}, db;dur={db * 1000:.1f}, "
+                    f"serialization;dur={serialization * 1000:.1f}, "
+                    f"app;dur={app_time * 1000:.1f}, total;dur={total * 1000:.1f}"
+                )
+                message = dict(message)
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", header.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
+            handler = getattr(scope.get("route"), "name", "unmatched")
+            HTTP_LATENCY.observe(
+                time.perf_counter() - start,
+                method=scope.get("method", ""),
+                handler=handler,
+                status=str(status["code"]),
+            )
+            if "serialization" in timings:
+                HTTP_SERIALIZATION.observe(timings["serialization"], handler=handler)
@@ -0,0 +1,35 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+
+def encode_cursor(doc: Dict[str, Any]) -> str:
+    """Opaque cursor pointing at a submission: base64url of (submitted_at, _id)."""
+    raw = json.dumps({"t": doc["submitted_at"].isoformat(), "id": str(doc["_id"])})
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    """Inverse of `encode_cursor`. Raises ValueError on malformed cursors."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(data["t"]), ObjectId(data["id"])
+    except (ValueError, KeyError, TypeError, InvalidId) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def keyset_filter(cursor: str, older: bool) -> Dict[str, Any]:
+    """Mongo filter selecting submissions strictly older (or newer) than the cursor."""
+    submitted_at, object_id = decode_cursor(cursor)
+    op = "$lt" if older else "$gt"
+    return {
+        "$or": [
+            {"submitted_at": {op: submitted_at}},
+            {"submitted_at": submitted_at, "_id": {op: object_id}},
+        ]
+    }
@@ -0,0 +1,79 @@
+"""
+Préchargement spéculatif: dès que /api/classify connaît la mission, la génération des
+champs supplémentaires part en tâche de fond. Le résultat (ou la tâche en cours) reste
+dans un emplacement à durée de vie courte, repris par le /api/generate-fields qui suit.
+"""
+import asyncio
+import copy
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+from app.config import settings
+from app.services.metrics import PREFETCH_REQUESTS
+
+
+class PrefetchSlots:
+    def __init__(self, ttl: float, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # clé -> (tâche, expiration, déjà reprise ?)
+        self._slots: "OrderedDict[str, Tuple[asyncio.Task, float, bool]]" = OrderedDict()
+
+    def start(self, key: str, fn: Callable[[], Awaitable[Any]]) -> None:
+        """Lance `fn` en tâche de fond, sauf si un emplacement valide existe déjà pour la clé."""
+        now = time.monotonic()
+        self._expire(now)
+        if key in self._slots:
+            return
+        task = asyncio.create_task(fn())
+        task.add_done_callback(self._retrieve)
+        self._slots[key] = (task, now + self.ttl, False)
+        PREFETCH_REQUESTS.inc(outcome="started")
+        while len(self._slots) > self.max_entries:
+            self._evict(*self._slots.popitem(last=False))
+
+    async def take(self, key: str) -> Optional[Any]:
+        """Résultat préchargé pour la clé (en attendant la tâche si elle tourne encore), sinon None."""
+        self._expire(time.monotonic())
+        slot = self._slots.get(key)
+        if slot is None:
+            return None
+        task, expires_at, _ = slot
+        self._slots[key] = (task, expires_at, True)
+        PREFETCH_REQUESTS.inc(outcome="hit" if task.done() else "joined")
+        try:
+            result = await asyncio.shield(task)
+        except Exception:
+            return None
+        return copy.deepcopy(result)
+
+    async def stop(self) -> None:
+        tasks = [task for task, _, _ in self._slots.values() if not task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._slots.clear()
+
+    def _expire(self, now: float) -> None:
+        for key in [k for k, (_, expires_at, _) in self._slots.items() if expires_at <= now]:
+            self._evict(key, self._slots.pop(key))
+
+    @staticmethod
+    def _evict(key: str, slot: Tuple[asyncio.Task, float, bool]) -> None:
+        # Une tâche encore en cours n'est pas annulée: son résultat alimente le cache de réponses
+        _, _, taken = slot
+        if not taken:
+            # Préchargement jamais repris: appel LLM spéculatif perdu
+            PREFETCH_REQUESTS.inc(outcome="wasted")
+
+    @staticmethod
+    def _retrieve(task: asyncio.Task) -> None:
+        if not task.cancelled():
+            task.exception()
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+
+fields_prefetch = PrefetchSlots(ttl=settings.PREFETCH_FIELDS_TTL_SECONDS)
@@ -0,0 +1,141 @@
+"""
+Budget de tokens des appels LLM.
+
+- comptage local des tokens (approximation BPE: mots découpés par ~4 caractères, ponctuation)
+- compaction des `values` d'un formulaire (JSON compact, blancs repliés) et troncature à un budget
+- `max_tokens` choisi d'après les longueurs de complétion observées par tâche (percentile + marge),
+  au lieu d'un plafond fixe qui surréserve le quota de tokens du scheduler
+"""
+import json
+import math
+import re
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from app.config import settings
+from app.services.metrics import registry
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+TRUNCATION_MARK = "…"
+# Longueur minimale (caractères) d'une valeur tronquée avant de retirer des champs entiers
+MIN_VALUE_CHARS = 24
+# Nombre de complétions observées avant d'adapter max_tokens
+MIN_SAMPLES = 50
+MIN_MAX_TOKENS = 32
+
+
+def count_tokens(text: str) -> int:
+    """Nombre de tokens estimé localement (pas d'appel réseau, pas de tokenizer à charger)."""
+    return sum(
+        math.ceil(len(token) / 4) if token[0].isalnum() or token[0] == "_" else 1
+        for token in _TOKEN_RE.findall(text or "")
+    )
+
+
+def count_message_tokens(messages: List[Dict[str, str]]) -> int:
+    # ~4 tokens d'enveloppe par message (rôle, séparateurs)
+    return sum(count_tokens(m.get("content") or "") + 4 for m in messages)
+
+
+def truncate_text(text: str, budget: int) -> str:
+    """Coupe `text` (blancs repliés) pour qu'il tienne dans `budget` tokens."""
+    text = " ".join((text or "").split())
+    if count_tokens(text) <= budget:
+        return text
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count_tokens(text[:middle]) + 1 <= budget:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low].rstrip() + TRUNCATION_MARK
+
+
+def _compact(value: Any, max_chars: Optional[int]) -> Any:
+    if isinstance(value, str):
+        value = " ".join(value.split())
+        if max_chars is not None and len(value) > max_chars:
+            value = value[:max_chars].rstrip() + TRUNCATION_MARK
+        return value
+    if isinstance(value, list):
+        return [_compact(v, max_chars) for v in value]
+    if isinstance(value, dict):
+        return {k: _compact(v, max_chars) for k, v in value.items()}
+    return value
+
+
+def dump_values(values: Dict[str, Any]) -> str:
+    return json.dumps(values, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def compact_values(values: Dict[str, Any], budget: int) -> Dict[str, Any]:
+    """
+    Valeurs du formulaire réduites à `budget` tokens (JSON compact): champs vides retirés,
+    textes les plus longs tronqués d'abord, puis derniers champs retirés en dernier recours.
+    """
+    values = {k: v for k, v in (values or {}).items() if v not in (None, "", [], {})}
+    compacted = _compact(values, None)
+    if count_tokens(dump_values(compacted)) <= budget:
+        return compacted
+
+    # Plus grande longueur de valeur (en caractères) qui tient dans le budget
+    longest = max((len(v) for v in compacted.values() if isinstance(v, str)), default=0)
+    low, high = MIN_VALUE_CHARS, max(MIN_VALUE_CHARS, longest)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count_tokens(dump_values(_compact(values, middle))) <= budget:
+            low = middle
+        else:
+            high = middle - 1
+    compacted = _compact(values, low)
+
+    keys = list(compacted)
+    while keys and count_tokens(dump_values(compacted)) > budget:
+        del compacted[keys.pop()]
+    return compacted
+
+
+class CompletionStats:
+    """Longueurs de complétion récentes par tâche -> max_tokens adapté."""
+
+    def __init__(self, window: int, percentile: float, headroom: float):
+        self.window = window
+        self.percentile = percentile
+        self.headroom = headroom
+        self._samples: Dict[str, Deque[int]] = {}
+
+    def observe(self, task: str, completion_tokens: Optional[int], truncated: bool = False, max_tokens: int = 0) -> None:
+        if completion_tokens is None:
+            return
+        samples = self._samples.setdefault(task, deque(maxlen=self.window))
+        # Réponse coupée par max_tokens: la vraie longueur est inconnue, on pousse le percentile vers le haut
+        samples.append(max(completion_tokens, 2 * max_tokens) if truncated else completion_tokens)
+
+    def max_tokens(self, task: str, ceiling: int) -> int:
+        """max_tokens pour `task`: percentile observé x marge, jamais au-dessus du plafond de l'appel."""
+        samples = self._samples.get(task)
+        if not settings.LLM_ADAPTIVE_MAX_TOKENS or samples is None or len(samples) < MIN_SAMPLES:
+            return ceiling
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, math.ceil(self.percentile / 100 * len(ordered)) - 1)
+        return max(MIN_MAX_TOKENS, min(ceiling, math.ceil(ordered[index] * self.headroom)))
+
+    def prometheus_lines(self) -> List[str]:
+        lines = [
+            "# HELP llm_completion_tokens_percentile Percentile des tokens générés par tâche (fenêtre glissante)",
+            "# TYPE llm_completion_tokens_percentile gauge",
+        ]
+        for task, samples in sorted(self._samples.items()):
+            ordered = sorted(samples)
+            index = min(len(ordered) - 1, math.ceil(self.percentile / 100 * len(ordered)) - 1)
+            lines.append(f'llm_completion_tokens_percentile{{task="{task}"}} {ordered[index]}')
+        return lines
+
+
+completion_stats = CompletionStats(
+    window=settings.LLM_MAX_TOKENS_WINDOW,
+    percentile=settings.LLM_MAX_TOKENS_PERCENTILE,
+    headroom=settings.LLM_MAX_TOKENS_HEADROOM,
+)
+registry.register_collector(completion_stats.prometheus_lines)
@@ -0,0 +1,194 @@
+"""
+Cache sémantique en mémoire: retrouve une réponse LLM pour un prompt *proche*
+(paraphrase) d'un prompt déjà traité, là où le cache exact ne voit qu'une clé différente.
+
+- plongement CPU: n-grammes de caractères et bigrammes de mots hachés dans un vecteur NumPy normalisé
+- seuls les mots sans incidence sur le sens sont retirés (pronoms, articles, politesse), les
+  formulations équivalentes ("je souhaite", "j'aimerais", "je veux") ramenées à un même mot
+- jamais de match entre phrases qui diffèrent par une négation ou par leurs nombres
+- matrice bornée (une ligne par prompt), éviction de la ligne la moins récemment utilisée
+- recherche vectorisée: similarité cosinus = produit matrice x vecteur
+
+SEMANTIC_CACHE_THRESHOLD est calibré sur les paires de tests/test_semantic_cache.py.
+"""
+import copy
+import json
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.services.local_classifier import has_negation, words
+from app.services.metrics import registry
+
+NGRAM_SIZES = (3, 4, 5)
+# Poids des bigrammes de mots face aux n-grammes de caractères: "want to help" != "want help"
+BIGRAM_WEIGHT = 2.0
+
+# Mots sans incidence sur le sens de la demande
+FILLER_WORDS = frozenset({
+    # fr
+    "je", "j", "tu", "il", "elle", "on", "nous", "vous", "me", "m", "moi", "te", "t", "s", "c",
+    "le", "la", "les", "l", "un", "une", "des", "du", "ce", "ca", "cela",
+    "bonjour", "salut", "merci", "svp", "stp",
+    # en
+    "i", "d", "you", "we", "the", "a", "an", "would", "please", "hello", "hi", "hey", "thanks", "thank",
+})
+
+# Formulations équivalentes -> un même mot
+SYNONYMS = {
+    word: canonical
+    for canonical, variants in {
+        "vouloir": (
+            "veux", "veut", "voulons", "voudrais", "voudrait", "souhaite", "souhaiterais", "souhaitons",
+            "aimerais", "aimerait", "desire", "desirerais", "want", "wants", "wanna", "like", "wish",
+        ),
+        "etre": ("devenir", "deviens", "etre", "become", "be"),
+        "pouvoir": ("peux", "peut", "puis", "pourrais", "pourriez", "can", "could", "may"),
+        "information": ("info", "infos", "informations", "renseignement", "renseignements", "information"),
+    }.items()
+    for word in variants
+}
+
+
+def normalize(text: str) -> List[str]:
+    return [SYNONYMS.get(word, word) for word in words(text) if word not in FILLER_WORDS]
+
+
+def _add(vector: np.ndarray, feature: str, weight: float) -> None:
+    # crc32 (et non hash()) pour des vecteurs identiques d'un process à l'autre
+    h = zlib.crc32(feature.encode("utf-8"))
+    vector[h % len(vector)] += weight if h & 0x80000000 else -weight
+
+
+def embed(text: str, dim: int) -> np.ndarray:
+    """Vecteur (float32, norme 1) des n-grammes de caractères et bigrammes de mots du texte normalisé."""
+    vector = np.zeros(dim, dtype=np.float32)
+    tokens = normalize(text)
+    joined = f" {' '.join(tokens)} "
+    for n in NGRAM_SIZES:
+        for i in range(len(joined) - n + 1):
+            _add(vector, joined[i:i + n], 1.0)
+    for first, second in zip(tokens, tokens[1:]):
+        _add(vector, f"{first}_{second}", BIGRAM_WEIGHT)
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector /= norm
+    return vector
+
+
+def _guards(prompt: str) -> Dict[str, Any]:
+    """Partie du contexte tirée du prompt: négation et nombres doivent être identiques."""
+    tokens = words(prompt)
+    numbers: Tuple[str, ...] = tuple(sorted(t for t in tokens if t.isdigit()))
+    return {"negative": has_negation(tokens), "numbers": numbers}
+
+
+class SemanticCache:
+    def __init__(self, max_entries: int, dim: int, threshold: float, ttl: float):
+        self.max_entries = max_entries
+        self.dim = dim
+        self.threshold = threshold
+        self.ttl = ttl
+        self._vectors = np.zeros((max_entries, dim), dtype=np.float32)
+        # Contexte (namespace + langue, mission, modèle...) sous forme d'entier: pas de match croisé
+        self._contexts = np.zeros(max_entries, dtype=np.int64)
+        self._expires_at = np.zeros(max_entries, dtype=np.float64)
+        self._last_used = np.zeros(max_entries, dtype=np.float64)
+        self._values: List[Any] = [None] * max_entries
+        self._value_bytes = np.zeros(max_entries, dtype=np.int64)
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+
+    @staticmethod
+    def _context_id(namespace: str, context: Dict[str, Any]) -> int:
+        raw = json.dumps({"ns": namespace, **context}, sort_keys=True, default=str)
+        return zlib.crc32(raw.encode("utf-8"))
+
+    def get(self, namespace: str, prompt: str, **context: Any) -> Optional[Any]:
+        vector = embed(prompt, self.dim)
+        now = time.monotonic()
+        scores = self._vectors @ vector
+        context_id = self._context_id(namespace, {**context, **_guards(prompt)})
+        valid = (self._contexts == context_id) & (self._expires_at > now)
+        scores = np.where(valid, scores, -1.0)
+        index = int(np.argmax(scores))
+
+        if scores[index] < self.threshold:
+            self.misses[namespace] = self.misses.get(namespace, 0) + 1
+            return None
+        self.hits[namespace] = self.hits.get(namespace, 0) + 1
+        self._last_used[index] = now
+        return copy.deepcopy(self._values[index])
+
+    def set(self, namespace: str, prompt: str, value: Any, **context: Any) -> None:
+        now = time.monotonic()
+        # Ligne expirée (ou jamais utilisée) en priorité, sinon la moins récemment utilisée
+        free = np.flatnonzero(self._expires_at <= now)
+        index = int(free[0]) if free.size else int(np.argmin(self._last_used))
+        self._vectors[index] = embed(prompt, self.dim)
+        self._contexts[index] = self._context_id(namespace, {**context, **_guards(prompt)})
+        self._expires_at[index] = now + self.ttl
+        self._last_used[index] = now
+        self._values[index] = copy.deepcopy(value)
+        self._value_bytes[index] = len(json.dumps(value, default=str))
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self._expires_at > time.monotonic()))
+
+    def memory_bytes(self) -> int:
+        arrays = (
+            self._vectors.nbytes + self._contexts.nbytes + self._expires_at.nbytes
+            + self._last_used.nbytes + self._value_bytes.nbytes
+        )
+        # Réponses stockées: estimation par leur taille JSON
+        return arrays + int(self._value_bytes.sum())
+
+    def prometheus_lines(self) -> List[str]:
+        lines = [
+            "# HELP semantic_cache_hits_total Hits du cache sémantique (prompts proches)",
+            "# TYPE semantic_cache_hits_total counter",
+        ]
+        lines += [f'semantic_cache_hits_total{{namespace="{ns}"}} {n}' for ns, n in sorted(self.hits.items())]
+        lines += [
+            "# HELP semantic_cache_misses_total Misses du cache sémantique",
+            "# TYPE semantic_cache_misses_total counter",
+        ]
+        lines += [f'semantic_cache_misses_total{{namespace="{ns}"}} {n}' for ns, n in sorted(self.misses.items())]
+        lines += [
+            "# HELP semantic_cache_entries Entrées valides du cache sémantique",
+            "# TYPE semantic_cache_entries gauge",
+            f"semantic_cache_entries {len(self)}",
+            "# HELP semantic_cache_memory_bytes Mémoire utilisée par le cache sémantique (estimation)",
+            "# TYPE semantic_cache_memory_bytes gauge",
+            f"semantic_cache_memory_bytes {self.memory_bytes()}",
+        ]
+        return lines
+
+    def stats(self) -> Dict[str, Any]:
+        namespaces = set(self.hits) | set(self.misses)
+        return {
+            "threshold": self.threshold,
+            "size": len(self),
+            "max_entries": self.max_entries,
+            "memory_bytes": self.memory_bytes(),
+            "namespaces": {
+                ns: {
+                    "hits": self.hits.get(ns, 0),
+                    "misses": self.misses.get(ns, 0),
+                    "hit_rate": round(self.hits.get(ns, 0) / max(1, self.hits.get(ns, 0) + self.misses.get(ns, 0)), 3),
+                }
+                for ns in sorted(namespaces)
+            },
+        }
+
+
+semantic_cache = SemanticCache(
+    max_entries=settings.SEMANTIC_CACHE_MAX_ENTRIES,
+    dim=settings.SEMANTIC_CACHE_DIM,
+    threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+    ttl=settings.CACHE_TTL_SECONDS,
+)
+registry.register_collector(semantic_cache.prometheus_lines)
@@ -0,0 +1,52 @@
+import asyncio
+import copy
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from app.services.metrics import LLM_SINGLEFLIGHT_CALLS, record_timing
+
+
+class SingleFlight:
+    """
+    Fusionne les appels concurrents ayant la même clé: le premier lance la coroutine,
+    les suivants attendent son résultat au lieu de refaire l'appel.
+
+    L'appel tourne dans sa propre tâche, donc l'annulation d'un client (déconnexion)
+    n'annule pas le résultat attendu par les autres. L'attente d'un appelant fusionné est
+    comptée comme temps LLM de sa requête (le leader compte l'appel lui-même).
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        namespace = key.split(":", 1)[0]
+        task = self._inflight.get(key)
+        if task is None:
+            LLM_SINGLEFLIGHT_CALLS.inc(namespace=namespace, role="leader")
+            task = asyncio.create_task(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+            result = await asyncio.shield(task)
+        else:
+            LLM_SINGLEFLIGHT_CALLS.inc(namespace=namespace, role="collapsed")
+            start = time.perf_counter()
+            try:
+                result = await asyncio.shield(task)
+            finally:
+                record_timing("llm", time.perf_counter() - start)
+        # Chaque appelant reçoit sa propre copie du résultat partagé
+        return copy.deepcopy(result)
+
+    def in_flight(self) -> int:
+        return len(self._inflight)
+
+    def _done(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Marque l'exception comme lue si plus personne n'attend la tâche
+            task.exception()
+
+
+llm_flight = SingleFlight()
@@ -0,0 +1,11 @@
+import json
+from typing import Any, Optional
+
+
+def format_sse(data: Any, event: Optional[str] = None) -> str:
+    """Formate un message Server-Sent Events (data JSON sur une ligne)."""
+    message = ""
+    if event:
+        message += f"event: {event}\n"
+    message += f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+    return message
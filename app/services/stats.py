@@ -0,0 +1,233 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from pymongo import ReplaceOne, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from app.config import settings
+from app.services.metrics import timed_db
+
+STATS_COLLECTION = "submission_stats"
+# Verrous à part: la collection des compteurs ne contient que des compteurs
+LOCKS_COLLECTION = "submission_stats_locks"
+TOTALS_ID = "totals"
+REBUILD_LOCK_ID = "rebuild_lock"
+# Un verrou de reconstruction plus vieux que ça vient d'un worker arrêté en cours de route
+REBUILD_LOCK_TIMEOUT = timedelta(minutes=10)
+# Langues comptées à part; les autres (saisies par le client) sont regroupées sous "other"
+STATS_LANGUAGES = {l.strip().lower() for l in settings.STATS_LANGUAGES.split(",") if l.strip()}
+
+
+def _key(value: Optional[str]) -> str:
+    # Les clés de sous-documents Mongo ne peuvent contenir ni "." ni "$"
+    return str(value or "unknown").replace(".", "_").replace("$", "_")
+
+
+def _language_key(value: Optional[str]) -> str:
+    language = str(value or "").strip().lower()
+    return _key(language) if language in STATS_LANGUAGES else "other"
+
+
+def hour_bucket(when: datetime) -> datetime:
+    return when.replace(minute=0, second=0, microsecond=0)
+
+
+def day_bucket(when: datetime) -> datetime:
+    return when.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _stats_updates(docs: List[Dict[str, Any]], delta: int) -> List[UpdateOne]:
+    """Un UpdateOne par document de stats touché, les $inc des soumissions du lot additionnés."""
+    incs: Dict[str, Dict[str, int]] = {}
+    buckets: Dict[str, Dict[str, Any]] = {}
+    for doc in docs:
+        submitted_at = doc.get("submitted_at") or datetime.utcnow()
+        hour = hour_bucket(submitted_at)
+        day = day_bucket(submitted_at)
+        buckets.setdefault(f"hour:{hour:%Y-%m-%dT%H}", {"granularity": "hour", "bucket": hour})
+        buckets.setdefault(f"day:{day:%Y-%m-%d}", {"granularity": "day", "bucket": day})
+        for _id in (TOTALS_ID, f"hour:{hour:%Y-%m-%dT%H}", f"day:{day:%Y-%m-%d}"):
+            inc = incs.setdefault(_id, {})
+            for field in (
+                "total",
+                f"by_mission.{_key(doc.get('mission'))}",
+                f"by_language.{_language_key(doc.get('language'))}",
+            ):
+                inc[field] = inc.get(field, 0) + delta
+
+    updates = []
+    for _id, inc in incs.items():
+        update: Dict[str, Any] = {"$inc": inc}
+        if _id in buckets:
+            update["$setOnInsert"] = buckets[_id]
+        updates.append(UpdateOne({"_id": _id}, update, upsert=True))
+    return updates
+
+
+async def record_submission(db, doc: Dict[str, Any], delta: int = 1) -> None:
+    """
+    Met à jour les compteurs (total, par mission, par langue, par heure / jour)
+    pour une soumission insérée (delta=1) ou supprimée (delta=-1).
+    """
+    await record_submissions(db, [doc], delta)
+
+
+async def record_submissions(db, docs: List[Dict[str, Any]], delta: int = 1) -> None:
+    """Comme `record_submission` pour un lot de soumissions, en un seul bulk_write."""
+    try:
+        async with timed_db("stats_bulk_write"):
+            await db[STATS_COLLECTION].bulk_write(_stats_updates(docs, delta), ordered=False)
+    except Exception as e:
+        # Les compteurs se réparent avec `rebuild_stats`, on ne bloque pas la soumission
+        print(f"⚠️ Failed to update submission stats: {e}")
+
+
+async def get_totals(db) -> Dict[str, Any]:
+    async with timed_db("stats_find_one"):
+        doc = await db[STATS_COLLECTION].find_one({"_id": TOTALS_ID}) or {}
+    return {
+        "total_submissions": doc.get("total", 0),
+        "by_mission": doc.get("by_mission", {}),
+        "by_language": doc.get("by_language", {}),
+    }
+
+
+async def get_timeseries(
+    db,
+    granularity: str,
+    since: datetime,
+    until: datetime,
+    mission: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    # Le seau qui contient `since` est inclus (ex: since=10:30 -> seau de 10:00)
+    since = hour_bucket(since) if granularity == "hour" else day_bucket(since)
+    cursor = db[STATS_COLLECTION].find(
+        {"granularity": granularity, "bucket": {"$gte": since, "$lte": until}},
+        {"_id": 0, "bucket": 1, "total": 1, "by_mission": 1},
+    ).sort("bucket", 1)
+
+    async with timed_db("stats_find"):
+        docs = await cursor.to_list(length=None)
+
+    return [
+        {
+            "bucket": doc["bucket"].isoformat(),
+            "total": doc.get("by_mission", {}).get(_key(mission), 0) if mission else doc.get("total", 0),
+            "by_mission": doc.get("by_mission", {}),
+        }
+        for doc in docs
+    ]
+
+
+async def rebuild_stats(db) -> Dict[str, Any]:
+    """
+    Recalcule tous les compteurs depuis la collection `submissions` (réconciliation).
+    Chaque document de stats est remplacé (upsert) sans vider la collection, donc sans
+    fenêtre où les compteurs manquent ni conflit avec les upserts de `record_submission`.
+    Les soumissions arrivant pendant le recalcul peuvent être comptées en double ou manquées:
+    à lancer en période calme.
+    """
+    started_at = datetime.utcnow()
+    pipeline = [
+        {
+            "$group": {
+                "_id": {
+                    "hour": {"$dateToString": {"format": "%Y-%m-%dT%H", "date": "$submitted_at"}},
+                    "mission": "$mission",
+                    "language": "$language",
+                },
+                "count": {"$sum": 1},
+            }
+        }
+    ]
+
+    docs: Dict[str, Dict[str, Any]] = {}
+
+    def add(doc_id: str, extra: Dict[str, Any], mission: str, language: str, count: int) -> None:
+        doc = docs.setdefault(doc_id, {"_id": doc_id, **extra, "total": 0, "by_mission": {}, "by_language": {}})
+        doc["total"] += count
+        doc["by_mission"][mission] = doc["by_mission"].get(mission, 0) + count
+        doc["by_language"][language] = doc["by_language"].get(language, 0) + count
+
+    async for group in db.submissions.aggregate(pipeline, allowDiskUse=True):
+        key = group["_id"]
+        mission = _key(key.get("mission"))
+        language = _language_key(key.get("language"))
+        count = group["count"]
+        add(TOTALS_ID, {}, mission, language, count)
+        if key.get("hour"):
+            hour = datetime.strptime(key["hour"], "%Y-%m-%dT%H")
+            day = day_bucket(hour)
+            add(f"hour:{hour:%Y-%m-%dT%H}", {"granularity": "hour", "bucket": hour}, mission, language, count)
+            add(f"day:{day:%Y-%m-%d}", {"granularity": "day", "bucket": day}, mission, language, count)
+
+    collection = db[STATS_COLLECTION]
+    if docs:
+        async with timed_db("stats_bulk_write"):
+            await collection.bulk_write(
+                [ReplaceOne({"_id": _id}, doc, upsert=True) for _id, doc in docs.items()],
+                ordered=False,
+            )
+    # Seaux sans aucune soumission (supprimées), hors seaux ouverts depuis le début du recalcul
+    async with timed_db("stats_delete_many"):
+        await collection.delete_many({
+            "_id": {"$nin": list(docs)},
+            "bucket": {"$lt": hour_bucket(started_at)},
+        })
+
+    totals = docs.get(TOTALS_ID, {})
+    return {
+        "total_submissions": totals.get("total", 0),
+        "buckets": len(docs) - (1 if totals else 0),
+    }
+
+
+async def ensure_stats(db) -> bool:
+    """
+    Reconstruit les compteurs si le document des totaux manque alors que des soumissions
+    existent (base antérieure aux compteurs). Un seul worker s'en charge. Retourne True si reconstruits.
+    """
+    collection = db[STATS_COLLECTION]
+    if await collection.find_one({"_id": TOTALS_ID}, {"_id": 1}) is not None:
+        return False
+    if await db.submissions.find_one({}, {"_id": 1}) is None:
+        return False
+
+    locks = db[LOCKS_COLLECTION]
+    now = datetime.utcnow()
+    try:
+        await locks.insert_one({"_id": REBUILD_LOCK_ID, "created_at": now})
+    except DuplicateKeyError:
+        # Reconstruction en cours dans un autre worker, sauf verrou abandonné
+        stale = await locks.delete_one({"_id": REBUILD_LOCK_ID, "created_at": {"$lt": now - REBUILD_LOCK_TIMEOUT}})
+        if not stale.deleted_count:
+            return False
+        await locks.insert_one({"_id": REBUILD_LOCK_ID, "created_at": now})
+
+    try:
+        result = await rebuild_stats(db)
+    finally:
+        await locks.delete_one({"_id": REBUILD_LOCK_ID, "created_at": now})
+    print(f"📊 Stats rebuilt at startup: {result}")
+    return True
+
+
+def default_since(granularity: str, until: datetime) -> datetime:
+    return until - (timedelta(hours=24) if granularity == "hour" else timedelta(days=30))
+
+
+if __name__ == "__main__":
+    # python -m app.services.stats  -> reconstruit les compteurs depuis les soumissions
+    import asyncio
+
+    from app.database import connect_to_mongo, close_mongo_connection, get_database
+
+    async def _main():
+        await connect_to_mongo()
+        try:
+            result = await rebuild_stats(get_database())
+            print(f"📊 Stats rebuilt: {result}")
+        finally:
+            await close_mongo_connection()
+
+    asyncio.run(_main())
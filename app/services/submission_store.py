@@ -0,0 +1,89 @@
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+from app.config import settings
+from app.models import FormSubmission
+from app.services.metrics import timed_db
+from app.services.stats import record_submission
+from app.services.write_buffer import submission_buffer
+
+# Propriétaire des confirmations 'pending' générées par ce process (bail renouvelé à la reprise)
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def _confirmation_lease() -> Dict[str, Any]:
+    return {
+        "confirmation_owner": WORKER_ID,
+        "confirmation_lease_until": datetime.utcnow() + timedelta(seconds=settings.CONFIRMATION_LEASE_SECONDS),
+    }
+
+
+async def insert_submission(db, submission: FormSubmission) -> ObjectId:
+    """Insert a submission document, update the stats counters and return its id."""
+    doc = submission.dict(by_alias=True, exclude={"id"})
+    if doc.get("confirmation_status") == "pending":
+        # Confirmation générée par ce worker: les autres ne la reprennent qu'à expiration du bail
+        doc.update(_confirmation_lease())
+    if settings.WRITE_BUFFER_ENABLED:
+        # Groupée avec les soumissions concurrentes (insert_many), stats comprises
+        async with timed_db("buffered_insert"):
+            return await submission_buffer.insert(db, doc)
+
+    async with timed_db("insert_one"):
+        result = await db.submissions.insert_one(doc)
+    print(f"✅ Form submission saved to MongoDB with ID: {result.inserted_id}")
+    await record_submission(db, doc)
+    return result.inserted_id
+
+
+async def delete_submission(db, submission_id: ObjectId) -> bool:
+    """Delete a submission and decrement the stats counters. Returns False if not found."""
+    async with timed_db("find_one_and_delete"):
+        doc = await db.submissions.find_one_and_delete(
+            {"_id": submission_id},
+            projection={"mission": 1, "language": 1, "submitted_at": 1},
+        )
+    if doc is None:
+        return False
+    await record_submission(db, doc, delta=-1)
+    return True
+
+
+async def claim_pending_confirmation(db) -> Optional[Dict[str, Any]]:
+    """
+    Prend atomiquement une soumission 'pending' sans bail valide (worker arrêté pendant
+    la génération) et la marque comme appartenant à ce worker. None s'il n'y en a plus.
+    """
+    now = datetime.utcnow()
+    async with timed_db("find_one_and_update"):
+        return await db.submissions.find_one_and_update(
+            {
+                "confirmation_status": "pending",
+                "$or": [{"confirmation_lease_until": None}, {"confirmation_lease_until": {"$lte": now}}],
+            },
+            {"$set": _confirmation_lease()},
+            projection={"mission": 1, "values": 1, "username": 1, "language": 1},
+            sort=[("submitted_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+
+async def update_confirmation(db, submission_id: ObjectId, message: str, status: str) -> None:
+    """
+    Store the generated confirmation message of a submission. Ignored if another
+    worker has taken over the confirmation (lease expired), so its message is kept.
+    """
+    async with timed_db("update_one"):
+        await db.submissions.update_one(
+            {"_id": submission_id, "confirmation_owner": {"$in": [WORKER_ID, None]}},
+            {
+                "$set": {"confirmation_message": message, "confirmation_status": status},
+                "$unset": {"confirmation_owner": "", "confirmation_lease_until": ""},
+            },
+        )
@@ -0,0 +1,157 @@
+"""
+Validation des soumissions avant tout appel LLM ou écriture MongoDB.
+
+Les champs de base de chaque mission (BASE_FIELDS_BY_MISSION) sont compilés une seule fois
+en une suite de vérifications (obligatoire, format e-mail, nombre et bornes, options de
+select, case à cocher, longueur max). Les champs supplémentaires générés pour la session
+(`extra_fields` de la soumission) sont compilés de la même façon, en cache par définition.
+Les erreurs sont rendues champ par champ, au format des 422 de FastAPI.
+"""
+import math
+import re
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.constants.base_fields import BASE_FIELDS_BY_MISSION
+from app.constants.missions import MissionEnum
+from app.schemas.generate import FormField
+
+EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s.]+(\.[^@\s.]+)+$")
+# Longueur max (caractères) des valeurs texte, par type de champ
+MAX_LENGTH = {"text": 500, "email": 254, "textarea": 5000, "select": 500}
+CHECKBOX_VALUES = {"true", "false", "on", "off", "1", "0"}
+UNCHECKED_VALUES = {"false", "off", "0"}
+
+# (name, type, required, options, min, max): définition hashable d'un champ
+FieldSpec = Tuple[str, str, bool, Optional[Tuple[str, ...]], Optional[float], Optional[float]]
+# valeur -> None si valide, sinon (type d'erreur, message)
+Check = Callable[[Any], Optional[Tuple[str, str]]]
+Validator = Tuple[Tuple[str, str, bool, Check], ...]
+
+
+def _spec(field: Dict[str, Any]) -> FieldSpec:
+    options = field.get("options")
+    return (
+        field["name"],
+        field.get("type") or "text",
+        bool(field.get("required")),
+        tuple(str(o) for o in options) if options else None,
+        field.get("min"),
+        field.get("max"),
+    )
+
+
+def _is_empty(value: Any, field_type: str) -> bool:
+    if value is None:
+        return True
+    if field_type == "checkbox":
+        # Case obligatoire non cochée (consentement...): équivaut à une valeur manquante
+        if value is False or (isinstance(value, str) and value.strip().lower() in UNCHECKED_VALUES):
+            return True
+    if isinstance(value, str):
+        return not value.strip()
+    return isinstance(value, (list, dict)) and not value
+
+
+def _text_check(max_length: int) -> Check:
+    def check(value: Any) -> Optional[Tuple[str, str]]:
+        if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+            return "invalid_type", "Expected a text value."
+        if len(str(value)) > max_length:
+            return "too_long", f"At most {max_length} characters."
+        return None
+    return check
+
+
+def _email_check(value: Any) -> Optional[Tuple[str, str]]:
+    if not isinstance(value, str) or len(value) > MAX_LENGTH["email"] or not EMAIL_RE.match(value.strip()):
+        return "invalid_email", "Invalid email address."
+    return None
+
+
+def _number_check(minimum: Optional[float], maximum: Optional[float]) -> Check:
+    def check(value: Any) -> Optional[Tuple[str, str]]:
+        if isinstance(value, bool):
+            return "invalid_number", "Expected a number."
+        try:
+            number = float(value.strip().replace(",", ".")) if isinstance(value, str) else float(value)
+        except (TypeError, ValueError):
+            return "invalid_number", "Expected a number."
+        if not math.isfinite(number):
+            return "invalid_number", "Expected a number."
+        if minimum is not None and number < minimum:
+            return "out_of_range", f"Must be greater than or equal to {minimum:g}."
+        if maximum is not None and number > maximum:
+            return "out_of_range", f"Must be less than or equal to {maximum:g}."
+        return None
+    return check
+
+
+def _select_check(options: Tuple[str, ...]) -> Check:
+    allowed = frozenset(options)
+    message = "Must be one of: " + ", ".join(options) + "."
+
+    def check(value: Any) -> Optional[Tuple[str, str]]:
+        if isinstance(value, (list, dict)) or str(value) not in allowed:
+            return "invalid_option", message
+        return None
+    return check
+
+
+def _checkbox_check(value: Any) -> Optional[Tuple[str, str]]:
+    if isinstance(value, bool) or (isinstance(value, str) and value.strip().lower() in CHECKBOX_VALUES):
+        return None
+    return "invalid_boolean", "Expected true or false."
+
+
+def _compile_field(spec: FieldSpec) -> Tuple[str, str, bool, Check]:
+    name, field_type, required, options, minimum, maximum = spec
+    if field_type == "email":
+        check = _email_check
+    elif field_type == "number":
+        check = _number_check(minimum, maximum)
+    elif field_type == "select" and options:
+        check = _select_check(options)
+    elif field_type == "checkbox":
+        check = _checkbox_check
+    else:
+        check = _text_check(MAX_LENGTH.get(field_type, MAX_LENGTH["text"]))
+    return name, field_type, required, check
+
+
+@lru_cache(maxsize=None)
+def _base_specs(mission: MissionEnum) -> Tuple[FieldSpec, ...]:
+    return tuple(_spec(field) for field in BASE_FIELDS_BY_MISSION.get(mission, []))
+
+
+@lru_cache(maxsize=1024)
+def compile_validator(mission: MissionEnum, extra_specs: Tuple[FieldSpec, ...] = ()) -> Validator:
+    """Vérifications compilées d'une mission (+ champs supplémentaires de la session)."""
+    base = _base_specs(mission)
+    names = {spec[0] for spec in base}
+    # Un champ supplémentaire ne remplace jamais un champ de base du même nom
+    extras = tuple(spec for spec in extra_specs if spec[0] not in names)
+    return tuple(_compile_field(spec) for spec in base + extras)
+
+
+def validate_submission(
+    mission: MissionEnum,
+    values: Dict[str, Any],
+    extra_fields: Optional[List[FormField]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Erreurs de `values` par champ (liste vide si la soumission est valide).
+    Les clés absentes du schéma sont acceptées telles quelles.
+    """
+    extra_specs = tuple(_spec(field.dict()) for field in extra_fields or [])
+    errors = []
+    for name, field_type, required, check in compile_validator(mission, extra_specs):
+        value = values.get(name)
+        if _is_empty(value, field_type):
+            if required:
+                errors.append({"loc": ["body", "values", name], "msg": "Field required.", "type": "missing"})
+            continue
+        error = check(value)
+        if error is not None:
+            errors.append({"loc": ["body", "values", name], "msg": error[1], "type": error[0]})
+    return errors
@@ -0,0 +1,103 @@
+"""
+Écriture différée (write-behind) des soumissions: les insertions concurrentes sont
+regroupées en un seul `insert_many`, envoyé dès que le lot est plein ou que le plus
+ancien document a attendu WRITE_BUFFER_MAX_DELAY_MS.
+
+Chaque appelant attend l'acquittement de son lot: l'id retourné est celui du document
+réellement écrit (généré côté client, comme le fait le driver). `stop()` vide le buffer
+avant la fermeture de la connexion Mongo.
+"""
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+
+from app.config import settings
+from app.services.metrics import MONGO_LATENCY, WRITE_BUFFER_BATCH_SIZE
+from app.services.stats import record_submissions
+
+Pending = Tuple[Dict[str, Any], asyncio.Future]
+
+
+class SubmissionWriteBuffer:
+    def __init__(self, max_batch: int, max_delay: float):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._db = None
+        self._pending: List[Pending] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushes: set = set()
+        self._closed = False
+
+    async def insert(self, db, doc: Dict[str, Any]) -> ObjectId:
+        """Ajoute le document au lot courant et attend son écriture. Retourne son `_id`."""
+        if self._closed:
+            raise RuntimeError("Submission write buffer is closed")
+        doc.setdefault("_id", ObjectId())
+        future = asyncio.get_running_loop().create_future()
+        self._db = db
+        self._pending.append((doc, future))
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_delay, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = asyncio.create_task(self._write(self._db, batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _write(self, db, batch: List[Pending]) -> None:
+        docs = [doc for doc, _ in batch]
+        failed: Dict[int, Exception] = {}
+        start = time.perf_counter()
+        try:
+            # ordered=False: un document invalide n'empêche pas l'écriture des autres
+            await db.submissions.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                failed[error["index"]] = RuntimeError(error.get("errmsg", "Write error"))
+        except Exception as e:
+            failed = {i: e for i in range(len(batch))}
+        finally:
+            MONGO_LATENCY.observe(time.perf_counter() - start, operation="insert_many")
+            WRITE_BUFFER_BATCH_SIZE.observe(len(batch))
+
+        written = [doc for i, doc in enumerate(docs) if i not in failed]
+        if written:
+            print(f"✅ {len(written)} form submissions saved to MongoDB (batched)")
+            await record_submissions(db, written)
+
+        for i, (doc, future) in enumerate(batch):
+            if future.done():
+                continue
+            if i in failed:
+                future.set_exception(failed[i])
+            else:
+                future.set_result(doc["_id"])
+
+    async def stop(self) -> None:
+        """Écrit le lot en cours et attend les écritures en vol (arrêt propre)."""
+        self._closed = True
+        self._flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    def queued(self) -> int:
+        return len(self._pending)
+
+
+submission_buffer = SubmissionWriteBuffer(
+    max_batch=settings.WRITE_BUFFER_MAX_BATCH,
+    max_delay=settings.WRITE_BUFFER_MAX_DELAY_MS / 1000,
+)
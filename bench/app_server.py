@@ -0,0 +1,54 @@
+"""
+Lance la vraie app (`app.main:app`) pour les benchmarks, avec:
+- le rate limiting désactivé (sinon on mesure slowapi, pas l'app),
+- une sonde de latence de la boucle d'événements exposée sur GET /__bench/loop-lag.
+
+    GROQ_BASE_URL=http://127.0.0.1:8100 python -m bench.app_server --port 8000
+"""
+import argparse
+import asyncio
+import time
+from typing import List, Tuple
+
+import uvicorn
+
+from app.main import app
+from app.middleware.rate_limit import limiter
+
+PROBE_INTERVAL = 0.01
+
+# (timestamp wall-clock, retard en secondes)
+_lag_samples: List[Tuple[float, float]] = []
+
+
+async def _probe_loop_lag():
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lag = loop.time() - start - PROBE_INTERVAL
+        _lag_samples.append((time.time(), max(0.0, lag)))
+
+
+@app.on_event("startup")
+async def _start_probe():
+    app.state.lag_probe = asyncio.create_task(_probe_loop_lag())
+
+
+@app.get("/__bench/loop-lag", include_in_schema=False)
+def loop_lag(since: float = 0.0):
+    return {"interval": PROBE_INTERVAL, "samples": [s for s in _lag_samples if s[0] >= since]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    limiter.enabled = False
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Faux serveur Groq (API compatible OpenAI) pour les benchmarks.
+
+    python -m bench.fake_groq --port 8100 --latency-ms 300 --tokens-per-sec 250 --error-rate 0.01
+
+Les réponses dépendent du prompt système (classification, champs, formulaire combiné,
+confirmation) pour que l'app suive ses chemins normaux de parsing.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+class FakeGroqConfig:
+    latency_ms: float = 300.0
+    tokens_per_sec: float = 250.0
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+
+
+config = FakeGroqConfig()
+app = FastAPI(title="Fake Groq")
+
+_MISSIONS = ["contact", "donation", "volunteer", "information"]
+
+
+def _reply_for(messages) -> str:
+    system = messages[0]["content"] if messages else ""
+    mission = random.choice(_MISSIONS)
+    fields = [
+        {"name": "preferred_contact", "label": "Moyen de contact préféré", "type": "select",
+         "required": False, "options": ["E-mail", "Téléphone"]},
+        {"name": "how_did_you_hear", "label": "Comment nous avez-vous connus ?", "type": "text",
+         "required": False},
+    ]
+    if "traitement par lot" in system:
+        ids = [item["id"] for item in json.loads(messages[-1]["content"])]
+        if "classificateur" in system:
+            return json.dumps({"results": [
+                {"id": i, "mission": random.choice(_MISSIONS), "confidence": 0.9, "reasoning": "benchmark"}
+                for i in ids
+            ]})
+        return json.dumps({"results": [{"id": i, "fields": fields} for i in ids]})
+    if "assistant d'un formulaire" in system:
+        return json.dumps({"mission": mission, "confidence": 0.9, "reasoning": "benchmark", "fields": fields})
+    if "classificateur" in system:
+        return json.dumps({"mission": mission, "confidence": 0.9, "reasoning": "benchmark"})
+    if "générateur de champs" in system:
+        return json.dumps({"fields": fields})
+    if "MODÈLES de messages" in system:
+        return json.dumps({"templates": [
+            f"Salutations {{username}} ! Ta quête n°{i} a bien été enregistrée par Axolotl. "
+            "Reste connecté au Nexus pendant toute l'année {year} !"
+            for i in range(1, 6)
+        ]})
+    return (
+        "Salutations, voyageur du Nexus ! Ta quête a bien été enregistrée par Axolotl. "
+        "Ton action renforce le Nexus pour toute l'année. Reste connecté pour suivre la suite de l'aventure !"
+    )
+
+
+def _count_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _usage(messages, content: str):
+    prompt_tokens = sum(_count_tokens(m.get("content", "")) for m in messages)
+    completion_tokens = _count_tokens(content)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+@app.post("/openai/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    messages = body.get("messages", [])
+    model = body.get("model", "fake")
+
+    await asyncio.sleep(config.latency_ms / 1000.0)
+
+    roll = random.random()
+    if roll < config.rate_limit_rate:
+        return JSONResponse({"error": {"message": "Rate limit reached", "type": "rate_limit"}},
+                            status_code=429, headers={"retry-after": "1"})
+    if roll < config.rate_limit_rate + config.error_rate:
+        return JSONResponse({"error": {"message": "Injected failure", "type": "server_error"}},
+                            status_code=500)
+
+    content = _reply_for(messages)
+    max_tokens = body.get("max_tokens") or 512
+    content = content[: max_tokens * 4]
+    created = int(time.time())
+
+    if body.get("stream"):
+        async def chunks():
+            step = 4  # ~1 token
+            delay = step / 4 / config.tokens_per_sec if config.tokens_per_sec > 0 else 0
+            for i in range(0, len(content), step):
+                chunk = {
+                    "id": "fake", "object": "chat.completion.chunk", "created": created, "model": model,
+                    "choices": [{"index": 0, "delta": {"content": content[i:i + step]}, "finish_reason": None}],
+                }
+                yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+                if delay:
+                    await asyncio.sleep(delay)
+            final = {
+                "id": "fake", "object": "chat.completion.chunk", "created": created, "model": model,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                "x_groq": {"usage": _usage(messages, content)},
+            }
+            yield f"data: {json.dumps(final)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+    if config.tokens_per_sec > 0:
+        await asyncio.sleep(_count_tokens(content) / config.tokens_per_sec)
+
+    return {
+        "id": "fake",
+        "object": "chat.completion",
+        "created": created,
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": _usage(messages, content),
+    }
+
+
+@app.get("/health")
+def health():
+    return {"status": "ok"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="Délai avant le premier token")
+    parser.add_argument("--tokens-per-sec", type=float, default=250.0, help="Débit de génération (0 = instantané)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Proportion de réponses 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Proportion de réponses 429")
+    args = parser.parse_args()
+
+    config.latency_ms = args.latency_ms
+    config.tokens_per_sec = args.tokens_per_sec
+    config.error_rate = args.error_rate
+    config.rate_limit_rate = args.rate_limit_rate
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
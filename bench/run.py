@@ -0,0 +1,350 @@
+"""
+Benchmark de charge de l'API contre un faux serveur Groq et un MongoDB local.
+
+    python -m bench.run --duration 30 --concurrency 50 \
+        --mix classify=4,generate=3,form=0,submit=2,submissions=1 \
+        --latency-ms 300 --tokens-per-sec 250 --error-rate 0.01 \
+        --out bench_output.json
+
+Démarre `bench.fake_groq` et `bench.app_server` dans des sous-process, envoie un
+mélange pondéré de requêtes pendant `--duration` secondes puis écrit, par endpoint:
+nb de requêtes, erreurs, RPS, latences p50/p95/p99 et retard de la boucle d'événements
+de l'app pendant les requêtes.
+"""
+import argparse
+import asyncio
+import bisect
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+PROMPTS = [
+    ("je veux faire un don", "fr"),
+    ("Je souhaite faire un don mensuel de 20 euros", "fr"),
+    ("I want to volunteer", "en"),
+    ("I'm a developer and want to help on weekends", "en"),
+    ("je souhaite devenir bénévole", "fr"),
+    ("j'aimerais être bénévole pour la Nuit de l'Info", "fr"),
+    ("Bonjour, j'ai une question sur votre association", "fr"),
+    ("How can I get in touch with the team?", "en"),
+    ("Je voudrais des informations sur vos projets", "fr"),
+    ("Where can I find details about the project?", "en"),
+    ("Est-ce que vous acceptez les dons en nature ?", "fr"),
+    ("Je peux aider à organiser des ateliers le samedi", "fr"),
+]
+
+SUBMIT_VALUES = {
+    "contact": {"name": "Ada Lovelace", "email": "ada@example.com", "message": "Bonjour, une question sur le projet."},
+    "donation": {"name": "Alan Turing", "email": "alan@example.com", "amount": 50, "recurrence": "Mensuel"},
+    "volunteer": {"name": "Grace Hopper", "email": "grace@example.com", "skills": "Python, animation d'ateliers",
+                  "availability": "Week-ends"},
+    "information": {"name": "Linus", "email": "linus@example.com", "topic": "Projets 2025",
+                    "message": "Quels sont vos projets cette année ?"},
+}
+
+DEFAULT_MIX = "classify=4,generate=3,submit=2,submissions=1"
+
+
+@dataclass
+class Sample:
+    endpoint: str
+    start: float
+    end: float
+    ok: bool
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    unknown = set(weights) - set(REQUESTS)
+    if unknown:
+        raise SystemExit(f"Unknown endpoints in --mix: {', '.join(sorted(unknown))}")
+    return {k: v for k, v in weights.items() if v > 0}
+
+
+def _prompt(unique: bool) -> Tuple[str, str]:
+    prompt, language = random.choice(PROMPTS)
+    if unique:
+        prompt = f"{prompt} (#{random.getrandbits(32):08x})"
+    return prompt, language
+
+
+async def req_classify(client: httpx.AsyncClient, unique: bool) -> httpx.Response:
+    prompt, language = _prompt(unique)
+    return await client.post("/api/classify", json={"prompt": prompt, "language": language})
+
+
+async def req_generate(client: httpx.AsyncClient, unique: bool) -> httpx.Response:
+    prompt, language = _prompt(unique)
+    mission = random.choice(list(SUBMIT_VALUES))
+    return await client.post(
+        "/api/generate-fields", json={"mission": mission, "prompt": prompt, "language": language}
+    )
+
+
+async def req_form(client: httpx.AsyncClient, unique: bool) -> httpx.Response:
+    prompt, language = _prompt(unique)
+    return await client.post("/api/form", json={"prompt": prompt, "language": language})
+
+
+async def req_submit(client: httpx.AsyncClient, unique: bool) -> httpx.Response:
+    mission = random.choice(list(SUBMIT_VALUES))
+    values = dict(SUBMIT_VALUES[mission])
+    # Clé unique par requête: chaque submit est une vraie soumission, jamais un rejeu idempotent
+    return await client.post(
+        "/api/submit",
+        json={"mission": mission, "values": values, "username": values["name"], "language": "fr"},
+        headers={"Idempotency-Key": uuid.uuid4().hex},
+    )
+
+
+async def req_submissions(client: httpx.AsyncClient, unique: bool) -> httpx.Response:
+    params = {"limit": 50}
+    if random.random() < 0.3:
+        params["mission"] = random.choice(list(SUBMIT_VALUES))
+    return await client.get("/api/submissions", params=params)
+
+
+REQUESTS = {
+    "classify": req_classify,
+    "generate": req_generate,
+    "form": req_form,
+    "submit": req_submit,
+    "submissions": req_submissions,
+}
+
+
+async def drive(base_url: str, mix: Dict[str, float], concurrency: int, duration: float,
+                unique: bool, timeout: float) -> List[Sample]:
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    samples: List[Sample] = []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        deadline = time.time() + duration
+
+        async def worker():
+            while time.time() < deadline:
+                name = random.choices(names, weights)[0]
+                start = time.time()
+                try:
+                    response = await REQUESTS[name](client, unique)
+                    ok = response.status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                samples.append(Sample(name, start, time.time(), ok))
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    values = sorted(values)
+    return {
+        "p50": round(percentile(values, 50), 3),
+        "p95": round(percentile(values, 95), 3),
+        "p99": round(percentile(values, 99), 3),
+        "max": round(values[-1], 3) if values else 0.0,
+        "mean": round(sum(values) / len(values), 3) if values else 0.0,
+    }
+
+
+def window_lag(lag_times: List[float], lag_values: List[float], start: float, end: float) -> Optional[float]:
+    """Pire retard de boucle observé pendant [start, end] (ou l'échantillon suivant)."""
+    lo = bisect.bisect_left(lag_times, start)
+    hi = bisect.bisect_right(lag_times, end)
+    if lo < hi:
+        return max(lag_values[lo:hi])
+    if lo < len(lag_values):
+        return lag_values[lo]
+    return None
+
+
+def build_report(samples: List[Sample], lag_samples: List[Tuple[float, float]],
+                 duration: float, params: Dict) -> Dict:
+    lag_samples = sorted(lag_samples)
+    lag_times = [t for t, _ in lag_samples]
+    lag_values = [lag * 1000 for _, lag in lag_samples]
+
+    endpoints = {}
+    for name in sorted({s.endpoint for s in samples}):
+        own = [s for s in samples if s.endpoint == name]
+        latencies = [(s.end - s.start) * 1000 for s in own if s.ok]
+        lags = [lag for lag in (window_lag(lag_times, lag_values, s.start, s.end) for s in own)
+                if lag is not None]
+        errors = sum(1 for s in own if not s.ok)
+        endpoints[name] = {
+            "requests": len(own),
+            "errors": errors,
+            "error_rate": round(errors / len(own), 4) if own else 0.0,
+            "rps": round(len(own) / duration, 2),
+            "latency_ms": summarize(latencies),
+            "loop_lag_ms": summarize(lags),
+        }
+
+    total_errors = sum(1 for s in samples if not s.ok)
+    return {
+        "params": params,
+        "totals": {
+            "requests": len(samples),
+            "errors": total_errors,
+            "rps": round(len(samples) / duration, 2),
+            "latency_ms": summarize([(s.end - s.start) * 1000 for s in samples if s.ok]),
+            "loop_lag_ms": summarize(lag_values),
+        },
+        "endpoints": endpoints,
+    }
+
+
+def print_report(report: Dict) -> None:
+    header = f"{'endpoint':<12} {'req':>7} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'lag p99':>8}"
+    print(header)
+    print("-" * len(header))
+    rows = list(report["endpoints"].items()) + [("TOTAL", report["totals"])]
+    for name, data in rows:
+        lat = data["latency_ms"]
+        print(f"{name:<12} {data['requests']:>7} {data['errors']:>5} {data['rps']:>8} "
+              f"{lat['p50']:>8} {lat['p95']:>8} {lat['p99']:>8} {data['loop_lag_ms']['p99']:>8}")
+
+
+async def wait_ready(url: str, timeout: float = 30.0) -> None:
+    deadline = time.time() + timeout
+    async with httpx.AsyncClient(timeout=2.0) as client:
+        while time.time() < deadline:
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise SystemExit(f"Server not ready: {url}")
+
+
+def drop_database(mongo_url: str, db_name: str) -> None:
+    from pymongo import MongoClient
+
+    client = MongoClient(mongo_url, serverSelectionTimeoutMS=3000)
+    try:
+        client.drop_database(db_name)
+    finally:
+        client.close()
+
+
+async def run(args) -> Dict:
+    mix = parse_mix(args.mix)
+    groq_port = free_port()
+    app_port = free_port()
+    output = None if args.verbose else subprocess.DEVNULL
+
+    if not args.keep_db:
+        drop_database(args.mongo_url, args.db_name)
+
+    fake_groq = subprocess.Popen(
+        [sys.executable, "-m", "bench.fake_groq", "--port", str(groq_port),
+         "--latency-ms", str(args.latency_ms), "--tokens-per-sec", str(args.tokens_per_sec),
+         "--error-rate", str(args.error_rate), "--rate-limit-rate", str(args.rate_limit_rate)],
+        stdout=output, stderr=output,
+    )
+    env = {
+        **os.environ,
+        "GROQ_API_KEY": "bench",
+        "GROQ_BASE_URL": f"http://127.0.0.1:{groq_port}",
+        "MONGODB_URL": args.mongo_url,
+        "MONGODB_DB_NAME": args.db_name,
+    }
+    app_server = subprocess.Popen(
+        [sys.executable, "-m", "bench.app_server", "--port", str(app_port)],
+        env=env, stdout=output, stderr=output,
+    )
+
+    base_url = f"http://127.0.0.1:{app_port}"
+    try:
+        await wait_ready(f"http://127.0.0.1:{groq_port}/health")
+        await wait_ready(f"{base_url}/health")
+
+        if args.warmup > 0:
+            await drive(base_url, mix, args.concurrency, args.warmup, args.unique_prompts, args.timeout)
+
+        started = time.time()
+        samples = await drive(base_url, mix, args.concurrency, args.duration, args.unique_prompts, args.timeout)
+        elapsed = time.time() - started
+
+        async with httpx.AsyncClient(base_url=base_url) as client:
+            lag = (await client.get("/__bench/loop-lag", params={"since": started})).json()
+    finally:
+        for process in (app_server, fake_groq):
+            process.terminate()
+        for process in (app_server, fake_groq):
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    params = {
+        "duration_s": args.duration,
+        "concurrency": args.concurrency,
+        "mix": mix,
+        "unique_prompts": args.unique_prompts,
+        "fake_groq": {
+            "latency_ms": args.latency_ms,
+            "tokens_per_sec": args.tokens_per_sec,
+            "error_rate": args.error_rate,
+            "rate_limit_rate": args.rate_limit_rate,
+        },
+    }
+    return build_report(samples, [tuple(s) for s in lag["samples"]], elapsed, params)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=30.0, help="Durée de la mesure (s)")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Durée de chauffe non mesurée (s)")
+    parser.add_argument("--concurrency", type=int, default=50, help="Nb de clients simultanés")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Poids par endpoint, ex: " + DEFAULT_MIX)
+    parser.add_argument("--unique-prompts", action="store_true", help="Prompts uniques (contourne les caches)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Timeout client HTTP (s)")
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="Faux Groq: délai avant le premier token")
+    parser.add_argument("--tokens-per-sec", type=float, default=250.0, help="Faux Groq: débit de tokens")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Faux Groq: proportion de 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Faux Groq: proportion de 429")
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--db-name", default="formMagique_bench")
+    parser.add_argument("--keep-db", action="store_true", help="Ne pas vider la base de bench avant la mesure")
+    parser.add_argument("--out", default="bench_output.json", help="Fichier JSON de résultats")
+    parser.add_argument("--verbose", action="store_true", help="Afficher les logs des serveurs")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📄 Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Export des soumissions: colonnes CSV issues des champs de base de la mission (aucune
+agrégation avant le premier octet), champs supplémentaires regroupés dans `values.extra`.
+"""
+import asyncio
+import csv
+import io
+import json
+from datetime import datetime
+
+import httpx
+from mongomock_motor import AsyncMongoMockClient
+
+from app.main import app
+from app.routers import submissions
+
+DOCS = [
+    {
+        "mission": "donation",
+        "language": "fr",
+        "values": {"name": "Alice", "email": "alice@example.com", "amount": 50, "recurrence": "Unique"},
+        "submitted_at": datetime(2024, 5, 1, 12, 0),
+    },
+    {
+        "mission": "donation",
+        "language": "en",
+        "values": {"name": "Bob", "email": "bob@example.com", "amount": 10, "dedication": "For Carol"},
+        "submitted_at": datetime(2024, 5, 2, 12, 0),
+    },
+]
+
+
+def _export(monkeypatch, params):
+    db = AsyncMongoMockClient()["test"]
+    monkeypatch.setattr(submissions, "get_database", lambda: db)
+
+    async def run():
+        await db.submissions.insert_many([dict(doc) for doc in DOCS])
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/api/submissions/export", params=params)
+
+    return asyncio.run(run())
+
+
+def test_csv_columns_from_mission_schema(monkeypatch):
+    response = _export(monkeypatch, {"format": "csv", "mission": "donation"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["values.name"] for row in rows] == ["Alice", "Bob"]
+    assert rows[0]["values.amount"] == "50"
+    assert rows[0]["values.extra"] == ""
+    assert json.loads(rows[1]["values.extra"]) == {"dedication": "For Carol"}
+    assert "values.dedication" not in rows[0]
+
+
+def test_ndjson_is_the_default_format(monkeypatch):
+    response = _export(monkeypatch, {})
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["values"]["name"] for line in lines] == ["Alice", "Bob"]
+
+
+def test_unknown_format_is_rejected(monkeypatch):
+    assert _export(monkeypatch, {"format": "xlsx"}).status_code == 422
@@ -0,0 +1,36 @@
+"""
+Usage Groq: le préchargement compte pour le max_tokens adaptatif de sa tâche unitaire,
+les lots (plusieurs éléments par réponse) n'y comptent pas.
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import groq_service as groq_module
+from app.services.groq_service import GroqService, base_task
+from app.services.prompt_builder import CompletionStats
+
+
+@pytest.mark.parametrize("task, expected", [
+    ("fields_prefetch", "fields"),
+    ("classify_batch", "classify"),
+    ("fields_batch", "fields"),
+    ("confirmation", "confirmation"),
+])
+def test_base_task(task, expected):
+    assert base_task(task) == expected
+
+
+def test_usage_recorded_under_base_task(monkeypatch):
+    stats = CompletionStats(window=10, percentile=95, headroom=1.2)
+    monkeypatch.setattr(groq_module, "completion_stats", stats)
+    service = GroqService(api_key="test-key")
+    usage = SimpleNamespace(prompt_tokens=120, completion_tokens=80)
+
+    service._record_usage(usage, "fields_prefetch", "model")
+    service._record_usage(usage, "fields", "model")
+    service._record_usage(SimpleNamespace(prompt_tokens=500, completion_tokens=900), "classify_batch", "model")
+
+    assert list(stats._samples) == ["fields"]
+    assert list(stats._samples["fields"]) == [80, 80]
+    assert service.model_for("fields_prefetch") == service.model_for("fields")
@@ -0,0 +1,147 @@
+"""
+Idempotence de /api/submit: une clé = une seule exécution, même entre workers; clé
+réutilisée avec un autre payload -> 422; verrou abandonné repris après expiration.
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from app.services import idempotency
+from app.services.idempotency import COLLECTION, IdempotencyConflict, IdempotencyStore, submit_key
+
+PAYLOAD = {"mission": "contact", "values": {"name": "Alice", "email": "alice@example.com"}}
+
+
+@pytest.fixture(autouse=True)
+def fast_polling(monkeypatch):
+    monkeypatch.setattr(idempotency, "POLL_INTERVAL", 0.01)
+
+
+class Submit:
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return {"id": f"submission-{self.calls}", "confirmation_status": "ready"}
+
+
+def _store(**overrides) -> IdempotencyStore:
+    return IdempotencyStore(**{"ttl": 600, "wait_timeout": 2, **overrides})
+
+
+def test_concurrent_same_key_runs_once():
+    db = AsyncMongoMockClient()["test"]
+    key, fingerprint = submit_key("abc-123", PAYLOAD)
+    submit = Submit()
+    # Deux requêtes dans le même worker, une dans un autre worker
+    worker_a, worker_b = _store(), _store()
+
+    async def run():
+        return await asyncio.gather(
+            worker_a.run(db, key, fingerprint, submit),
+            worker_a.run(db, key, fingerprint, submit),
+            worker_b.run(db, key, fingerprint, submit),
+        )
+
+    results = asyncio.run(run())
+    assert submit.calls == 1
+    assert {result["id"] for result, _ in results} == {"submission-1"}
+    assert sorted(replayed for _, replayed in results) == [False, True, True]
+
+
+def test_replay_after_completion():
+    db = AsyncMongoMockClient()["test"]
+    key, fingerprint = submit_key("abc-123", PAYLOAD)
+    submit = Submit()
+
+    async def run():
+        first = await _store().run(db, key, fingerprint, submit)
+        # Autre worker (cache local vide): réponse relue depuis MongoDB
+        second = await _store().run(db, key, fingerprint, submit)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert submit.calls == 1
+    assert first == (second[0], False)
+    assert second[1] is True
+
+
+@pytest.mark.parametrize("same_worker", [True, False])
+def test_mismatched_payload_is_422(same_worker):
+    db = AsyncMongoMockClient()["test"]
+    key, fingerprint = submit_key("abc-123", PAYLOAD)
+    _, other_fingerprint = submit_key("abc-123", {**PAYLOAD, "values": {"name": "Bob"}})
+    first_store = _store()
+    second_store = first_store if same_worker else _store()
+    submit = Submit()
+
+    async def run():
+        await first_store.run(db, key, fingerprint, submit)
+        await second_store.run(db, key, other_fingerprint, submit)
+
+    with pytest.raises(IdempotencyConflict) as excinfo:
+        asyncio.run(run())
+    assert excinfo.value.status_code == 422
+    assert submit.calls == 1
+
+
+def test_stale_lock_expires():
+    db = AsyncMongoMockClient()["test"]
+    key, fingerprint = submit_key("abc-123", PAYLOAD)
+    submit = Submit()
+    past = datetime.utcnow() - timedelta(seconds=1)
+
+    async def run():
+        # Worker arrêté pendant la soumission: verrou jamais libéré, expiré
+        await db[COLLECTION].insert_one({
+            "_id": key, "fingerprint": fingerprint, "status": "pending",
+            "created_at": past - timedelta(seconds=600), "expires_at": past,
+        })
+        result = await _store().run(db, key, fingerprint, submit)
+        return result, await db[COLLECTION].find_one({"_id": key})
+
+    (response, replayed), record = asyncio.run(run())
+    assert submit.calls == 1
+    assert replayed is False
+    assert record["status"] == "done" and record["response"] == response
+
+
+def test_live_lock_times_out_with_409():
+    db = AsyncMongoMockClient()["test"]
+    key, fingerprint = submit_key("abc-123", PAYLOAD)
+    submit = Submit()
+    now = datetime.utcnow()
+
+    async def run():
+        await db[COLLECTION].insert_one({
+            "_id": key, "fingerprint": fingerprint, "status": "pending",
+            "created_at": now, "expires_at": now + timedelta(seconds=600),
+        })
+        await _store(wait_timeout=0.05).run(db, key, fingerprint, submit)
+
+    with pytest.raises(IdempotencyConflict) as excinfo:
+        asyncio.run(run())
+    assert excinfo.value.status_code == 409
+    assert submit.calls == 0
+
+
+def test_failure_releases_the_key():
+    db = AsyncMongoMockClient()["test"]
+    key, fingerprint = submit_key("abc-123", PAYLOAD)
+    submit = Submit()
+
+    async def failing():
+        raise ConnectionError("mongo down")
+
+    async def run():
+        store = _store()
+        with pytest.raises(ConnectionError):
+            await store.run(db, key, fingerprint, failing)
+        return await store.run(db, key, fingerprint, submit)
+
+    assert asyncio.run(run())[1] is False
+    assert submit.calls == 1
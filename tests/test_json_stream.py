@@ -0,0 +1,58 @@
+"""
+JSONArrayItemParser: chaque objet du tableau est rendu dès qu'il est complet, quel que
+soit le découpage du texte en morceaux par le LLM.
+"""
+import json
+
+import pytest
+
+from app.services.json_stream import JSONArrayItemParser
+
+FIELDS = [
+    {"name": "age", "label": "Âge", "type": "number", "min": 18},
+    {"name": "skills", "label": "Compétences", "type": "select", "options": ["dev", "design"]},
+    {"name": "note", "label": "Dites \"bonjour\" {ou pas}", "type": "text"},
+]
+
+
+def _feed_all(parser, chunks):
+    items = []
+    for chunk in chunks:
+        items.extend(parser.feed(chunk))
+    return items
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64])
+def test_split_chunks(size):
+    text = "```json\n" + json.dumps({"fields": FIELDS}) + "\n```"
+    chunks = [text[i:i + size] for i in range(0, len(text), size)]
+    assert _feed_all(JSONArrayItemParser(), chunks) == FIELDS
+
+
+def test_bare_array():
+    assert _feed_all(JSONArrayItemParser(), [json.dumps(FIELDS)]) == FIELDS
+
+
+def test_items_yielded_as_soon_as_complete():
+    parser = JSONArrayItemParser()
+    assert parser.feed('{"fields": [{"name": "a"}, {"name": ') == [{"name": "a"}]
+    assert parser.feed('"b"}]}') == [{"name": "b"}]
+
+
+def test_escaped_quotes_and_braces_in_strings():
+    # \" et } dans une chaîne ne ferment ni la chaîne ni l'objet, même coupés entre deux morceaux
+    chunks = ['[{"label": "a \\', '"}\\\\', '", "name": "x"}]']
+    assert _feed_all(JSONArrayItemParser(), chunks) == [{"label": 'a "}\\', "name": "x"}]
+
+
+def test_malformed_tail():
+    parser = JSONArrayItemParser()
+    items = _feed_all(parser, ['{"fields": [{"name": "a"}, {"name": "b", "label": "Trunc'])
+    # L'objet tronqué n'est jamais rendu
+    assert items == [{"name": "a"}]
+    assert parser.feed("") == []
+
+
+def test_invalid_item_is_skipped():
+    items = _feed_all(JSONArrayItemParser(), ['[{"name": "a",}, {"name": "b"}]'])
+    assert items == [{"name": "b"}]
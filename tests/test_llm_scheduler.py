@@ -0,0 +1,135 @@
+"""
+Scheduler LLM avec une horloge factice: ordre de priorité des files, refus des appels
+dont l'échéance ne peut pas être tenue (fallback), budget proportionnel au nombre de clés.
+"""
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.services import ai_logic, llm_scheduler
+from app.services.degraded import is_degraded
+from app.services.groq_service import GroqService
+from app.services.llm_scheduler import LLMOverloaded, LLMScheduler, build_scheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(llm_scheduler, "time", fake)
+    return fake
+
+
+async def _settle() -> None:
+    # Laisse les futures résolues réveiller leurs tâches (wait_for + shield)
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+def _scheduler(**overrides) -> LLMScheduler:
+    options = dict(
+        max_concurrency=1,
+        requests_per_minute=0,
+        tokens_per_minute=0,
+        deadlines={"classify": 2.0, "fields": 5.0},
+        default_deadline=10.0,
+        max_queue=8,
+    )
+    options.update(overrides)
+    return LLMScheduler(**options)
+
+
+def test_priority_zero_admitted_before_queued_priority_three(clock):
+    scheduler = _scheduler()
+    admitted = []
+
+    async def call(task):
+        await scheduler.acquire(task, 10)
+        admitted.append(task)
+
+    async def run():
+        await scheduler.acquire("fields", 10)  # occupe le seul créneau
+        background = asyncio.create_task(call("summary"))  # priorité 3, en file d'abord
+        await asyncio.sleep(0)
+        classify = asyncio.create_task(call("classify"))  # priorité 0, arrive après
+        await asyncio.sleep(0)
+        assert scheduler.queued() == 2
+
+        scheduler.release(10)
+        await _settle()
+        assert admitted == ["classify"]
+        scheduler.release(10)
+        await asyncio.gather(background, classify)
+
+    asyncio.run(run())
+    assert admitted == ["classify", "summary"]
+
+
+def test_budget_refills_with_the_clock(clock):
+    scheduler = _scheduler(max_concurrency=8, requests_per_minute=60)
+    scheduler.requests.take(60)
+    assert scheduler.requests.wait_time(1) == pytest.approx(1.0)
+    clock.advance(0.5)
+    assert scheduler.requests.wait_time(1) == pytest.approx(0.5)
+    clock.advance(0.5)
+    assert scheduler.requests.wait_time(1) == 0
+
+
+def test_unreachable_deadline_is_shed_early(clock):
+    # Budget épuisé: 1 requête/s, classify doit partir sous 2 s, il faudrait en attendre 3
+    scheduler = _scheduler(max_concurrency=8, requests_per_minute=60)
+    scheduler.requests.take(62)
+
+    with pytest.raises(LLMOverloaded) as excinfo:
+        asyncio.run(scheduler.acquire("classify", 10))
+    assert excinfo.value.reason == "early"
+    assert scheduler.queued() == 0
+
+
+def test_expired_deadline_is_shed(clock):
+    scheduler = _scheduler(deadlines={"classify": 0.01})
+
+    async def run():
+        await scheduler.acquire("fields", 10)  # créneau jamais libéré
+        with pytest.raises(LLMOverloaded) as excinfo:
+            await scheduler.acquire("classify", 10)
+        assert excinfo.value.reason == "deadline"
+        assert scheduler.queued() == 0
+
+    asyncio.run(run())
+
+
+def test_shed_call_uses_the_fallback(clock, monkeypatch):
+    service = GroqService(api_key="test-key")
+    service.scheduler = _scheduler(max_concurrency=8, requests_per_minute=60)
+    service.scheduler.requests.take(62)
+    monkeypatch.setattr(ai_logic, "groq_service", service)
+
+    async def run():
+        result = await ai_logic.classify_mission_from_prompt(
+            "je veux devenir bénévole", use_cache=False, use_local=False
+        )
+        return result, is_degraded()
+
+    result, degraded = asyncio.run(run())
+    assert degraded
+    assert result["mission"] == "volunteer"
+
+
+@pytest.mark.parametrize("api_keys", [1, 3])
+def test_build_scheduler_scales_budget_with_keys(api_keys):
+    scheduler = build_scheduler(api_keys)
+    assert scheduler.requests.capacity == settings.GROQ_REQUESTS_PER_MINUTE * api_keys
+    assert scheduler.tokens.capacity == settings.GROQ_TOKENS_PER_MINUTE * api_keys
+    assert scheduler.max_concurrency == settings.GROQ_MAX_CONCURRENCY
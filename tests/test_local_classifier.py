@@ -0,0 +1,43 @@
+"""
+Demandes voisines d'une mission (remboursement, annulation, reçu...) que le classificateur
+local ne doit pas trancher seul: elles passent sous LOCAL_CLASSIFIER_THRESHOLD et vont au LLM.
+"""
+import pytest
+
+from app.config import settings
+from app.services.local_classifier import local_classifier
+
+NEAR_MISSES = [
+    "Can I get a refund of my donation?",
+    "how do I cancel my monthly donation",
+    "can I change my donation amount",
+    "where is my donation receipt",
+    "I want my money back",
+    "comment annuler mon don",
+    "je veux me faire rembourser mon don",
+    "je souhaite modifier le montant de mon don mensuel",
+    "je ne veux pas faire de don",
+    "I don't want to volunteer",
+]
+
+CLEAR_REQUESTS = [
+    ("I want to make a donation to support you", "donation"),
+    ("je souhaite donner de l'argent à l'association", "donation"),
+    ("je veux faire un don mensuel à l'association", "donation"),
+    ("I want to volunteer on weekends and help", "volunteer"),
+    ("je veux devenir bénévole et aider l'association", "volunteer"),
+    ("j'ai une question à vous poser", "contact"),
+    ("je veux des informations sur l'association", "information"),
+]
+
+
+@pytest.mark.parametrize("text", NEAR_MISSES)
+def test_near_miss_goes_to_llm(text):
+    assert local_classifier.predict(text)["confidence"] < settings.LOCAL_CLASSIFIER_THRESHOLD
+
+
+@pytest.mark.parametrize("text, mission", CLEAR_REQUESTS)
+def test_clear_request_classified_locally(text, mission):
+    result = local_classifier.predict(text)
+    assert result["mission"] == mission
+    assert result["confidence"] >= settings.LOCAL_CLASSIFIER_THRESHOLD
@@ -0,0 +1,54 @@
+"""
+En-tête Server-Timing: le rendu JSON a son propre poste, et une requête fusionnée par le
+single-flight compte son attente comme temps LLM.
+"""
+import asyncio
+
+import httpx
+
+from app.main import app
+from app.services import metrics
+from app.services.singleflight import SingleFlight
+
+
+def _timings(header: str) -> dict:
+    parts = (part.strip().split(";") for part in header.split(","))
+    return {name: float(dur.split("=")[1]) for name, dur in parts}
+
+
+def test_server_timing_has_serialization():
+    async def get():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/cache/stats")
+
+    response = asyncio.run(get())
+    timings = _timings(response.headers["server-timing"])
+    assert set(timings) == {"llm", "db", "serialization", "app", "total"}
+    assert timings["serialization"] + timings["app"] <= timings["total"] + 0.1
+    assert metrics.HTTP_SERIALIZATION._values[("cache_stats",)][-1] >= 1
+
+
+def test_singleflight_follower_wait_counts_as_llm():
+    flight = SingleFlight()
+
+    async def call_llm():
+        await asyncio.sleep(0.05)
+        metrics.record_timing("llm", 0.05)
+        return {"mission": "contact"}
+
+    async def request():
+        timings = {}
+        token = metrics._request_timings.set(timings)
+        try:
+            await flight.do("classify:x", call_llm)
+        finally:
+            metrics._request_timings.reset(token)
+        return timings
+
+    async def run():
+        return await asyncio.gather(request(), request())
+
+    leader, follower = asyncio.run(run())
+    assert leader["llm"] == 0.05
+    assert follower["llm"] >= 0.04
@@ -0,0 +1,91 @@
+"""
+Pagination par curseur de GET /api/submissions: curseurs opaques, pages stables même
+quand plusieurs soumissions ont la même date, curseur invalide -> 400.
+"""
+import asyncio
+import base64
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+
+from app.main import app
+from app.routers import submissions
+from app.services.pagination import decode_cursor, encode_cursor
+
+START = datetime(2024, 5, 1, 12, 0, 0)
+
+
+def test_cursor_round_trip():
+    doc = {"_id": ObjectId(), "submitted_at": START + timedelta(microseconds=123)}
+    assert decode_cursor(encode_cursor(doc)) == (doc["submitted_at"], doc["_id"])
+
+
+@pytest.mark.parametrize("cursor", [
+    "not-a-cursor",
+    "",
+    base64.urlsafe_b64encode(b'{"t": "2024-05-01T12:00:00"}').decode(),
+    base64.urlsafe_b64encode(b'{"t": "yesterday", "id": "663200000000000000000000"}').decode(),
+    base64.urlsafe_b64encode(b'{"t": "2024-05-01T12:00:00", "id": "zzz"}').decode(),
+    base64.urlsafe_b64encode(b'[1, 2]').decode(),
+])
+def test_invalid_cursor_raises(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def _pages(monkeypatch, docs, limit):
+    db = AsyncMongoMockClient()["test"]
+    monkeypatch.setattr(submissions, "get_database", lambda: db)
+
+    async def run():
+        await db.submissions.insert_many(docs)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            pages, prev_cursors = [], []
+            response = await client.get("/api/submissions", params={"limit": limit})
+            while True:
+                assert response.status_code == 200
+                pages.append([doc["_id"] for doc in response.json()])
+                prev_cursors.append(response.headers.get("X-Prev-Cursor"))
+                cursor = response.headers.get("X-Next-Cursor")
+                if not cursor:
+                    break
+                response = await client.get("/api/submissions", params={"limit": limit, "after": cursor})
+            # Retour en arrière depuis la dernière page
+            back = await client.get("/api/submissions", params={"limit": limit, "before": prev_cursors[-1]})
+            return pages, [doc["_id"] for doc in back.json()]
+
+    return asyncio.run(run())
+
+
+def test_ties_on_submitted_at(monkeypatch):
+    # 3 dates distinctes, 4 soumissions par date: les pages coupent au milieu des ex aequo
+    docs = [
+        {"_id": ObjectId(), "mission": "contact", "values": {}, "submitted_at": START + timedelta(minutes=i // 4)}
+        for i in range(12)
+    ]
+    pages, back = _pages(monkeypatch, docs, limit=5)
+
+    newest_first = sorted(docs, key=lambda d: (d["submitted_at"], d["_id"]), reverse=True)
+    expected = [str(d["_id"]) for d in newest_first]
+    assert [len(page) for page in pages] == [5, 5, 2]
+    assert sum(pages, []) == expected
+    assert back == pages[-2]
+
+
+def test_tampered_cursor_is_rejected(monkeypatch):
+    db = AsyncMongoMockClient()["test"]
+    monkeypatch.setattr(submissions, "get_database", lambda: db)
+    cursor = encode_cursor({"_id": ObjectId(), "submitted_at": START})
+
+    async def get(params):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/api/submissions", params=params)
+
+    assert asyncio.run(get({"after": cursor[:-3] + "!!!"})).status_code == 400
+    assert asyncio.run(get({"before": "garbage"})).status_code == 400
+    assert asyncio.run(get({"after": cursor, "before": cursor})).status_code == 400
@@ -0,0 +1,114 @@
+"""
+Stockage SQLite partagé du rate limiter: fenêtre glissante au changement de fenêtre,
+compteurs partagés entre deux instances (deux workers) sur le même fichier.
+"""
+import sqlite3
+import threading
+
+import pytest
+
+from app.middleware import rate_limit_storage
+from app.middleware.rate_limit_storage import SQLiteStorage
+
+EXPIRY = 60
+LIMIT = 10
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 600.0  # début de la fenêtre n° 10
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(rate_limit_storage, "time", fake)
+    return fake
+
+
+def _storage(tmp_path, sync_interval: float = 0.0) -> SQLiteStorage:
+    return SQLiteStorage(f"sqlite://{tmp_path}/rate_limits.db", sync_interval=sync_interval)
+
+
+def _hits(storage, count: int) -> int:
+    return sum(storage.acquire_sliding_window_entry("ip", LIMIT, EXPIRY) for _ in range(count))
+
+
+def test_window_rollover(tmp_path, clock):
+    storage = _storage(tmp_path)
+    assert _hits(storage, LIMIT + 1) == LIMIT
+
+    # Mi-fenêtre suivante: la précédente compte pour moitié
+    clock.now += EXPIRY + EXPIRY / 2
+    assert _hits(storage, LIMIT) == LIMIT // 2
+    previous, _, current, _ = storage.get_sliding_window("ip", EXPIRY)
+    assert (previous, current) == (LIMIT, LIMIT // 2)
+
+    # Deux fenêtres plus tard, plus rien ne compte
+    clock.now += 2 * EXPIRY
+    assert _hits(storage, LIMIT + 1) == LIMIT
+
+
+def test_two_instances_share_counters(tmp_path, clock):
+    first, second = _storage(tmp_path), _storage(tmp_path)
+    assert _hits(first, 6) == 6
+    assert _hits(second, 6) == 4
+    assert _hits(first, 1) == 0
+    assert second.get_sliding_window("ip", EXPIRY)[2] == LIMIT
+
+
+def test_batched_instances_share_counters(tmp_path, clock):
+    # Intervalle long: les synchronisations sont déclenchées à la main
+    first, second = _storage(tmp_path, sync_interval=3600), _storage(tmp_path, sync_interval=3600)
+    assert _hits(first, 6) == 6
+    first.sync_all()
+    second.acquire_sliding_window_entry("ip", LIMIT, EXPIRY)
+    second.sync_all()
+    assert second.get_sliding_window("ip", EXPIRY)[2] == 7
+    assert _hits(second, 6) == 3
+    second.sync_all()
+    first.sync_all()
+    assert _hits(first, 1) == 0
+
+
+def test_batched_rollover_pushes_hits_to_their_window(tmp_path, clock):
+    storage = _storage(tmp_path, sync_interval=3600)
+    assert _hits(storage, 4) == 4
+    clock.now += EXPIRY
+    storage.sync_all()
+    assert storage.get(storage._counter_key("ip", 10)) == 4
+    assert storage.get_sliding_window("ip", EXPIRY)[:3:2] == (4, 0)
+
+
+def test_batched_check_does_no_io_on_the_caller_thread(tmp_path, clock, monkeypatch):
+    storage = _storage(tmp_path, sync_interval=3600)
+    caller = threading.current_thread()
+
+    def off_caller(fn):
+        def wrapper(*args):
+            assert threading.current_thread() is not caller, "storage I/O on the event loop thread"
+            return fn(*args)
+        return wrapper
+
+    monkeypatch.setattr(storage, "_counter_incr", off_caller(storage._counter_incr))
+    monkeypatch.setattr(storage, "_counter_get", off_caller(storage._counter_get))
+    assert _hits(storage, LIMIT + 1) == LIMIT
+
+
+def test_batched_storage_failure_keeps_hits(tmp_path, clock, monkeypatch):
+    storage = _storage(tmp_path, sync_interval=3600)
+    assert _hits(storage, 3) == 3
+
+    def locked(*args):
+        raise sqlite3.OperationalError("database is locked")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(storage, "_counter_incr", locked)
+        storage.sync_all()  # échec journalisé, pas d'exception
+    assert storage.get(storage._counter_key("ip", 10)) == 0
+
+    storage.sync_all()
+    assert storage.get(storage._counter_key("ip", 10)) == 3
@@ -0,0 +1,72 @@
+"""
+Paires étiquetées qui calibrent SEMANTIC_CACHE_THRESHOLD: les paraphrases doivent
+réutiliser la réponse en cache, les demandes différentes jamais.
+"""
+import pytest
+
+from app.config import settings
+from app.services.semantic_cache import SemanticCache, _guards, embed
+
+PARAPHRASES = [
+    ("je souhaite devenir bénévole", "j'aimerais être bénévole"),
+    ("Je souhaite devenir bénévole svp", "je souhaite devenir bénévole"),
+    ("Bonjour, je veux devenir bénévole", "je veux devenir bénévole"),
+    ("je veux devenir bénévoles", "je veux devenir bénévole"),
+    ("je veux faire un don", "je voudrais faire un don"),
+    ("je veux des informations sur vos projets", "je voudrais des infos sur vos projets"),
+    ("je veux en savoir plus sur l'association", "je voudrais en savoir plus sur l'association"),
+    ("comment puis-je vous contacter ?", "comment pourrais-je vous contacter"),
+    ("I want to volunteer", "I would like to volunteer"),
+    ("I want to become a volunteer", "I'd like to be a volunteer"),
+    ("I want to make a donation", "I'd like to make a donation"),
+    ("hello, I want to contact the team", "I want to contact the team"),
+]
+
+DIFFERENT_REQUESTS = [
+    ("I want to help", "I want help"),
+    ("I need help", "I want to help"),
+    ("je veux aider", "je veux de l'aide"),
+    ("don de 10 euros", "don de 1000 euros"),
+    ("je veux faire un don", "je ne veux pas faire un don"),
+    ("I want to donate", "I don't want to donate"),
+    ("je veux devenir bénévole", "je veux faire un don"),
+    ("I want to volunteer", "I want to donate"),
+    ("je veux des informations sur le bénévolat", "je veux devenir bénévole"),
+    ("je veux faire un don mensuel", "je veux faire un don annuel"),
+    ("je veux annuler mon don", "je veux faire un don"),
+    ("I want to donate money", "I want to donate time"),
+    ("contactez-moi", "je veux vous contacter pour un don"),
+]
+
+
+def _cache() -> SemanticCache:
+    return SemanticCache(
+        max_entries=16,
+        dim=settings.SEMANTIC_CACHE_DIM,
+        threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+        ttl=60,
+    )
+
+
+@pytest.mark.parametrize("cached, prompt", PARAPHRASES)
+def test_paraphrase_hits(cached, prompt):
+    cache = _cache()
+    cache.set("classify", cached, {"mission": "volunteer"}, language="fr")
+    assert cache.get("classify", prompt, language="fr") == {"mission": "volunteer"}
+
+
+@pytest.mark.parametrize("cached, prompt", DIFFERENT_REQUESTS)
+def test_different_request_misses(cached, prompt):
+    cache = _cache()
+    cache.set("classify", cached, {"mission": "volunteer"}, language="fr")
+    assert cache.get("classify", prompt, language="fr") is None
+
+
+def test_threshold_separates_labelled_pairs():
+    def score(a, b):
+        return float(embed(a, settings.SEMANTIC_CACHE_DIM) @ embed(b, settings.SEMANTIC_CACHE_DIM))
+
+    assert min(score(a, b) for a, b in PARAPHRASES) >= settings.SEMANTIC_CACHE_THRESHOLD
+    # Paires que les garde-fous (négation, nombres) ne séparent pas: la similarité seule doit suffire
+    unguarded = [(a, b) for a, b in DIFFERENT_REQUESTS if _guards(a) == _guards(b)]
+    assert max(score(a, b) for a, b in unguarded) < settings.SEMANTIC_CACHE_THRESHOLD
@@ -0,0 +1,92 @@
+"""
+SingleFlight: les appels concurrents de même clé partagent un seul appel au backend,
+y compris son exception, et la clé est libérée ensuite.
+"""
+import asyncio
+
+import pytest
+
+from app.services.singleflight import SingleFlight
+
+
+class Backend:
+    def __init__(self, fail: bool = False):
+        self.calls = 0
+        self.fail = fail
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise RuntimeError("LLM down")
+        return {"mission": "volunteer", "calls": self.calls}
+
+
+def test_concurrent_identical_calls_make_one_backend_call():
+    flight = SingleFlight()
+    backend = Backend()
+
+    async def run():
+        return await asyncio.gather(*(flight.do("classify:same", backend) for _ in range(20)))
+
+    results = asyncio.run(run())
+    assert backend.calls == 1
+    assert all(result == {"mission": "volunteer", "calls": 1} for result in results)
+    # Chaque appelant a sa propre copie
+    results[0]["mission"] = "contact"
+    assert results[1]["mission"] == "volunteer"
+
+
+def test_different_keys_are_not_merged():
+    flight = SingleFlight()
+    backend = Backend()
+
+    async def run():
+        await asyncio.gather(flight.do("classify:a", backend), flight.do("classify:b", backend))
+
+    asyncio.run(run())
+    assert backend.calls == 2
+
+
+def test_leader_exception_reaches_every_waiter():
+    flight = SingleFlight()
+    backend = Backend(fail=True)
+
+    async def run():
+        return await asyncio.gather(
+            *(flight.do("classify:same", backend) for _ in range(5)), return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+    assert backend.calls == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_key_cleared_after_failure():
+    flight = SingleFlight()
+    failing, working = Backend(fail=True), Backend()
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            await flight.do("classify:same", failing)
+        assert flight.in_flight() == 0
+        # L'appel suivant relance le backend au lieu de recevoir l'ancienne erreur
+        return await flight.do("classify:same", working)
+
+    assert asyncio.run(run()) == {"mission": "volunteer", "calls": 1}
+    assert working.calls == 1
+
+
+def test_cancelled_waiter_does_not_cancel_the_call():
+    flight = SingleFlight()
+    backend = Backend()
+
+    async def run():
+        first = asyncio.create_task(flight.do("classify:same", backend))
+        second = asyncio.create_task(flight.do("classify:same", backend))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(run())["mission"] == "volunteer"
+    assert backend.calls == 1
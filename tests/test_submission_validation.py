@@ -0,0 +1,63 @@
+from app.constants.missions import MissionEnum
+from app.schemas.generate import FormField
+from app.services.submission_validation import validate_submission
+
+DONATION = {"name": "Alice", "email": "alice@example.com", "amount": 50, "recurrence": "Unique"}
+
+EXTRA_FIELDS = [
+    FormField(name="consent", label="J'accepte d'être recontacté", type="checkbox", required=True),
+    FormField(name="age", label="Âge", type="number", required=True, min=18),
+]
+
+
+def _errors(errors):
+    return {error["loc"][-1]: error["type"] for error in errors}
+
+
+def test_valid_donation():
+    assert validate_submission(MissionEnum.DONATION, DONATION) == []
+
+
+def test_base_field_errors():
+    values = {"name": "Alice", "email": "nope", "amount": "abc", "recurrence": "Weekly"}
+    assert _errors(validate_submission(MissionEnum.DONATION, values)) == {
+        "email": "invalid_email",
+        "amount": "invalid_number",
+        "recurrence": "invalid_option",
+    }
+
+
+def test_amount_below_minimum():
+    values = dict(DONATION, amount=0)
+    assert _errors(validate_submission(MissionEnum.DONATION, values)) == {"amount": "out_of_range"}
+
+
+def test_extra_fields_are_validated():
+    values = {"name": "A", "email": "a@b.co", "message": "hi", "consent": "maybe"}
+    assert _errors(validate_submission(MissionEnum.CONTACT, values, EXTRA_FIELDS)) == {
+        "consent": "invalid_boolean",
+        "age": "missing",
+    }
+
+
+def test_extra_fields_valid():
+    values = {"name": "A", "email": "a@b.co", "message": "hi", "consent": True, "age": "21"}
+    assert validate_submission(MissionEnum.CONTACT, values, EXTRA_FIELDS) == []
+
+
+def test_unchecked_required_checkbox_is_missing():
+    for unchecked in (False, "false", "off", "0"):
+        values = {"name": "A", "email": "a@b.co", "message": "hi", "consent": unchecked, "age": 30}
+        assert _errors(validate_submission(MissionEnum.CONTACT, values, EXTRA_FIELDS)) == {"consent": "missing"}
+
+
+def test_unchecked_optional_checkbox_is_accepted():
+    newsletter = [FormField(name="newsletter", label="Newsletter", type="checkbox")]
+    values = {"name": "A", "email": "a@b.co", "message": "hi", "newsletter": False}
+    assert validate_submission(MissionEnum.CONTACT, values, newsletter) == []
+
+
+def test_extra_field_cannot_override_base_field():
+    override = [FormField(name="email", label="E-mail", type="text")]
+    values = {"name": "A", "email": "nope", "message": "hi"}
+    assert _errors(validate_submission(MissionEnum.CONTACT, values, override)) == {"email": "invalid_email"}
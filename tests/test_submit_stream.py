@@ -0,0 +1,53 @@
+"""
+/submit/stream: un client qui se déconnecte en plein flux ne laisse pas un message tronqué
+marqué 'ready'; la soumission reste 'pending' et le message complet est régénéré.
+"""
+import asyncio
+
+from mongomock_motor import AsyncMongoMockClient
+from starlette.requests import Request
+
+from app.main import app
+from app.routers import submit
+from app.schemas.submit import SubmitRequest
+
+
+def _request() -> Request:
+    return Request({
+        "type": "http",
+        "method": "POST",
+        "path": "/submit/stream",
+        "headers": [],
+        "client": ("127.0.0.1", 12345),
+        "app": app,
+    })
+
+
+def test_cancelled_stream_keeps_submission_pending(monkeypatch):
+    db = AsyncMongoMockClient()["test"]
+    jobs = []
+
+    async def fake_stream(**kwargs):
+        yield "Merci Alice, "
+        yield "votre demande"
+        yield " est bien reçue."
+
+    monkeypatch.setattr(submit, "get_database", lambda: db)
+    monkeypatch.setattr(submit, "stream_confirmation_message", fake_stream)
+    monkeypatch.setattr(submit.confirmation_workers, "enqueue", lambda job: jobs.append(job) or True)
+
+    async def run():
+        payload = SubmitRequest(mission="contact", values={"name": "Alice", "email": "alice@example.com", "message": "Bonjour"})
+        response = await submit.submit_form_stream(_request(), payload)
+        stream = response.body_iterator
+        first = await stream.__anext__()
+        assert "delta" in first
+        # Déconnexion du client après le premier fragment
+        await stream.aclose()
+        await asyncio.gather(*list(submit._stream_saves))
+        return await db.submissions.find_one({})
+
+    doc = asyncio.run(run())
+    assert doc["confirmation_status"] == "pending"
+    assert doc["confirmation_message"] == ""
+    assert [job.submission_id for job in jobs] == [doc["_id"]]
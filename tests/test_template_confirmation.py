@@ -0,0 +1,57 @@
+"""
+CONFIRMATION_MODE="template": tant que le pool de modèles est vide, le message générique
+est une réponse de secours (degraded / 'fallback'), comme quand le LLM est indisponible.
+"""
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.constants.missions import MissionEnum
+from app.services import ai_logic
+from app.services.degraded import is_degraded
+from app.services.llm_scheduler import LLMUnavailable
+
+VALUES = {"name": "Alice", "email": "alice@example.com"}
+
+
+@pytest.fixture
+def empty_pool(monkeypatch):
+    monkeypatch.setattr(settings, "CONFIRMATION_MODE", "template")
+    monkeypatch.setattr(ai_logic.confirmation_templates, "render", lambda *args: None)
+
+
+def test_empty_pool_is_degraded(empty_pool):
+    async def run():
+        message = await ai_logic.generate_confirmation_message(MissionEnum.CONTACT, VALUES, language="fr")
+        return message, is_degraded()
+
+    message, degraded = asyncio.run(run())
+    assert message == ai_logic.fallback_confirmation_message(MissionEnum.CONTACT, None, "fr", VALUES)
+    assert degraded
+
+
+def test_empty_pool_stream_is_degraded(empty_pool):
+    async def run():
+        parts = [delta async for delta in ai_logic.stream_confirmation_message(MissionEnum.CONTACT, VALUES)]
+        return parts, is_degraded()
+
+    parts, degraded = asyncio.run(run())
+    assert len(parts) == 1
+    assert degraded
+
+
+def test_empty_pool_without_fallback_raises(empty_pool):
+    # Le worker de confirmation réessaie (le pool se remplit entre-temps) avant le message de secours
+    with pytest.raises(LLMUnavailable):
+        asyncio.run(ai_logic.generate_confirmation_message(MissionEnum.CONTACT, VALUES, use_fallback=False))
+
+
+def test_filled_template_is_not_degraded(monkeypatch):
+    monkeypatch.setattr(settings, "CONFIRMATION_MODE", "template")
+    monkeypatch.setattr(ai_logic.confirmation_templates, "render", lambda *args: "Merci Alice !")
+
+    async def run():
+        return await ai_logic.generate_confirmation_message(MissionEnum.CONTACT, VALUES), is_degraded()
+
+    assert asyncio.run(run()) == ("Merci Alice !", False)
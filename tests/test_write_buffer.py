@@ -0,0 +1,113 @@
+"""
+Write-behind des soumissions: un insert_many par lot plein, par délai écoulé, et à l'arrêt
+pour les insertions encore en attente.
+"""
+import asyncio
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from app.services import write_buffer
+from app.services.write_buffer import SubmissionWriteBuffer
+
+
+class Database:
+    """Base mongomock qui note la taille de chaque insert_many."""
+
+    def __init__(self):
+        self._db = AsyncMongoMockClient()["test"]
+        self.batches = []
+        insert_many = self._db.submissions.insert_many
+
+        async def counting_insert_many(docs, **kwargs):
+            self.batches.append(len(docs))
+            return await insert_many(docs, **kwargs)
+
+        self.submissions = self._db.submissions
+        self.submissions.insert_many = counting_insert_many
+
+    async def count(self) -> int:
+        return await self._db.submissions.count_documents({})
+
+
+@pytest.fixture(autouse=True)
+def no_stats(monkeypatch):
+    recorded = []
+
+    async def record_submissions(db, docs, delta=1):
+        recorded.extend(docs)
+
+    monkeypatch.setattr(write_buffer, "record_submissions", record_submissions)
+    return recorded
+
+
+def _doc(i: int) -> dict:
+    return {"mission": "contact", "values": {"name": f"user{i}"}}
+
+
+def test_size_triggered_flush():
+    buffer = SubmissionWriteBuffer(max_batch=5, max_delay=60)
+    db = Database()
+
+    async def run():
+        # Délai d'une minute: seul le lot plein peut déclencher l'écriture
+        ids = await asyncio.wait_for(asyncio.gather(*(buffer.insert(db, _doc(i)) for i in range(5))), 1)
+        return ids, await db.count()
+
+    ids, count = asyncio.run(run())
+    assert db.batches == [5]
+    assert count == 5
+    assert len(set(ids)) == 5
+
+
+def test_time_triggered_flush(no_stats):
+    buffer = SubmissionWriteBuffer(max_batch=100, max_delay=0.01)
+    db = Database()
+
+    async def run():
+        first = asyncio.create_task(buffer.insert(db, _doc(1)))
+        second = asyncio.create_task(buffer.insert(db, _doc(2)))
+        await asyncio.sleep(0)
+        assert db.batches == [] and buffer.queued() == 2
+        return await asyncio.wait_for(asyncio.gather(first, second), 1)
+
+    ids = asyncio.run(run())
+    assert db.batches == [2]
+    assert [doc["_id"] for doc in no_stats] == ids
+
+
+def test_stop_drains_pending_inserts():
+    buffer = SubmissionWriteBuffer(max_batch=100, max_delay=60)
+    db = Database()
+
+    async def run():
+        inserts = [asyncio.create_task(buffer.insert(db, _doc(i))) for i in range(3)]
+        await asyncio.sleep(0)
+        assert await db.count() == 0
+        await buffer.stop()
+        ids = await asyncio.gather(*inserts)
+        return ids, await db.count()
+
+    ids, count = asyncio.run(run())
+    assert db.batches == [3]
+    assert count == 3
+    assert all(ids)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(buffer.insert(db, _doc(4)))
+
+
+def test_failed_write_reaches_every_caller():
+    buffer = SubmissionWriteBuffer(max_batch=2, max_delay=60)
+    db = Database()
+
+    async def failing_insert_many(docs, **kwargs):
+        raise ConnectionError("mongo down")
+
+    db.submissions.insert_many = failing_insert_many
+
+    async def run():
+        return await asyncio.gather(buffer.insert(db, _doc(1)), buffer.insert(db, _doc(2)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, ConnectionError) for result in results)